@@ -1,60 +1,107 @@
-import pandas as pd
+import os
+import sys
+
+# pipeline/ lives at the repo root; make it importable from any working directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+
+# Statistics from one-pass column sketches instead of fully loaded frames
+from pipeline.profile import profile_csv, render_report
+# Restore dictionary-encoded label columns (python -m pipeline.labels)
+from pipeline.labels import read_csv
+# Append each summary to the shared run history (python -m pipeline.runlog)
+from pipeline.runlog import RunLog
+
+REPORT_FILE = 'data_summary_report.txt'
+
+
+def profile_and_record(run_log, dataset, path):
+    """Profile a CSV and record the run (rows and column statistics) in the run history"""
+    with run_log.run(dataset, 'summary', input_file=path, output_file=REPORT_FILE) as run:
+        with run.step('profile'):
+            profile = profile_csv(path)
+        run.set_rows(profile.rows, profile.rows)
+        run.add_profile(profile)
+    return profile
+
+
+def summarize(run_log, dataset, path, target, columns):
+    """(rows, features, target value counts, describe() of columns, profile)"""
+    profile = profile_and_record(run_log, dataset, path)
+    return (profile.rows, len(profile.columns), profile.value_counts(target),
+            profile.describe(columns), profile)
+
+
+def write_dataset_section(f, run_log, dataset, heading, path, target, columns, stats_title):
+    rows, features, counts, described, profile = summarize(run_log, dataset, path, target, columns)
+    cases, non_cases = int(counts.get(1, 0)), int(counts.get(0, 0))
+    f.write(heading + "\n")
+    f.write("-"*80 + "\n")
+    f.write(f"Total Records: {rows}\n")
+    f.write(f"Total Features: {features}\n")
+    f.write(f"Diabetes Cases: {cases} ({cases/rows*100:.1f}%)\n")
+    f.write(f"Non-Diabetes: {non_cases} ({non_cases/rows*100:.1f}%)\n\n")
+
+    f.write(f"{stats_title}:\n")
+    f.write(described.to_string())
+    f.write("\n\n")
+    return profile
+
 
 def generate_summary_report():
     """Generate comprehensive data summary"""
-    
-    with open('data_summary_report.txt', 'w') as f:
+
+    run_log = RunLog()
+    with open(REPORT_FILE, 'w') as f:
         f.write("="*80 + "\n")
         f.write("DATA SUMMARY REPORT\n")
         f.write("Diabetes Risk Factors Analysis\n")
         f.write("="*80 + "\n\n")
-        
+
         # Pima Dataset
-        df_pima = pd.read_csv('pima_diabetes_with_features.csv')
-        f.write("1. PIMA INDIANS DIABETES DATASET\n")
-        f.write("-"*80 + "\n")
-        f.write(f"Total Records: {len(df_pima)}\n")
-        f.write(f"Total Features: {len(df_pima.columns)}\n")
-        f.write(f"Diabetes Cases: {df_pima['Outcome'].sum()} ({df_pima['Outcome'].mean()*100:.1f}%)\n")
-        f.write(f"Non-Diabetes: {(df_pima['Outcome']==0).sum()} ({(df_pima['Outcome']==0).mean()*100:.1f}%)\n\n")
-        
-        f.write("Key Statistics:\n")
-        f.write(df_pima[['Glucose', 'BMI', 'Age', 'Pregnancies']].describe().to_string())
-        f.write("\n\n")
-        
+        pima_profile = write_dataset_section(
+            f, run_log, 'pima', "1. PIMA INDIANS DIABETES DATASET",
+            'pima_diabetes_with_features.csv', 'Outcome',
+            ['Glucose', 'BMI', 'Age', 'Pregnancies'], "Key Statistics")
+
         # Health Indicators
-        df_health = pd.read_csv('diabetes_health_indicators_with_features.csv')
-        f.write("2. HEALTH INDICATORS DATASET (BRFSS 2015)\n")
-        f.write("-"*80 + "\n")
-        f.write(f"Total Records: {len(df_health)}\n")
-        f.write(f"Total Features: {len(df_health.columns)}\n")
-        f.write(f"Diabetes Cases: {df_health['Diabetes_binary'].sum()} ({df_health['Diabetes_binary'].mean()*100:.1f}%)\n")
-        f.write(f"Non-Diabetes: {(df_health['Diabetes_binary']==0).sum()} ({(df_health['Diabetes_binary']==0).mean()*100:.1f}%)\n\n")
-        
-        f.write("Risk Score Summary:\n")
-        f.write(df_health[['Behavioral_Risk_Score', 'Clinical_Risk_Score', 'Total_Risk_Score']].describe().to_string())
-        f.write("\n\n")
-        
+        health_profile = write_dataset_section(
+            f, run_log, 'brfss', "2. HEALTH INDICATORS DATASET (BRFSS 2015)",
+            'diabetes_health_indicators_with_features.csv', 'Diabetes_binary',
+            ['Behavioral_Risk_Score', 'Clinical_Risk_Score', 'Total_Risk_Score'],
+            "Risk Score Summary")
+
         # Global Prevalence
-        df_global = pd.read_csv('world_diabetes_with_features.csv')
+        world_file = 'world_diabetes_with_features.csv'
+        change_columns = ['2011', '2024', 'Absolute_Change', 'Percent_Change']
+        world_profile = profile_and_record(run_log, 'world', world_file)
+        countries = world_profile.rows
+        means = world_profile.describe(change_columns).loc['mean']
         f.write("3. GLOBAL DIABETES PREVALENCE DATASET\n")
         f.write("-"*80 + "\n")
-        f.write(f"Total Countries: {len(df_global)}\n")
+        f.write(f"Total Countries: {countries}\n")
         f.write(f"Time Points: 2011, 2024\n")
-        f.write(f"Mean Prevalence 2011: {df_global['2011'].mean():.2f}%\n")
-        f.write(f"Mean Prevalence 2024: {df_global['2024'].mean():.2f}%\n")
-        f.write(f"Mean Absolute Change: {df_global['Absolute_Change'].mean():.2f}%\n")
-        f.write(f"Mean Percent Change: {df_global['Percent_Change'].mean():.2f}%\n\n")
-        
+        f.write(f"Mean Prevalence 2011: {means['2011']:.2f}%\n")
+        f.write(f"Mean Prevalence 2024: {means['2024']:.2f}%\n")
+        f.write(f"Mean Absolute Change: {means['Absolute_Change']:.2f}%\n")
+        f.write(f"Mean Percent Change: {means['Percent_Change']:.2f}%\n\n")
+
+        # Ranking needs the values themselves; only the two columns involved are read
+        df_ranked = read_csv(world_file, usecols=['Entity', '2024'])
         f.write("Top 5 Countries (2024):\n")
-        for idx, row in df_global.nlargest(5, '2024').iterrows():
+        for idx, row in df_ranked.nlargest(5, '2024').iterrows():
             f.write(f"  {row['Entity']}: {row['2024']:.1f}%\n")
-        
+
         f.write("\nBottom 5 Countries (2024):\n")
-        for idx, row in df_global.nsmallest(5, '2024').iterrows():
+        for idx, row in df_ranked.nsmallest(5, '2024').iterrows():
             f.write(f"  {row['Entity']}: {row['2024']:.1f}%\n")
-    
-    print("✓ Generated: data_summary_report.txt")
+
+        # Every column of both datasets, rendered from the same sketches
+        f.write("\n\nAPPENDIX: COLUMN PROFILES\n")
+        f.write(render_report(pima_profile, "Pima Indians Diabetes", target='Outcome'))
+        f.write(render_report(health_profile, "Health Indicators (BRFSS 2015)",
+                              target='Diabetes_binary'))
+
+    print(f"✓ Generated: {REPORT_FILE} (runs recorded in {run_log.path})")
 
 if __name__ == "__main__":
     generate_summary_report()
@@ -11,6 +11,18 @@ plt.rcParams['figure.figsize'] = (12, 6)
 import os
 os.makedirs('eda_plots', exist_ok=True)
 
+# pipeline/ lives at the repo root; make it importable from any working directory
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+
+# Render profile (draft / publication / vector) chosen once for the whole run
+# via PIPELINE_RENDER_PROFILE
+from pipeline.render import savefig
+# Restore dictionary-encoded label columns (python -m pipeline.labels)
+from pipeline.labels import read_csv
+# Draw large-frame histograms from pre-binned counts (python -m pipeline.binned)
+from pipeline import binned
+
 # ============================================
 # PIMA DATASET EDA
 # ============================================
@@ -18,7 +30,7 @@ print("="*60)
 print("PIMA DATASET - EXPLORATORY ANALYSIS")
 print("="*60)
 
-df_pima = pd.read_csv('pima_diabetes_with_features.csv')
+df_pima = read_csv('pima_diabetes_with_features.csv')
 
 # 1. Basic statistics
 print("\n1. Dataset Overview:")
@@ -68,8 +80,7 @@ axes[1,2].set_title('Clinical Risk Score by Diabetes Status')
 axes[1,2].legend(title='Diabetes', labels=['No', 'Yes'])
 
 plt.tight_layout()
-plt.savefig('eda_plots/pima_eda.png', dpi=300, bbox_inches='tight')
-print("\n✓ Saved: eda_plots/pima_eda.png")
+print(f"\n✓ Saved: {savefig('eda_plots/pima_eda.png')}")
 
 # 4. Correlation matrix
 plt.figure(figsize=(10, 8))
@@ -77,8 +88,7 @@ correlation = df_pima[continuous_vars + ['Outcome']].corr()
 sns.heatmap(correlation, annot=True, fmt='.2f', cmap='coolwarm', center=0)
 plt.title('Correlation Matrix - Pima Dataset')
 plt.tight_layout()
-plt.savefig('eda_plots/pima_correlation.png', dpi=300, bbox_inches='tight')
-print("✓ Saved: eda_plots/pima_correlation.png")
+print(f"✓ Saved: {savefig('eda_plots/pima_correlation.png')}")
 
 # ============================================
 # HEALTH INDICATORS EDA
@@ -87,7 +97,7 @@ print("\n" + "="*60)
 print("HEALTH INDICATORS - EXPLORATORY ANALYSIS")
 print("="*60)
 
-df_health = pd.read_csv('diabetes_health_indicators_with_features.csv')
+df_health = read_csv('diabetes_health_indicators_with_features.csv')
 
 print("\n1. Dataset Overview:")
 print(f"   Rows: {len(df_health)}")
@@ -118,8 +128,8 @@ axes[0,1].legend(title='Diabetes', labels=['No', 'Yes'])
 axes[0,1].tick_params(axis='x', rotation=45)
 
 # Total Risk Score distribution
-sns.histplot(data=df_health, x='Total_Risk_Score', hue='Diabetes_binary', 
-             bins=15, ax=axes[0,2], multiple='dodge')
+binned.plot_hist(axes[0,2], binned.summarize(df_health, 'Total_Risk_Score', 'Diabetes_binary',
+                                             bins=15, shared=True), multiple='dodge')
 axes[0,2].set_title('Total Risk Score Distribution')
 axes[0,2].legend(title='Diabetes', labels=['No', 'Yes'])
 
@@ -147,8 +157,7 @@ axes[1,2].set_xticklabels(['Limited', 'Good'], rotation=0)
 axes[1,2].legend(title='Diabetes', labels=['No', 'Yes'])
 
 plt.tight_layout()
-plt.savefig('eda_plots/health_indicators_eda.png', dpi=300, bbox_inches='tight')
-print("\n✓ Saved: eda_plots/health_indicators_eda.png")
+print(f"\n✓ Saved: {savefig('eda_plots/health_indicators_eda.png')}")
 
 # ============================================
 # GLOBAL PREVALENCE EDA
@@ -157,7 +166,7 @@ print("\n" + "="*60)
 print("GLOBAL PREVALENCE - EXPLORATORY ANALYSIS")
 print("="*60)
 
-df_global = pd.read_csv('world_diabetes_with_features.csv')
+df_global = read_csv('world_diabetes_with_features.csv')
 
 print("\n1. Dataset Overview:")
 print(f"   Countries: {len(df_global)}")
@@ -216,8 +225,7 @@ axes[1,1].set_title('Top 15 Countries by Prevalence Increase (2011-2024)')
 axes[1,1].grid(axis='x', alpha=0.3)
 
 plt.tight_layout()
-plt.savefig('eda_plots/global_prevalence_eda.png', dpi=300, bbox_inches='tight')
-print("\n✓ Saved: eda_plots/global_prevalence_eda.png")
+print(f"\n✓ Saved: {savefig('eda_plots/global_prevalence_eda.png')}")
 
 print("\n" + "="*60)
 print("EDA COMPLETE!")
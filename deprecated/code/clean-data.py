@@ -3,10 +3,36 @@ STEP 2: DATA CLEANING
 Clean all 3 datasets and save cleaned versions
 """
 
+import os
+import sys
+import time
+
 import pandas as pd
 import numpy as np
 from sklearn.impute import SimpleImputer
 
+# pipeline/ lives at the repo root; make it importable from any working directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from pipeline.entities import classify_entities
+from pipeline.runlog import RunLog
+from pipeline.sampling import stratified_sample_csv
+from pipeline.schema import read_with_schema
+
+run_log = RunLog()
+
+
+def record_run(dataset, input_file, output_file, started, rows_in, rows_out, drops=(), df=None):
+    """Append one dataset's cleaning run to the shared run history (python -m pipeline.runlog)"""
+    with run_log.run(dataset, 'clean', input_file=input_file, output_file=output_file) as run:
+        run.set_rows(rows_in, rows_out)
+        for rule, removed in drops:
+            run.add_drop(rule, removed)
+        run.add_timing('total', time.perf_counter() - started)
+        if df is not None:
+            run.add_column_stats(df)
+    print(f"✓ Run recorded in run history (id {run.run_id})")
+
 print("=" * 70)
 print("DATA CLEANING PROCESS")
 print("=" * 70)
@@ -19,6 +45,7 @@ print("CLEANING DATASET 1: PIMA INDIANS DIABETES")
 print("=" * 70)
 
 try:
+    started = time.perf_counter()
     pima = pd.read_csv('data/pima_diabetes.csv')
     print(f"✓ Loaded: {pima.shape[0]} rows × {pima.shape[1]} columns")
     
@@ -75,6 +102,9 @@ try:
         zero_count = (pima_imputed[col] == 0).sum()
         print(f"  {col}: {zero_count} zeros (should be 0)")
     
+    record_run('pima', 'data/pima_diabetes.csv', 'pima_diabetes_imputed.csv', started,
+               len(pima), len(pima_imputed), df=pima_imputed)
+    
 except Exception as e:
     print(f"✗ ERROR: {e}")
 
@@ -86,38 +116,48 @@ print("CLEANING DATASET 2: CDC HEALTH INDICATORS")
 print("=" * 70)
 
 try:
-    cdc = pd.read_csv('data/diabetes_binary_health_indicators_BRFSS2015.csv')
-    print(f"✓ Loaded: {cdc.shape[0]:,} rows × {cdc.shape[1]} columns")
+    started = time.perf_counter()
+    # Streamed in chunks: the full file is never held in memory
+    cdc_file = 'data/diabetes_binary_health_indicators_BRFSS2015.csv'
+    rows = missing = 0
+    with pd.read_csv(cdc_file, chunksize=200_000) as chunks:
+        for i, chunk in enumerate(chunks):
+            rows += len(chunk)
+            missing += int(chunk.isnull().sum().sum())
+            # Already clean: the cleaned copy is the file itself
+            chunk.to_csv('cdc_diabetes_clean.csv', mode='w' if i == 0 else 'a',
+                          header=i == 0, index=False)
+    print(f"✓ Loaded: {rows:,} rows × {chunk.shape[1]} columns")
     
     # Check for missing values
-    missing = cdc.isnull().sum().sum()
     print(f"\n📊 Missing values: {missing}")
     
     if missing == 0:
         print("✓ Dataset is already clean - no missing values!")
     
-    # Check data ranges
-    print("\n🔧 Verifying data ranges...")
-    print(f"  Diabetes_binary: {sorted(cdc['Diabetes_binary'].unique())}")
-    
     # Optional: Create a smaller sample for faster testing
     print("\n🔧 Creating smaller sample for faster analysis...")
     
-    # Stratified sample to maintain diabetes ratio
-    diabetes_yes = cdc[cdc['Diabetes_binary'] == 1].sample(n=5000, random_state=42)
-    diabetes_no = cdc[cdc['Diabetes_binary'] == 0].sample(n=5000, random_state=42)
-    cdc_sample = pd.concat([diabetes_yes, diabetes_no]).sample(frac=1, random_state=42)
+    # Stratified sample to maintain diabetes ratio: 5,000 rows per class drawn
+    # in one pass with per-class reservoirs (python -m pipeline.sampling)
+    samples, strata = stratified_sample_csv(cdc_file, strata='Diabetes_binary', sizes=5000)
+    cdc_sample = samples[5000]
+    
+    # Check data ranges
+    print("\n🔧 Verifying data ranges...")
+    print(f"  Diabetes_binary: {sorted(strata.index.tolist())}")
     
-    print(f"  Full dataset: {len(cdc):,} rows")
+    print(f"  Full dataset: {rows:,} rows")
     print(f"  Sample: {len(cdc_sample):,} rows (balanced)")
     
     # Save
-    cdc.to_csv('cdc_diabetes_clean.csv', index=False)
     cdc_sample.to_csv('cdc_diabetes_sample.csv', index=False)
     
     print("\n✅ SAVED:")
-    print(f"  1. 'cdc_diabetes_clean.csv' - Full dataset ({len(cdc):,} rows)")
+    print(f"  1. 'cdc_diabetes_clean.csv' - Full dataset ({rows:,} rows)")
     print(f"  2. 'cdc_diabetes_sample.csv' - Sample ({len(cdc_sample):,} rows)")
+    
+    record_run('brfss', cdc_file, 'cdc_diabetes_clean.csv', started, rows, rows)
     print("\n💡 Use sample for quick testing, full dataset for final analysis!")
     
 except Exception as e:
@@ -131,7 +171,10 @@ print("CLEANING DATASET 3: WORLD DIABETES PREVALENCE")
 print("=" * 70)
 
 try:
-    world = pd.read_csv('data/world_diabetes.csv')
+    started = time.perf_counter()
+    world_drops = []
+    # Column roles from the header and a sample, cached per header shape
+    world, world_schema = read_with_schema('data/world_diabetes.csv')
     print(f"✓ Loaded: {world.shape[0]} rows × {world.shape[1]} columns")
     
     # Identify column names (they vary by source)
@@ -142,15 +185,11 @@ try:
     
     # Common variations from Our World in Data
     rename_dict = {}
-    for col in world.columns:
-        if 'entity' in col.lower() or 'country' in col.lower():
-            rename_dict[col] = 'Country'
-        elif 'year' in col.lower():
-            rename_dict[col] = 'Year'
-        elif 'code' in col.lower():
-            rename_dict[col] = 'Code'
-        elif 'diabetes' in col.lower() or 'prevalence' in col.lower():
-            rename_dict[col] = 'Diabetes_Prevalence'
+    role_names = {'entity': 'Country', 'year': 'Year', 'code': 'Code',
+                  'value': 'Diabetes_Prevalence'}
+    for role, name in role_names.items():
+        if world_schema.column(role) is not None:
+            rename_dict[world_schema.column(role)] = name
     
     world_clean = world.rename(columns=rename_dict)
     print(f"  Renamed columns: {list(world_clean.columns)}")
@@ -158,25 +197,21 @@ try:
     # Remove regional aggregates (keep only actual countries)
     print("\n🔧 Filtering actual countries only...")
     
-    # Regions to exclude (common aggregates)
-    exclude_terms = [
-        'World', 'Income', 'Africa', 'Asia', 'Europe', 'America', 
-        'Region', 'Countries', 'OECD', 'G20', 'Saharan', 'Eastern',
-        'Western', 'Northern', 'Southern', 'Central', 'Caribbean',
-        'Pacific', 'Arab', 'Small states', 'Fragile', 'IDA', 'IBRD'
-    ]
-    
-    # Filter out aggregates
+    # Filter out aggregates (World, regions, income groups) by their codes; a
+    # regex on the names would also drop e.g. South Africa
     if 'Country' in world_clean.columns:
-        mask = ~world_clean['Country'].str.contains('|'.join(exclude_terms), case=False, na=False)
+        mask = classify_entities(world_clean, entity='Country', code='Code') == 'country'
         world_clean = world_clean[mask]
+        world_drops.append(('aggregates', int((~mask).sum())))
         print(f"  Before filtering: {len(world)} rows")
         print(f"  After filtering: {len(world_clean)} rows")
     
     # Filter to recent years only (if Year column exists)
     if 'Year' in world_clean.columns:
         print("\n🔧 Filtering to recent years (2000-2024)...")
-        world_clean = world_clean[world_clean['Year'] >= 2000]
+        recent = world_clean['Year'] >= 2000
+        world_clean = world_clean[recent]
+        world_drops.append(('before_2000', int((~recent).sum())))
         print(f"  Years included: {world_clean['Year'].min()} to {world_clean['Year'].max()}")
     
     # Handle missing prevalence data
@@ -188,6 +223,7 @@ try:
         if missing_prev > 0:
             print("\n🔧 Removing rows with missing prevalence...")
             world_clean = world_clean.dropna(subset=['Diabetes_Prevalence'])
+            world_drops.append(('missing_prevalence', int(missing_prev)))
             print(f"  Rows remaining: {len(world_clean)}")
     
     # Save cleaned version
@@ -207,6 +243,9 @@ try:
         print(f"  Min: {world_clean['Diabetes_Prevalence'].min():.2f}%")
         print(f"  Max: {world_clean['Diabetes_Prevalence'].max():.2f}%")
     
+    record_run('world', 'data/world_diabetes.csv', 'world_diabetes_clean.csv', started,
+               len(world), len(world_clean), world_drops, world_clean)
+    
 except Exception as e:
     print(f"✗ ERROR: {e}")
     print("  Note: Column names may vary. Check the actual column names in your file.")
@@ -3,9 +3,18 @@ STEP 1: DATA INSPECTION
 Check all 3 datasets to see what cleaning is needed
 """
 
+import os
+import sys
+
 import pandas as pd
 import numpy as np
 
+# pipeline/ lives at the repo root; make it importable from any working directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+# Inspect from one-pass column sketches instead of loading each file
+from pipeline.profile import profile_csv, render_report
+
 print("=" * 70)
 print("DATA INSPECTION REPORT")
 print("=" * 70)
@@ -18,23 +27,22 @@ print("DATASET 1: PIMA INDIANS DIABETES")
 print("=" * 70)
 
 try:
-    pima = pd.read_csv('data/pima_diabetes.csv')
+    pima = profile_csv('data/pima_diabetes.csv')
+    rows, columns = pima.rows, pima.columns
+    zeros = {col: pima[col].zeros for col in columns}
     
     print(f"\n✓ Loaded successfully!")
-    print(f"  Shape: {pima.shape[0]} rows × {pima.shape[1]} columns")
-    print(f"\n  Columns: {list(pima.columns)}")
+    print(f"  Shape: {rows} rows × {len(columns)} columns")
+    print(f"\n  Columns: {columns}")
     
-    print("\n📊 BASIC INFO:")
-    print(pima.info())
-    
-    print("\n📈 STATISTICAL SUMMARY:")
-    print(pima.describe())
+    print("\n📊 BASIC INFO & STATISTICAL SUMMARY:")
+    print(render_report(pima, 'Pima Indians Diabetes (raw)', target='Outcome'))
     
     print("\n⚠️  MISSING/ZERO VALUES CHECK:")
     print("Zeros found in each column:")
-    for col in pima.columns:
-        zero_count = (pima[col] == 0).sum()
-        zero_pct = (zero_count / len(pima)) * 100
+    for col in columns:
+        zero_count = zeros[col]
+        zero_pct = (zero_count / rows) * 100
         if zero_count > 0:
             print(f"  {col}: {zero_count} zeros ({zero_pct:.1f}%)")
     
@@ -61,31 +69,38 @@ print("DATASET 2: CDC HEALTH INDICATORS")
 print("=" * 70)
 
 try:
-    cdc = pd.read_csv('data/diabetes_binary_health_indicators_BRFSS2015.csv')
+    cdc_file = 'data/diabetes_binary_health_indicators_BRFSS2015.csv'
+    cdc = profile_csv(cdc_file)
+    rows, columns = cdc.rows, cdc.columns
+    missing = cdc.info()['Nulls']
+    counts = cdc.value_counts('Diabetes_binary')
+    head = pd.read_csv(cdc_file, nrows=5)
     
     print(f"\n✓ Loaded successfully!")
-    print(f"  Shape: {cdc.shape[0]} rows × {cdc.shape[1]} columns")
-    print(f"  SIZE: {cdc.shape[0]:,} records - VERY LARGE!")
+    print(f"  Shape: {rows} rows × {len(columns)} columns")
+    print(f"  SIZE: {rows:,} records - VERY LARGE!")
     
-    print(f"\n  Columns ({len(cdc.columns)} total):")
-    for i, col in enumerate(cdc.columns, 1):
+    print(f"\n  Columns ({len(columns)} total):")
+    for i, col in enumerate(columns, 1):
         print(f"    {i}. {col}")
     
     print("\n📊 FIRST FEW ROWS:")
-    print(cdc.head())
+    print(head)
     
     print("\n⚠️  MISSING VALUES:")
-    missing = cdc.isnull().sum()
     if missing.sum() == 0:
         print("  ✓ NO missing values found!")
     else:
         print(missing[missing > 0])
     
     print("\n📈 DIABETES DISTRIBUTION:")
-    print(cdc['Diabetes_binary'].value_counts())
-    diabetes_pct = (cdc['Diabetes_binary'].sum() / len(cdc)) * 100
+    print(counts)
+    diabetes_pct = (counts.get(1, 0) / rows) * 100
     print(f"  Diabetes rate: {diabetes_pct:.2f}%")
     
+    print("\n📋 COLUMN PROFILE:")
+    print(render_report(cdc, 'CDC Health Indicators (raw)', target='Diabetes_binary'))
+    
     print("\n🔍 ISSUES FOUND:")
     print("  ⚠️  HUGE dataset - may be slow to process")
     print("  ➜ Might need to sample for faster analysis")
@@ -107,21 +122,28 @@ print("DATASET 3: WORLD DIABETES PREVALENCE")
 print("=" * 70)
 
 try:
-    world = pd.read_csv('data/world_diabetes.csv')
+    world_file = 'data/world_diabetes.csv'
+    world = profile_csv(world_file)
+    rows, columns = world.rows, world.columns
+    missing = world.info()['Nulls']
+    head = pd.read_csv(world_file, nrows=10)
+    country_col = next((c for c in ('Entity', 'Country') if c in columns), None)
+    # The heavy-hitter summary only keeps 64 values: read the key columns for exact lists
+    keys = pd.read_csv(world_file, usecols=[c for c in ('Year', country_col) if c in columns])
+    years = sorted(keys['Year'].dropna().unique().tolist()) if 'Year' in columns else []
     
     print(f"\n✓ Loaded successfully!")
-    print(f"  Shape: {world.shape[0]} rows × {world.shape[1]} columns")
+    print(f"  Shape: {rows} rows × {len(columns)} columns")
     
-    print(f"\n  Columns: {list(world.columns)}")
+    print(f"\n  Columns: {columns}")
     
     print("\n📊 FIRST FEW ROWS:")
-    print(world.head(10))
+    print(head)
     
     print("\n📈 BASIC INFO:")
-    print(world.info())
+    print(render_report(world, 'World Diabetes Prevalence (raw)'))
     
     print("\n⚠️  MISSING VALUES:")
-    missing = world.isnull().sum()
     if missing.sum() > 0:
         print(missing[missing > 0])
         print(f"\n  Total missing: {missing.sum()} values")
@@ -129,17 +151,16 @@ try:
         print("  ✓ NO missing values!")
     
     # Check year range
-    if 'Year' in world.columns:
+    if 'Year' in columns:
         print(f"\n📅 YEAR RANGE:")
-        print(f"  From: {world['Year'].min()} to {world['Year'].max()}")
-        print(f"  Years available: {sorted(world['Year'].unique())}")
+        print(f"  From: {years[0]} to {years[-1]}")
+        print(f"  Years available: {years}")
     
     # Check countries
-    if 'Entity' in world.columns or 'Country' in world.columns:
-        country_col = 'Entity' if 'Entity' in world.columns else 'Country'
+    if country_col is not None:
         print(f"\n🌍 COUNTRIES:")
-        print(f"  Total: {world[country_col].nunique()} countries/regions")
-        print(f"  Examples: {list(world[country_col].unique()[:10])}")
+        print(f"  Total: {keys[country_col].nunique()} countries/regions")
+        print(f"  Examples: {list(keys[country_col].unique()[:10])}")
     
     print("\n🔍 ISSUES FOUND:")
     if missing.sum() > 0:
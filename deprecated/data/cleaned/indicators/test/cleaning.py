@@ -9,8 +9,21 @@ import pandas as pd
 import numpy as np
 import sys
 import os
+import time
 from datetime import datetime
 
+# pipeline/ lives at the repo root; make it importable from any working directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), *['..'] * 5)))
+
+# Append each run to the shared run history (python -m pipeline.runlog)
+from pipeline.runlog import RunLog
+# Record which source rows each rule removed (python -m pipeline.lineage)
+from pipeline.lineage import Lineage
+# Flag (not drop) robust outliers in BMI / health days (python -m pipeline.outliers)
+from pipeline.outliers import default_detector
+# Summary statistics from one-pass column sketches (python -m pipeline.profile)
+from pipeline.profile import profile_frame, render_report
+
 
 class DiabetesDataCleaner:
     """Class to handle cleaning of diabetes health indicators dataset"""
@@ -20,6 +33,10 @@ class DiabetesDataCleaner:
         self.df = None
         self.original_shape = None
         self.cleaning_report = []
+        self.dropped_rows = []
+        self.timings = []
+        self.lineage = None
+        self.outliers = None
         
     def load_data(self):
         """Load the dataset and store original shape"""
@@ -27,6 +44,7 @@ class DiabetesDataCleaner:
         try:
             self.df = pd.read_csv(self.input_file)
             self.original_shape = self.df.shape
+            self.lineage = Lineage(self.df, 'brfss', self.input_file)
             print(f"✓ Data loaded successfully: {self.original_shape[0]} rows, {self.original_shape[1]} columns")
             self.cleaning_report.append(f"Original dataset: {self.original_shape[0]} rows × {self.original_shape[1]} columns")
             return True
@@ -134,12 +152,19 @@ class DiabetesDataCleaner:
         
         return True
     
+    def _track(self, rule, df):
+        """Replace the data with a filtered copy, recording the removed rows' lineage"""
+        self.lineage.record(self.df, df, rule)
+        self.df = df
+    
     def remove_duplicates(self):
         """Remove duplicate rows"""
         initial_rows = len(self.df)
-        self.df = self.df.drop_duplicates()
+        self._track('duplicates', self.df.drop_duplicates())
         removed = initial_rows - len(self.df)
         
+        self.dropped_rows.append(('duplicates', removed))
+        
         if removed > 0:
             print(f"\n✓ Removed {removed} duplicate rows")
             self.cleaning_report.append(f"Removed duplicates: {removed} rows")
@@ -156,8 +181,9 @@ class DiabetesDataCleaner:
             # For this dataset, we typically drop rows with missing values
             # since the dataset is large and missing values are rare
             initial_rows = len(self.df)
-            self.df = self.df.dropna()
+            self._track('missing values', self.df.dropna())
             removed = initial_rows - len(self.df)
+            self.dropped_rows.append(('missing values', removed))
             
             print(f"✓ Removed {removed} rows with missing values")
             self.cleaning_report.append(f"Removed rows with missing values: {removed}")
@@ -186,8 +212,9 @@ class DiabetesDataCleaner:
         for var in ['MentHlth', 'PhysHlth']:
             if var in self.df.columns:
                 before = len(self.df)
-                self.df = self.df[(self.df[var] >= 0) & (self.df[var] <= 30)]
+                self._track(f'{var} outside 0-30', self.df[(self.df[var] >= 0) & (self.df[var] <= 30)])
                 removed = before - len(self.df)
+                self.dropped_rows.append((f'{var} outside 0-30', removed))
                 if removed > 0:
                     print(f"⚠ Removed {removed} rows with invalid {var} values")
                     self.cleaning_report.append(f"Removed invalid {var}: {removed} rows")
@@ -195,8 +222,9 @@ class DiabetesDataCleaner:
         # Validate GenHlth (should be 1-5)
         if 'GenHlth' in self.df.columns:
             before = len(self.df)
-            self.df = self.df[(self.df['GenHlth'] >= 1) & (self.df['GenHlth'] <= 5)]
+            self._track('GenHlth outside 1-5', self.df[(self.df['GenHlth'] >= 1) & (self.df['GenHlth'] <= 5)])
             removed = before - len(self.df)
+            self.dropped_rows.append(('GenHlth outside 1-5', removed))
             if removed > 0:
                 print(f"⚠ Removed {removed} rows with invalid GenHlth values")
                 self.cleaning_report.append(f"Removed invalid GenHlth: {removed} rows")
@@ -209,6 +237,18 @@ class DiabetesDataCleaner:
         
         return total_removed
     
+    def flag_outliers(self):
+        """Flag rows with extreme BMI / health days (robust z and Mahalanobis distance)"""
+        detector = default_detector('brfss', self.df.columns)
+        if not detector.columns:
+            return 0
+        detector.fit(self.df)
+        self.outliers = detector.score(self.df)
+        flagged = int(self.outliers['Outlier_Flag'].sum())
+        print(f"\n✓ Flagged {flagged} outlier rows ({flagged/len(self.df)*100:.2f}%), none removed")
+        self.cleaning_report.append(f"Flagged outliers (kept): {flagged} rows")
+        return flagged
+    
     def ensure_correct_dtypes(self):
         """Ensure all columns have correct data types"""
         print("\n" + "="*60)
@@ -253,17 +293,9 @@ class DiabetesDataCleaner:
         
         print(f"\nFinal dataset shape: {self.df.shape[0]} rows × {self.df.shape[1]} columns")
         
-        # Class distribution
-        if 'Diabetes_binary' in self.df.columns:
-            diabetes_dist = self.df['Diabetes_binary'].value_counts()
-            print(f"\nDiabetes Distribution:")
-            print(f"  No Diabetes (0): {diabetes_dist.get(0, 0)} ({diabetes_dist.get(0, 0)/len(self.df)*100:.2f}%)")
-            print(f"  Diabetes (1):    {diabetes_dist.get(1, 0)} ({diabetes_dist.get(1, 0)/len(self.df)*100:.2f}%)")
-        
-        # Numeric variables summary
-        print(f"\nNumeric Variables Summary:")
-        numeric_cols = self.df.select_dtypes(include=[np.number]).columns
-        print(self.df[numeric_cols].describe())
+        # Rendered from the column sketches: counts, moments, quantiles, value counts
+        profile = profile_frame(self.df)
+        print(render_report(profile, 'Cleaned BRFSS Health Indicators', target='Diabetes_binary'))
         
         return True
     
@@ -281,6 +313,12 @@ class DiabetesDataCleaner:
             self.df.to_csv(output_file, index=False)
             print(f"✓ Cleaned data saved to: {output_file}")
             self.cleaning_report.append(f"Saved to: {output_file}")
+            lineage_file = self.lineage.save(f"{os.path.splitext(output_file)[0]}_lineage.npz")
+            print(f"✓ Row lineage saved to: {lineage_file}")
+            if self.outliers is not None:
+                outliers_file = f"{os.path.splitext(output_file)[0]}_outliers.csv"
+                self.outliers.round({'Outlier_Score': 4}).to_csv(outliers_file, index=False)
+                print(f"✓ Outlier flags (one row per cleaned row) saved to: {outliers_file}")
             return output_file
         except Exception as e:
             print(f"✗ Error saving file: {e}")
@@ -325,35 +363,60 @@ class DiabetesDataCleaner:
         print(f"✓ Cleaning report saved to: {report_file}")
         return report_file
     
+    def record_run(self, output_file, seconds):
+        """Append this run to the run history store"""
+        with RunLog().run('brfss', 'clean', input_file=self.input_file, output_file=output_file) as run:
+            run.set_rows(self.original_shape[0], self.df.shape[0])
+            for rule, removed in self.dropped_rows:
+                run.add_drop(rule, removed)
+            for step, step_seconds in self.timings:
+                run.add_timing(step, step_seconds)
+            run.add_timing('total', seconds)
+            run.add_column_stats(self.df)
+        
+        print(f"✓ Run recorded in run history (id {run.run_id})")
+        return run.run_id
+    
+    def _timed(self, name, step):
+        """Run a cleaning step and remember how long it took"""
+        start = time.perf_counter()
+        result = step()
+        self.timings.append((name, time.perf_counter() - start))
+        return result
+    
     def run_complete_cleaning(self):
         """Run the complete cleaning pipeline"""
         print("\n" + "="*60)
         print("DIABETES HEALTH INDICATORS DATA CLEANING")
         print("="*60 + "\n")
         
+        start = time.perf_counter()
+        
         # Load data
-        if not self.load_data():
+        if not self._timed('load_data', self.load_data):
             return False
         
         # Check data quality
-        self.check_data_quality()
+        self._timed('check_data_quality', self.check_data_quality)
         
         # Clean data
         print("\n" + "="*60)
         print("CLEANING DATA")
         print("="*60)
         
-        self.remove_duplicates()
-        self.handle_missing_values()
-        self.validate_and_clean_ranges()
-        self.ensure_correct_dtypes()
+        self._timed('remove_duplicates', self.remove_duplicates)
+        self._timed('handle_missing_values', self.handle_missing_values)
+        self._timed('validate_and_clean_ranges', self.validate_and_clean_ranges)
+        self._timed('flag_outliers', self.flag_outliers)
+        self._timed('ensure_correct_dtypes', self.ensure_correct_dtypes)
         
         # Generate summary
-        self.generate_summary_stats()
+        self._timed('generate_summary_stats', self.generate_summary_stats)
         
         # Save results
-        output_file = self.save_cleaned_data()
+        output_file = self._timed('save_cleaned_data', self.save_cleaned_data)
         report_file = self.generate_report()
+        self.record_run(output_file, time.perf_counter() - start)
         
         print("\n" + "="*60)
         print("CLEANING COMPLETE!")
@@ -12,6 +12,43 @@ import sys
 import pandas as pd
 import os
 
+# pipeline/ lives at the repo root; make it importable from any working directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), *['..'] * 5)))
+
+# Cache the pivot on disk between runs (python -m pipeline.memo stats)
+from pipeline.memo import memoize
+
+# Infer column roles from the header and a sample, cached per header shape
+from pipeline.schema import read_with_schema, ROLE_NAMES
+
+
+@memoize
+def pivot_frame(df, value_col):
+    """
+    Pivot long-format data to one column per year, sorted Entity, Code, years.
+    
+    Args:
+        df: DataFrame with Entity, Code, Year and the value column
+        value_col: Column holding the values to spread across years
+    """
+    df_pivoted = df.pivot_table(
+        index=['Entity', 'Code'],
+        columns='Year',
+        values=value_col,
+        aggfunc='first'  # Use 'first' in case of duplicates
+    )
+    
+    # Reset index to make Entity and Code regular columns
+    df_pivoted = df_pivoted.reset_index()
+    
+    # Rename columns to include original column name for clarity
+    df_pivoted.columns.name = None  # Remove the 'Year' label from column index
+    year_cols = [col for col in df_pivoted.columns if col not in ['Entity', 'Code']]
+    
+    # Sort columns: Entity, Code, then years in ascending order
+    sorted_cols = ['Entity', 'Code'] + sorted(year_cols)
+    return df_pivoted[sorted_cols]
+
 
 def pivot_years(filename):
     """
@@ -21,47 +58,20 @@ def pivot_years(filename):
         filename: Path to the CSV file
     """
     try:
-        # Read the CSV file
-        df = pd.read_csv(filename)
-        
-        # Check if required columns exist
-        required_cols = ['Entity', 'Code', 'Year']
-        missing_cols = [col for col in required_cols if col not in df.columns]
-        
-        if missing_cols:
-            print(f"Error: Missing required columns: {', '.join(missing_cols)}")
-            print(f"Available columns: {', '.join(df.columns)}")
-            sys.exit(1)
-        
-        # Get the value column name (the 4th column, assuming it's the data column)
-        value_cols = [col for col in df.columns if col not in ['Entity', 'Code', 'Year']]
-        
-        if not value_cols:
-            print("Error: No value column found to pivot.")
+        # Entity/Code/Year/value columns by role, renamed to Entity/Code/Year
+        try:
+            df, schema = read_with_schema(filename, rename=ROLE_NAMES)
+            schema.require('entity', 'code', 'year', 'value')
+        except KeyError as e:
+            print(f"Error: {e.args[0]}")
             sys.exit(1)
-        
-        value_col = value_cols[0]
+        value_col = schema.column('value')
         print(f"Pivoting column: '{value_col}'")
         
         # Pivot the data
-        df_pivoted = df.pivot_table(
-            index=['Entity', 'Code'],
-            columns='Year',
-            values=value_col,
-            aggfunc='first'  # Use 'first' in case of duplicates
-        )
-        
-        # Reset index to make Entity and Code regular columns
-        df_pivoted = df_pivoted.reset_index()
-        
-        # Rename columns to include original column name for clarity
-        df_pivoted.columns.name = None  # Remove the 'Year' label from column index
+        df_pivoted = pivot_frame(df, value_col)
         year_cols = [col for col in df_pivoted.columns if col not in ['Entity', 'Code']]
         
-        # Sort columns: Entity, Code, then years in ascending order
-        sorted_cols = ['Entity', 'Code'] + sorted(year_cols)
-        df_pivoted = df_pivoted[sorted_cols]
-        
         # Generate output filename
         base_name = os.path.splitext(filename)[0]
         output_filename = f"{base_name}_pivoted.csv"
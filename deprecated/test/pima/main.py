@@ -1,10 +1,17 @@
+import os
 import pandas as pd
 import numpy as np
 import sys
 
+# pipeline/ lives at the repo root; make it importable from any working directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+
+# Restore dictionary-encoded label columns (python -m pipeline.labels)
+from pipeline.labels import read_csv
+
 # Method 1: Load from a CSV file (if you have it downloaded)
 # You can download from: https://www.kaggle.com/datasets/uciml/pima-indians-diabetes-database
-df = pd.read_csv(sys.argv[1], delimiter=",")
+df = read_csv(sys.argv[1], delimiter=",")
 
 # Or Method 2: Load from sklearn's datasets (if available)
 # from sklearn.datasets import load_diabetes
@@ -0,0 +1,6 @@
+"""
+Shared helpers for the diabetes data pipeline.
+
+The notebooks and scripts in the repository root import from this package,
+so run them from the repository root (e.g. `from pipeline.query import scan_csv`).
+"""
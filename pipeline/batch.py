@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Parameterized batch execution of the analysis notebooks.
+
+Each notebook has a cell tagged "parameters" that holds its defaults
+(input_file, output_file, figures_dir, ...). For every variant a new cell
+with the variant's values is inserted right after it, so the rest of the
+notebook runs unchanged against a different dataset, year or sample. This is
+the same convention papermill uses, so the notebooks work with either tool.
+
+Variants run concurrently, each in its own kernel, with at most `workers`
+kernels alive at a time. The executed notebooks (with all outputs) are
+written to the output directory together with summary.csv, which records the
+status, total time and slowest cell of every variant.
+
+Usage:
+    python -m pipeline.batch <variants.json> [output_dir] [workers]
+
+variants.json is a list of variants or a {"grid": ..., "variants": [...]}
+object. String parameters are formatted with the grid values, so one entry
+expands to one variant per combination:
+
+    {
+      "grid": {"year": [2013, 2014, 2015]},
+      "variants": [
+        {"notebook": "indicator.ipynb", "name": "indicator_{year}",
+         "parameters": {"input_file": "raw/brfss_{year}.csv",
+                        "output_file": "runs/{year}/indicator.csv"}}
+      ]
+    }
+"""
+
+import itertools
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import nbformat
+import pandas as pd
+from nbclient import NotebookClient
+from nbclient.exceptions import CellExecutionError, CellTimeoutError, DeadKernelError
+
+
+DEFAULT_OUTPUT_DIR = 'runs'
+DEFAULT_TIMEOUT = 1800
+PARAMETERS_TAG = 'parameters'
+INJECTED_TAG = 'injected-parameters'
+ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;]*m')
+
+
+def expand_variants(spec):
+    """Expand a variants spec (list, or dict with grid + variants) into concrete variants"""
+    if isinstance(spec, list):
+        spec = {'variants': spec}
+    grid = spec.get('grid', {})
+    keys = list(grid)
+    combos = [dict(zip(keys, values)) for values in itertools.product(*grid.values())] or [{}]
+
+    variants = []
+    for template in spec['variants']:
+        if 'notebook' not in template:
+            raise ValueError(f"Variant without a 'notebook': {template}")
+        for combo in combos:
+            parameters = {**combo, **{k: v.format(**combo) if isinstance(v, str) else v
+                                      for k, v in template.get('parameters', {}).items()}}
+            default_name = os.path.splitext(os.path.basename(template['notebook']))[0]
+            if combo:
+                default_name += '_' + '_'.join(str(v) for v in combo.values())
+            variants.append({
+                'notebook': template['notebook'],
+                'name': template.get('name', default_name).format(**combo),
+                'parameters': parameters,
+            })
+
+    names = [v['name'] for v in variants]
+    duplicates = sorted({n for n in names if names.count(n) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate variant names: {', '.join(duplicates)}")
+    return variants
+
+
+def inject_parameters(nb, parameters):
+    """Insert a cell assigning `parameters` after the notebook's parameters cell
+
+    Raises ValueError if no cell is tagged "parameters": injected values would
+    otherwise be overwritten by the notebook's own defaults.
+    """
+    lines = ['# Injected parameters'] + [f'{k} = {v!r}' for k, v in parameters.items()]
+    cell = nbformat.v4.new_code_cell('\n'.join(lines), metadata={'tags': [INJECTED_TAG]})
+    for i, existing in enumerate(nb.cells):
+        if PARAMETERS_TAG in existing.get('metadata', {}).get('tags', []):
+            nb.cells.insert(i + 1, cell)
+            return nb
+    raise ValueError(f"No cell tagged '{PARAMETERS_TAG}' to inject parameters after")
+
+
+def _cell_seconds(cell):
+    """Execution time of one cell from the timestamps nbclient records"""
+    timing = cell.get('metadata', {}).get('execution', {})
+    start, end = timing.get('iopub.execute_input'), timing.get('shell.execute_reply')
+    if not start or not end:
+        return None
+    return (pd.Timestamp(end) - pd.Timestamp(start)).total_seconds()
+
+
+def run_notebook(variant, output_dir=DEFAULT_OUTPUT_DIR, timeout=DEFAULT_TIMEOUT, kernel_name=None):
+    """Execute one variant in a fresh kernel and write the executed notebook
+
+    Args:
+        variant: dict with notebook, name and parameters (see expand_variants)
+        output_dir: Directory for the executed notebook
+        timeout: Per-cell timeout in seconds
+        kernel_name: Kernel to use (default: the notebook's kernelspec)
+
+    Returns:
+        dict with name, notebook, output, status, seconds, slowest_cell,
+        slowest_seconds and error
+    """
+    path = variant['notebook']
+    nb = nbformat.read(path, as_version=4)
+    inject_parameters(nb, variant.get('parameters', {}))
+    output = os.path.join(output_dir, f"{variant['name']}.ipynb")
+    os.makedirs(output_dir, exist_ok=True)
+
+    options = {'timeout': timeout, 'record_timing': True,
+               # Relative paths in the notebooks resolve from the notebook's folder
+               'resources': {'metadata': {'path': os.path.dirname(os.path.abspath(path))}}}
+    if kernel_name:
+        options['kernel_name'] = kernel_name
+    client = NotebookClient(nb, **options)
+
+    status, error = 'ok', None
+    started = time.perf_counter()
+    try:
+        client.execute()
+    except (CellExecutionError, CellTimeoutError, DeadKernelError) as e:
+        status = 'failed'
+        message = ANSI_ESCAPE.sub('', str(e)).strip()
+        error = message.splitlines()[-1] if message else type(e).__name__
+    seconds = time.perf_counter() - started
+    nbformat.write(nb, output)
+
+    cell_times = [(i, _cell_seconds(cell)) for i, cell in enumerate(nb.cells)
+                  if cell.cell_type == 'code']
+    cell_times = [(i, s) for i, s in cell_times if s is not None]
+    slowest = max(cell_times, key=lambda item: item[1]) if cell_times else (None, None)
+    return {
+        'name': variant['name'],
+        'notebook': path,
+        'output': output,
+        'status': status,
+        'seconds': round(seconds, 2),
+        'slowest_cell': slowest[0],
+        'slowest_seconds': round(slowest[1], 2) if slowest[1] is not None else None,
+        'error': error,
+    }
+
+
+def run_batch(variants, output_dir=DEFAULT_OUTPUT_DIR, workers=None, timeout=DEFAULT_TIMEOUT,
+              kernel_name=None):
+    """Execute variants concurrently, at most `workers` kernels at a time
+
+    Returns:
+        DataFrame with one row per variant (see run_notebook), also written to
+        <output_dir>/summary.csv
+    """
+    workers = workers or os.cpu_count() or 1
+    results = []
+    with ProcessPoolExecutor(max_workers=min(workers, max(len(variants), 1))) as pool:
+        futures = {pool.submit(run_notebook, variant, output_dir, timeout, kernel_name): variant
+                   for variant in variants}
+        for future in as_completed(futures):
+            variant = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:  # kernel failed to start, unreadable notebook, ...
+                result = {'name': variant['name'], 'notebook': variant['notebook'], 'output': None,
+                          'status': 'error', 'seconds': None, 'slowest_cell': None,
+                          'slowest_seconds': None, 'error': f'{type(e).__name__}: {e}'}
+            mark = '✓' if result['status'] == 'ok' else '✗'
+            took = f", {result['seconds']}s" if result['seconds'] is not None else ''
+            print(f"  {mark} {result['name']} ({result['status']}{took})")
+            results.append(result)
+
+    order = {variant['name']: i for i, variant in enumerate(variants)}
+    summary = pd.DataFrame(results).sort_values('name', key=lambda s: s.map(order))
+    summary = summary.reset_index(drop=True)
+    os.makedirs(output_dir, exist_ok=True)
+    summary.to_csv(os.path.join(output_dir, 'summary.csv'), index=False)
+    return summary
+
+
+def main():
+    """Run every variant of a spec file and print the summary"""
+    if len(sys.argv) not in (2, 3, 4):
+        print("Usage: python -m pipeline.batch <variants.json> [output_dir] [workers]")
+        print("Example: python -m pipeline.batch brfss_years.json runs 4")
+        sys.exit(1)
+
+    spec_file = sys.argv[1]
+    output_dir = sys.argv[2] if len(sys.argv) >= 3 else DEFAULT_OUTPUT_DIR
+    workers = int(sys.argv[3]) if len(sys.argv) == 4 else None
+
+    try:
+        with open(spec_file, encoding='utf-8') as f:
+            variants = expand_variants(json.load(f))
+    except FileNotFoundError:
+        print(f"✗ Error: File '{spec_file}' not found")
+        sys.exit(1)
+    except (KeyError, ValueError) as e:
+        print(f"✗ Error: {e}")
+        sys.exit(1)
+
+    print(f"Running {len(variants)} variant(s) -> {output_dir}/")
+    summary = run_batch(variants, output_dir, workers)
+    print("\n" + summary.drop(columns=['output']).to_string(index=False))
+    failed = int((summary['status'] != 'ok').sum())
+    if failed:
+        print(f"\n✗ {failed} of {len(summary)} variant(s) failed")
+        sys.exit(1)
+    print(f"\n✅ All {len(summary)} variant(s) finished - summary: {os.path.join(output_dir, 'summary.csv')}")
+
+
+if __name__ == "__main__":
+    main()
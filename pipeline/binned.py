@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Pre-binned histograms and box summaries, drawn without the raw rows.
+
+The per-variable distribution figures handed every value to ax.hist() and
+ax.boxplot() (253k+ BRFSS rows per variable and outcome). Here each group
+is first reduced to its distinct values and their counts (np.unique, or one
+groupby per chunk when streaming a CSV file), and everything is computed
+from that weighted table:
+  - histogram counts with the same edges np.histogram / ax.hist would use
+  - the boxplot statistics matplotlib's boxplot() computes: quartiles with
+    linear interpolation, whiskers at the last value within 1.5 IQR, mean,
+    and the distinct values beyond the whiskers as fliers
+The figure is then drawn from those summaries (ax.hist with weights,
+ax.bxp), so drawing time depends on the number of bins and distinct
+fliers, not on the rows. A summary is a small picklable object and can be
+cached with pipeline.memo and reused by several figures.
+
+Example:
+    from pipeline import binned, render
+    from pipeline.memo import memoize
+
+    cached_summary = memoize(binned.summarize)
+    summary = cached_summary(df_health[['BMI', 'Diabetes_binary']], 'BMI', 'Diabetes_binary')
+    template = render.HistBoxTemplate()
+    template.draw_summary(summary)
+
+Usage:
+    python -m pipeline.binned <input_csv> <var> <by> [figure_path] [bins]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from pipeline.labels import read_csv
+from pipeline.query import DEFAULT_CHUNKSIZE
+
+
+DEFAULT_BINS = 30
+WHISKER_IQR = 1.5
+
+
+def _quantile(values, cumulative, q):
+    """np.percentile (linear) of the data expanded from sorted distinct values and counts"""
+    position = q * (cumulative[-1] - 1)
+    lower, upper = int(np.floor(position)), int(np.ceil(position))
+    low = values[np.searchsorted(cumulative, lower, side='right')]
+    high = values[np.searchsorted(cumulative, upper, side='right')]
+    return low + (position - lower) * (high - low)
+
+
+class Distribution:
+    """Histogram counts and box statistics of one group
+
+    Args:
+        values: Sorted distinct values
+        weights: Number of rows with each value
+        bins: Number of histogram bins
+        value_range: (low, high) of the histogram edges (default: the group's min / max)
+        label: Group label
+    """
+
+    def __init__(self, values, weights, bins=DEFAULT_BINS, value_range=None, label=None):
+        values = np.asarray(values, dtype=float)
+        weights = np.asarray(weights, dtype=np.int64)
+        self.label = label
+        self.n = int(weights.sum())
+        if not self.n:
+            self.counts, self.edges, self.stats = np.zeros(0), np.zeros(1), None
+            return
+        cumulative = np.cumsum(weights)
+        if value_range is None:
+            value_range = (values[0], values[-1])
+        self.counts, self.edges = np.histogram(values, bins=bins, range=value_range,
+                                               weights=weights)
+
+        q1, median, q3 = (_quantile(values, cumulative, q) for q in (0.25, 0.5, 0.75))
+        iqr = q3 - q1
+        inside = (values >= q1 - WHISKER_IQR * iqr) & (values <= q3 + WHISKER_IQR * iqr)
+        self.stats = {
+            'label': label, 'mean': float(np.dot(values, weights) / self.n),
+            'med': median, 'q1': q1, 'q3': q3, 'iqr': iqr,
+            'whislo': values[inside].min() if inside.any() else q1,
+            'whishi': values[inside].max() if inside.any() else q3,
+            'fliers': values[~inside],
+        }
+
+    @property
+    def five_numbers(self):
+        """(lower whisker, q1, median, q3, upper whisker)"""
+        if self.stats is None:
+            return (np.nan,) * 5
+        return tuple(self.stats[key] for key in ('whislo', 'q1', 'med', 'q3', 'whishi'))
+
+    def __repr__(self):
+        return f"Distribution({self.label!r}: {self.n:,} rows, {len(self.counts)} bins)"
+
+
+class BinnedSummary:
+    """Distributions of one variable per level of a grouping column
+
+    Args:
+        var: Variable name
+        by: Grouping column name
+        tables: {level: (sorted distinct values, counts)}, in level order
+        bins: Number of histogram bins
+        shared: Use the same edges for every group (needed for side-by-side bars);
+            otherwise each group gets its own, as ax.hist() per group would
+    """
+
+    def __init__(self, var, by, tables, bins=DEFAULT_BINS, shared=False):
+        self.var = var
+        self.by = by
+        self.bins = bins
+        self.levels = list(tables)
+        value_range = None
+        if shared:
+            filled = [values for values, _ in tables.values() if len(values)]
+            if filled:
+                value_range = (min(v[0] for v in filled), max(v[-1] for v in filled))
+        self.groups = [Distribution(*tables[level], bins=bins, value_range=value_range,
+                                    label=level) for level in self.levels]
+
+    def table(self):
+        """Rows and five-number summary per level"""
+        rows = [(g.label, g.n, *g.five_numbers) for g in self.groups]
+        return pd.DataFrame(rows, columns=[self.by, 'rows', 'whislo', 'q1', 'median', 'q3',
+                                           'whishi']).set_index(self.by)
+
+    def __repr__(self):
+        return (f"BinnedSummary({self.var} by {self.by}: {len(self.groups)} group(s), "
+                f"{sum(g.n for g in self.groups):,} rows)")
+
+
+def _tables(counts):
+    """{level: (values, counts)} from a Series of row counts indexed by (level, value)"""
+    tables = {}
+    for level, group in counts.groupby(level=0, sort=True, observed=True):
+        group = group.droplevel(0).sort_index()
+        tables[level] = (group.index.to_numpy(dtype=float), group.to_numpy())
+    return tables
+
+
+def summarize(df, var, by, bins=DEFAULT_BINS, shared=False):
+    """BinnedSummary of df[var] per level of df[by] (rows with a missing var are skipped)
+
+    Pure function of its arguments, so it can be wrapped with pipeline.memo.memoize.
+    """
+    frame = df[[by, var]].dropna()
+    tables = {}
+    for level, values in frame.groupby(by, sort=True, observed=True)[var]:
+        distinct, counts = np.unique(values.to_numpy(dtype=float), return_counts=True)
+        tables[level] = (distinct, counts)
+    return BinnedSummary(var, by, tables, bins, shared)
+
+
+def summarize_csv(path, var, by, bins=DEFAULT_BINS, shared=False, chunksize=DEFAULT_CHUNKSIZE):
+    """BinnedSummary of one CSV column per level of another, read in chunks
+
+    Only the distinct (level, value) pairs and their counts are kept between chunks.
+    """
+    counts = None
+    for chunk in read_csv(path, usecols=[by, var], chunksize=chunksize):
+        part = chunk.dropna().groupby([by, var], observed=True).size()
+        counts = part if counts is None else counts.add(part, fill_value=0)
+    if counts is None:
+        return BinnedSummary(var, by, {}, bins, shared)
+    return BinnedSummary(var, by, _tables(counts.astype(np.int64)), bins, shared)
+
+
+def plot_hist(ax, summary, labels=None, colors=None, multiple='layer', alpha=0.6):
+    """Histogram per group drawn from the summary counts
+
+    Args:
+        multiple: 'layer' (overlapping, as ax.hist per group) or 'dodge'
+            (side-by-side bars; needs a summary with shared edges)
+    """
+    dodge = multiple == 'dodge'
+    for i, group in enumerate(summary.groups):
+        if not group.n:
+            continue
+        label = labels[i] if labels and i < len(labels) else str(group.label)
+        color = colors[i % len(colors)] if colors else None
+        edges = group.edges
+        if dodge:
+            width = np.diff(edges) / len(summary.groups)
+            ax.bar(edges[:-1] + i * width, group.counts, width=width, align='edge',
+                   label=label, color=color)
+        else:
+            ax.hist(edges[:-1], bins=edges, weights=group.counts, alpha=alpha, label=label,
+                    color=color)
+    return ax
+
+
+def plot_box(ax, summary):
+    """Boxplot per group drawn from the summary statistics (ax.bxp)"""
+    stats = [dict(group.stats, label=str(group.label)) for group in summary.groups
+             if group.stats is not None]
+    ax.bxp(stats)
+    return ax
+
+
+def main():
+    """Summarize one column per group of a CSV file and optionally save the figure"""
+    if len(sys.argv) < 4 or len(sys.argv) > 6:
+        print("Usage: python -m pipeline.binned <input_csv> <var> <by> [figure_path] [bins]")
+        sys.exit(1)
+
+    input_file, var, by = sys.argv[1:4]
+    figure_path = sys.argv[4] if len(sys.argv) > 4 else None
+    try:
+        bins = int(sys.argv[5]) if len(sys.argv) > 5 else DEFAULT_BINS
+        start = time.perf_counter()
+        summary = summarize_csv(input_file, var, by, bins)
+        seconds = time.perf_counter() - start
+    except FileNotFoundError:
+        print(f"✗ Error: File '{input_file}' not found")
+        sys.exit(1)
+    except (KeyError, ValueError) as e:
+        print(f"✗ Error: {e}")
+        sys.exit(1)
+
+    print(f"✓ {summary} in {seconds:.2f}s")
+    print(summary.table().to_string())
+
+    if figure_path:
+        from pipeline import render
+        template = render.HistBoxTemplate(bins=bins)
+        template.draw_summary(summary)
+        print(f"\n✓ Figure saved to: {template.save(figure_path)}")
+
+
+if __name__ == "__main__":
+    main()
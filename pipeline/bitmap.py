@@ -0,0 +1,231 @@
+"""
+Bit-packed index over the BRFSS 0/1 indicator columns.
+
+Each row's binary flags (HighBP, HighChol, Smoker, PhysActivity, ...) are
+packed into one small integer, and each column is also kept as a bitset of
+64 rows per uint64 word. Predicates are evaluated with bitwise AND/OR/NOT
+on the words plus a popcount, so a comorbidity rate over a million rows
+touches ~16k words instead of building several million-element boolean
+Series.
+
+For conjunctions of flag values (count(HighBP=1, HighChol=1)), the index also
+keeps a histogram of the packed row codes. There are at most 2**k distinct
+codes, so those queries never touch the rows at all.
+
+Example:
+    from pipeline.bitmap import BitmapIndex
+
+    index = BitmapIndex(df_health)
+    both = index['HighBP'] & index['HighChol']
+    print(both.mean())                                  # share with both conditions
+    print(index.rate(both, 'Diabetes_binary'))          # diabetes rate among them
+    print(index.count(HighBP=1, HighChol=1, PhysActivity=0))
+    print(index.combinations(['Smoker', 'HvyAlcoholConsump'], outcome='Diabetes_binary'))
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# 0/1 columns of the BRFSS health indicators file (plus the derived
+# Fruits_or_Veggies flag of the cleaned data); Diabetes_binary is the outcome
+BRFSS_BINARY_COLUMNS = [
+    'Diabetes_binary', 'HighBP', 'HighChol', 'CholCheck', 'Smoker', 'Stroke',
+    'HeartDiseaseorAttack', 'PhysActivity', 'Fruits', 'Veggies', 'HvyAlcoholConsump',
+    'AnyHealthcare', 'NoDocbcCost', 'DiffWalk', 'Sex', 'Fruits_or_Veggies',
+]
+
+# Histograms of the packed codes are kept up to this many indexed columns
+MAX_HISTOGRAM_BITS = 20
+
+if hasattr(np, 'bitwise_count'):
+    def popcount(words):
+        """Number of set bits in an array of uint64 words"""
+        return int(np.bitwise_count(words).sum())
+else:  # numpy < 2.0
+    _BYTE_COUNTS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def popcount(words):
+        """Number of set bits in an array of uint64 words"""
+        return int(_BYTE_COUNTS[words.view(np.uint8)].sum())
+
+
+def pack(mask):
+    """Boolean array -> uint64 words, row i at bit i % 64 of word i // 64"""
+    packed = np.packbits(mask, bitorder='little')
+    padded = np.zeros(-(-len(packed) // 8) * 8, dtype=np.uint8)
+    padded[:len(packed)] = packed
+    return padded.view('<u8')
+
+
+class Bitset:
+    """Set of row positions stored as packed uint64 words"""
+
+    def __init__(self, words, n):
+        self.words = words
+        self.n = n
+
+    def _check(self, other):
+        if not isinstance(other, Bitset) or other.n != self.n:
+            raise TypeError("Bitset operations need another Bitset over the same rows")
+
+    def __and__(self, other):
+        self._check(other)
+        return Bitset(self.words & other.words, self.n)
+
+    def __or__(self, other):
+        self._check(other)
+        return Bitset(self.words | other.words, self.n)
+
+    def __xor__(self, other):
+        self._check(other)
+        return Bitset(self.words ^ other.words, self.n)
+
+    def __invert__(self):
+        words = ~self.words
+        tail = self.n % 64
+        if tail and len(words):
+            words[-1] &= np.uint64((1 << tail) - 1)
+        return Bitset(words, self.n)
+
+    def count(self):
+        """Number of rows in the set (popcount)"""
+        return popcount(self.words)
+
+    def mean(self):
+        """Share of all rows in the set"""
+        return self.count() / self.n if self.n else float('nan')
+
+    def to_mask(self):
+        """Boolean NumPy array with one entry per row"""
+        return np.unpackbits(self.words.view(np.uint8), count=self.n, bitorder='little').astype(bool)
+
+    def indices(self):
+        """Row positions in the set"""
+        return np.flatnonzero(self.to_mask())
+
+    def __len__(self):
+        return self.count()
+
+    def __repr__(self):
+        return f"Bitset({self.count():,} of {self.n:,} rows)"
+
+
+class BitmapIndex:
+    """Packed row codes plus per-column bitsets for 0/1 indicator columns
+
+    Args:
+        df: DataFrame with the indicator columns
+        columns: Columns to index (default: the BRFSS 0/1 columns present in df)
+    """
+
+    def __init__(self, df, columns=None):
+        if columns is None:
+            columns = [c for c in BRFSS_BINARY_COLUMNS if c in df.columns]
+        if not columns:
+            raise ValueError("No binary indicator columns to index")
+        if len(columns) > 64:
+            raise ValueError(f"At most 64 columns can be packed per row, got {len(columns)}")
+
+        self.columns = list(columns)
+        self.bits = {name: position for position, name in enumerate(self.columns)}
+        self.n = len(df)
+        dtype = next(t for t in (np.uint8, np.uint16, np.uint32, np.uint64)
+                     if np.iinfo(t).bits >= len(self.columns))
+        self.codes = np.zeros(self.n, dtype=dtype)
+        self.words = {}
+
+        for name, position in self.bits.items():
+            values = df[name].to_numpy()
+            mask = values == 1
+            invalid = ~(mask | (values == 0))
+            if invalid.any():
+                raise ValueError(f"Column '{name}' has {int(invalid.sum())} values other than 0/1")
+            self.codes |= mask.astype(dtype) << dtype(position)
+            self.words[name] = pack(mask)
+
+        self._histogram = None
+
+    def __getitem__(self, name):
+        """Bitset of the rows where `name` == 1"""
+        if name not in self.words:
+            raise KeyError(f"Column '{name}' is not indexed. Indexed: {', '.join(self.columns)}")
+        return Bitset(self.words[name], self.n)
+
+    def where(self, **conditions):
+        """Bitset of the rows matching every column=value condition (value 0 or 1)"""
+        result = Bitset(pack(np.ones(self.n, dtype=bool)), self.n)
+        for name, value in conditions.items():
+            bits = self[name]
+            result = result & (bits if value else ~bits)
+        return result
+
+    @property
+    def histogram(self):
+        """(codes, counts) of the packed row codes that occur (computed once)"""
+        if self._histogram is None:
+            if len(self.columns) > MAX_HISTOGRAM_BITS:
+                raise ValueError(f"Histogram needs <= {MAX_HISTOGRAM_BITS} indexed columns")
+            counts = np.bincount(self.codes, minlength=1 << len(self.columns))
+            present = np.flatnonzero(counts)
+            self._histogram = (present, counts[present])
+        return self._histogram
+
+    def _mask_value(self, conditions):
+        mask = value = 0
+        for name, flag in conditions.items():
+            if name not in self.bits:
+                raise KeyError(f"Column '{name}' is not indexed. Indexed: {', '.join(self.columns)}")
+            mask |= 1 << self.bits[name]
+            value |= (1 << self.bits[name]) if flag else 0
+        return mask, value
+
+    def count(self, **conditions):
+        """Rows matching every column=value condition, answered from the code histogram"""
+        if len(self.columns) > MAX_HISTOGRAM_BITS:
+            return self.where(**conditions).count()
+        mask, value = self._mask_value(conditions)
+        codes, counts = self.histogram
+        return int(counts[(codes & mask) == value].sum())
+
+    def mean(self, **conditions):
+        """Share of rows matching every column=value condition"""
+        return self.count(**conditions) / self.n if self.n else float('nan')
+
+    def rate(self, rows, outcome):
+        """Share of `rows` (a Bitset) where the indexed `outcome` column is 1"""
+        total = rows.count()
+        return (rows & self[outcome]).count() / total if total else float('nan')
+
+    def combinations(self, columns, outcome=None):
+        """Count (and outcome rate) for every 0/1 combination of `columns`
+
+        Returns:
+            DataFrame with one row per combination: the column values, count,
+            share and, with an outcome, its events and rate
+        """
+        if len(self.columns) > MAX_HISTOGRAM_BITS:
+            raise ValueError(f"combinations() needs <= {MAX_HISTOGRAM_BITS} indexed columns")
+        self._mask_value({name: 1 for name in columns})  # validates the names
+        codes, histogram = self.histogram
+        # Sub-code of each full code restricted to the requested columns
+        sub = np.zeros(len(codes), dtype=np.int64)
+        for j, name in enumerate(columns):
+            sub |= ((codes >> self.bits[name]) & 1) << j
+        size = 1 << len(columns)
+        counts = np.bincount(sub, weights=histogram, minlength=size).astype(np.int64)
+
+        table = pd.DataFrame({name: (np.arange(size) >> j) & 1 for j, name in enumerate(columns)})
+        table['count'] = counts
+        table['share'] = counts / self.n if self.n else np.nan
+        if outcome is not None:
+            self._mask_value({outcome: 1})
+            positive = (codes >> self.bits[outcome]) & 1
+            events = np.bincount(sub, weights=histogram * positive, minlength=size)
+            table['events'] = events.astype(np.int64)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                table['rate'] = events / counts
+        return table
+
+    def __repr__(self):
+        return f"BitmapIndex({self.n:,} rows, {len(self.columns)} columns, {self.codes.dtype})"
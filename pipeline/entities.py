@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Country vs aggregate classification of world dataset entities.
+
+The world prevalence data (Our World in Data / World Bank) mixes countries
+with regional and income-group aggregates. Matching names against a list of
+terms like 'Africa' or 'Central' also drops real countries such as
+"Central African Republic" and "South Africa". Instead, entities are
+classified by their code:
+  - an ISO 3166-1 alpha-3 code from the table below, or one of the OWID
+    codes for countries without one (OWID_KOS) -> 'country'
+  - any other OWID_ code (OWID_WRL, ...) -> 'aggregate'
+  - no code: 'country' if the name is a known country name, else 'aggregate'
+    (e.g. "Sub-Saharan Africa (WB)", "High-income countries")
+  - any other code -> 'unknown'
+
+Every lookup is a dict access. classify_entities() classifies each distinct
+(entity, code) pair once and broadcasts the result back to the rows, so
+filtering millions of country-year rows costs two factorizes and a np.unique.
+
+Example:
+    from pipeline.entities import classify_entities, filter_countries
+
+    kind = classify_entities(df, entity='Entity', code='Code')
+    print(kind.value_counts())
+    df_countries = filter_countries(df)
+
+Usage:
+    python -m pipeline.entities <input_csv> [entity_column] [code_column]
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+COUNTRY = 'country'
+AGGREGATE = 'aggregate'
+UNKNOWN = 'unknown'
+
+# ISO 3166-1 alpha-3 codes and short names
+_ISO3_TABLE = """
+ABW Aruba|AFG Afghanistan|AGO Angola|AIA Anguilla|ALA Aland Islands|ALB Albania|AND Andorra
+ARE United Arab Emirates|ARG Argentina|ARM Armenia|ASM American Samoa|ATA Antarctica
+ATF French Southern Territories|ATG Antigua and Barbuda|AUS Australia|AUT Austria|AZE Azerbaijan
+BDI Burundi|BEL Belgium|BEN Benin|BES Bonaire Sint Eustatius and Saba|BFA Burkina Faso
+BGD Bangladesh|BGR Bulgaria|BHR Bahrain|BHS Bahamas|BIH Bosnia and Herzegovina|BLM Saint Barthelemy
+BLR Belarus|BLZ Belize|BMU Bermuda|BOL Bolivia|BRA Brazil|BRB Barbados|BRN Brunei|BTN Bhutan
+BVT Bouvet Island|BWA Botswana|CAF Central African Republic|CAN Canada|CCK Cocos Islands
+CHE Switzerland|CHL Chile|CHN China|CIV Cote d'Ivoire|CMR Cameroon
+COD Democratic Republic of Congo|COG Congo|COK Cook Islands|COL Colombia|COM Comoros
+CPV Cape Verde|CRI Costa Rica|CUB Cuba|CUW Curacao|CXR Christmas Island|CYM Cayman Islands
+CYP Cyprus|CZE Czechia|DEU Germany|DJI Djibouti|DMA Dominica|DNK Denmark|DOM Dominican Republic
+DZA Algeria|ECU Ecuador|EGY Egypt|ERI Eritrea|ESH Western Sahara|ESP Spain|EST Estonia
+ETH Ethiopia|FIN Finland|FJI Fiji|FLK Falkland Islands|FRA France|FRO Faroe Islands
+FSM Micronesia (country)|GAB Gabon|GBR United Kingdom|GEO Georgia|GGY Guernsey|GHA Ghana
+GIB Gibraltar|GIN Guinea|GLP Guadeloupe|GMB Gambia|GNB Guinea-Bissau|GNQ Equatorial Guinea
+GRC Greece|GRD Grenada|GRL Greenland|GTM Guatemala|GUF French Guiana|GUM Guam|GUY Guyana
+HKG Hong Kong|HMD Heard Island and McDonald Islands|HND Honduras|HRV Croatia|HTI Haiti
+HUN Hungary|IDN Indonesia|IMN Isle of Man|IND India|IOT British Indian Ocean Territory
+IRL Ireland|IRN Iran|IRQ Iraq|ISL Iceland|ISR Israel|ITA Italy|JAM Jamaica|JEY Jersey
+JOR Jordan|JPN Japan|KAZ Kazakhstan|KEN Kenya|KGZ Kyrgyzstan|KHM Cambodia|KIR Kiribati
+KNA Saint Kitts and Nevis|KOR South Korea|KWT Kuwait|LAO Laos|LBN Lebanon|LBR Liberia|LBY Libya
+LCA Saint Lucia|LIE Liechtenstein|LKA Sri Lanka|LSO Lesotho|LTU Lithuania|LUX Luxembourg
+LVA Latvia|MAC Macao|MAF Saint Martin (French part)|MAR Morocco|MCO Monaco|MDA Moldova
+MDG Madagascar|MDV Maldives|MEX Mexico|MHL Marshall Islands|MKD North Macedonia|MLI Mali
+MLT Malta|MMR Myanmar|MNE Montenegro|MNG Mongolia|MNP Northern Mariana Islands|MOZ Mozambique
+MRT Mauritania|MSR Montserrat|MTQ Martinique|MUS Mauritius|MWI Malawi|MYS Malaysia|MYT Mayotte
+NAM Namibia|NCL New Caledonia|NER Niger|NFK Norfolk Island|NGA Nigeria|NIC Nicaragua|NIU Niue
+NLD Netherlands|NOR Norway|NPL Nepal|NRU Nauru|NZL New Zealand|OMN Oman|PAK Pakistan|PAN Panama
+PCN Pitcairn|PER Peru|PHL Philippines|PLW Palau|PNG Papua New Guinea|POL Poland|PRI Puerto Rico
+PRK North Korea|PRT Portugal|PRY Paraguay|PSE Palestine|PYF French Polynesia|QAT Qatar
+REU Reunion|ROU Romania|RUS Russia|RWA Rwanda|SAU Saudi Arabia|SDN Sudan|SEN Senegal
+SGP Singapore|SGS South Georgia and the South Sandwich Islands|SHN Saint Helena
+SJM Svalbard and Jan Mayen|SLB Solomon Islands|SLE Sierra Leone|SLV El Salvador|SMR San Marino
+SOM Somalia|SPM Saint Pierre and Miquelon|SRB Serbia|SSD South Sudan|STP Sao Tome and Principe
+SUR Suriname|SVK Slovakia|SVN Slovenia|SWE Sweden|SWZ Eswatini|SXM Sint Maarten (Dutch part)
+SYC Seychelles|SYR Syria|TCA Turks and Caicos Islands|TCD Chad|TGO Togo|THA Thailand
+TJK Tajikistan|TKL Tokelau|TKM Turkmenistan|TLS East Timor|TON Tonga|TTO Trinidad and Tobago
+TUN Tunisia|TUR Turkey|TUV Tuvalu|TWN Taiwan|TZA Tanzania|UGA Uganda|UKR Ukraine
+UMI United States Minor Outlying Islands|URY Uruguay|USA United States|UZB Uzbekistan
+VAT Vatican|VCT Saint Vincent and the Grenadines|VEN Venezuela|VGB British Virgin Islands
+VIR United States Virgin Islands|VNM Vietnam|VUT Vanuatu|WLF Wallis and Futuna|WSM Samoa
+YEM Yemen|ZAF South Africa|ZMB Zambia|ZWE Zimbabwe
+"""
+
+ISO3_COUNTRIES = dict(entry.split(' ', 1) for entry in _ISO3_TABLE.replace('\n', '|').split('|')
+                      if entry)
+
+# OWID codes for countries and territories without an ISO 3166-1 code
+OWID_COUNTRIES = {
+    'OWID_KOS': 'Kosovo',
+    'OWID_CYN': 'Northern Cyprus',
+    'OWID_SML': 'Somaliland',
+}
+
+# Code-less country names used by the sources in addition to the ISO short names
+COUNTRY_ALIASES = {
+    'Kosovo', 'Northern Cyprus', 'Somaliland', 'Czech Republic', 'Swaziland', 'Macedonia',
+    'Ivory Coast', 'Cabo Verde', 'Timor-Leste', 'Turkiye', 'Vatican City',
+}
+
+
+class EntityClassifier:
+    """Classifies (entity, code) pairs with hash lookups and caches each distinct pair
+
+    Args:
+        countries: {code: name} of country codes (default: ISO 3166-1 alpha-3 plus
+            the OWID country codes)
+        aliases: Extra code-less names to treat as countries
+    """
+
+    def __init__(self, countries=None, aliases=None):
+        self.countries = dict(countries or {**ISO3_COUNTRIES, **OWID_COUNTRIES})
+        self.names = {name.casefold() for name in self.countries.values()}
+        self.names |= {name.casefold() for name in (aliases or COUNTRY_ALIASES)}
+        self._cache = {}
+
+    def _classify(self, entity, code):
+        if isinstance(code, str) and code.strip():
+            code = code.strip().upper()
+            if code in self.countries:
+                return COUNTRY
+            return AGGREGATE if code.startswith('OWID_') else UNKNOWN
+        if isinstance(entity, str) and entity.strip().casefold() in self.names:
+            return COUNTRY
+        return AGGREGATE
+
+    def classify(self, entity, code=None):
+        """'country', 'aggregate' or 'unknown' for one entity (cached)"""
+        key = (entity, code if isinstance(code, str) else None)
+        kind = self._cache.get(key)
+        if kind is None:
+            kind = self._cache[key] = self._classify(*key)
+        return kind
+
+    def classify_frame(self, df, entity='Entity', code='Code'):
+        """Kind of every row, classifying each distinct (entity, code) pair once"""
+        if entity not in df.columns:
+            raise KeyError(f"Column '{entity}' not found. Available: {', '.join(df.columns)}")
+        names, name_levels = pd.factorize(df[entity])
+        if code in df.columns:
+            codes, code_levels = pd.factorize(df[code])
+        else:
+            codes, code_levels = np.full(len(df), -1), []
+        # One integer per (entity, code) pair; missing values factorize to -1
+        pairs, inverse = np.unique((names + 1).astype(np.int64) * (len(code_levels) + 1) + codes + 1,
+                                   return_inverse=True)
+        name_of, code_of = np.divmod(pairs, len(code_levels) + 1)
+        kinds = np.array([self.classify(name_levels[n - 1] if n else None,
+                                        code_levels[c - 1] if c else None)
+                          for n, c in zip(name_of, code_of)], dtype=object)
+        return pd.Series(kinds[inverse], index=df.index, name='Entity_Kind')
+
+    def __repr__(self):
+        return f"EntityClassifier({len(self.countries)} country codes, {len(self._cache)} cached)"
+
+
+_default = None
+
+
+def default_classifier():
+    """Shared classifier, so its cache is reused across calls"""
+    global _default
+    if _default is None:
+        _default = EntityClassifier()
+    return _default
+
+
+def classify_entities(df, entity='Entity', code='Code'):
+    """'country' / 'aggregate' / 'unknown' per row of a world dataset"""
+    return default_classifier().classify_frame(df, entity, code)
+
+
+def filter_countries(df, entity='Entity', code='Code'):
+    """Rows of real countries only (aggregates and unknown codes dropped)"""
+    return df[classify_entities(df, entity, code) == COUNTRY]
+
+
+def main():
+    """Print the entity classification of a world dataset"""
+    if len(sys.argv) < 2 or len(sys.argv) > 4:
+        print("Usage: python -m pipeline.entities <input_csv> [entity_column] [code_column]")
+        sys.exit(1)
+
+    input_file = sys.argv[1]
+    entity = sys.argv[2] if len(sys.argv) > 2 else 'Entity'
+    code = sys.argv[3] if len(sys.argv) > 3 else 'Code'
+    try:
+        df = pd.read_csv(input_file)
+        kind = classify_entities(df, entity, code)
+    except FileNotFoundError:
+        print(f"✗ Error: File '{input_file}' not found")
+        sys.exit(1)
+    except KeyError as e:
+        print(f"✗ Error: {e}")
+        sys.exit(1)
+
+    print(f"✓ Classified {len(df):,} rows ({df[entity].nunique():,} entities)")
+    print(kind.value_counts().to_string())
+    for label in (AGGREGATE, UNKNOWN):
+        names = sorted(df.loc[kind == label, entity].dropna().unique())
+        if names:
+            print(f"\n{label.capitalize()} entities ({len(names)}):")
+            for name in names:
+                print(f"  - {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Parallel stratified k-fold evaluation of risk scores and models.
+
+Measures how well the hand-made scores (Clinical_Risk_Score for Pima,
+Behavioral_Risk_Score / Healthcare_Barrier for BRFSS) and fitted models
+(e.g. pipeline.riskmodel.RiskModel) discriminate the outcome. Every
+(candidate, fold) pair is one task in a process pool. The data and the fold
+assignment are published once to shared memory (pipeline.shared), so workers
+read the rows without copying them.
+
+Per fold and candidate the harness reports:
+  - auc: ROC AUC of the raw score on the held-out fold (rank based, ties averaged)
+  - brier / ece / mean_predicted / observed_rate: calibration of the score as
+    a probability. Model outputs are used as they are. Hand-made scores are
+    mapped to the outcome rate of their level in the training folds, which is
+    the best any calibration of that score can do.
+  - fit_seconds / score_seconds: time to fit the model (for hand-made scores:
+    to compute the score) and to score the held-out fold
+
+Example:
+    from functools import partial
+    from pipeline.evaluate import cross_validate, summarize
+    from pipeline.riskmodel import RiskModel, BRFSS_RISK_FEATURES
+
+    results = cross_validate(df_health, 'Diabetes_binary',
+                             scores={'Behavioral_Risk_Score': 'Behavioral_Risk_Score',
+                                     'Healthcare_Barrier': 'Healthcare_Barrier'},
+                             models={'logistic': partial(RiskModel, BRFSS_RISK_FEATURES)},
+                             folds=5)
+    print(summarize(results))
+
+    # Held-out risk score for every row (each fold scored by a model fitted on the others)
+    df_health['Model_Risk_Score'] = out_of_fold_scores(
+        df_health, 'Diabetes_binary', partial(RiskModel, BRFSS_RISK_FEATURES))
+
+Usage:
+    python -m pipeline.evaluate <pima|brfss> <input_csv> [folds] [workers]
+"""
+
+import os
+import sys
+import time
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from pipeline.labels import read_csv
+from pipeline.shared import SharedDataset, shared_pool, worker_dataset
+
+
+FOLD_COLUMN = '__fold'
+CALIBRATION_BINS = 10
+# Scores with more distinct values than this are binned into quantiles for calibration
+MAX_SCORE_LEVELS = 20
+
+
+def stratified_folds(y, folds=5, seed=0):
+    """Fold number per row, with each outcome class spread evenly over the folds"""
+    y = np.asarray(y)
+    if folds < 2:
+        raise ValueError("folds must be at least 2")
+    rng = np.random.default_rng(seed)
+    assignment = np.empty(len(y), dtype=np.int8)
+    for value in np.unique(y):
+        rows = np.flatnonzero(y == value)
+        assignment[rng.permutation(rows)] = np.arange(len(rows)) % folds
+    return assignment
+
+
+def roc_auc(y, score):
+    """ROC AUC via the Mann-Whitney rank sum (ties get average ranks)"""
+    y = np.asarray(y) == 1
+    positives = int(y.sum())
+    negatives = len(y) - positives
+    if not positives or not negatives:
+        return float('nan')
+    _, inverse, counts = np.unique(score, return_inverse=True, return_counts=True)
+    ends = np.cumsum(counts)
+    ranks = ((ends - counts + 1 + ends) / 2)[inverse]
+    return float((ranks[y].sum() - positives * (positives + 1) / 2) / (positives * negatives))
+
+
+def calibration(y, probability, bins=CALIBRATION_BINS):
+    """Brier score, expected calibration error, mean predicted and observed rate"""
+    y = np.asarray(y, dtype=np.float64)
+    probability = np.asarray(probability, dtype=np.float64)
+    which = np.minimum((probability * bins).astype(np.int64), bins - 1)
+    count = np.bincount(which, minlength=bins)
+    predicted = np.bincount(which, weights=probability, minlength=bins)
+    observed = np.bincount(which, weights=y, minlength=bins)
+    return {
+        'brier': float(np.mean((probability - y) ** 2)),
+        'ece': float(np.abs(predicted - observed).sum() / len(y)),
+        'mean_predicted': float(probability.mean()),
+        'observed_rate': float(y.mean()),
+    }
+
+
+def _level_rates(train_score, train_y, test_score):
+    """Map scores to the training outcome rate of their level (or quantile bin)"""
+    levels = np.unique(train_score)
+    if len(levels) > MAX_SCORE_LEVELS:
+        edges = np.unique(np.quantile(train_score, np.linspace(0, 1, CALIBRATION_BINS + 1)[1:-1]))
+        train_codes = np.searchsorted(edges, train_score, side='right')
+        test_codes = np.searchsorted(edges, test_score, side='right')
+        size = len(edges) + 1
+    else:
+        train_codes = np.searchsorted(levels, train_score)
+        test_codes = np.searchsorted(levels, test_score)
+        unseen = (test_codes >= len(levels)) | (levels[np.minimum(test_codes, len(levels) - 1)]
+                                                != test_score)
+        test_codes = np.where(unseen, len(levels), test_codes)
+        size = len(levels) + 1
+    count = np.bincount(train_codes, minlength=size)
+    events = np.bincount(train_codes, weights=train_y, minlength=size)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rates = np.where(count > 0, events / count, train_y.mean())
+    return rates[test_codes]
+
+
+def _score_values(spec, frame):
+    """Column name -> its values; callable -> kernel(frame)"""
+    if isinstance(spec, str):
+        return frame[spec].to_numpy(dtype=np.float64)
+    return np.asarray(spec(frame), dtype=np.float64)
+
+
+def evaluate_fold(frame, outcome, name, kind, spec, fold):
+    """One (candidate, fold) evaluation on a frame holding the fold column"""
+    in_test = frame[FOLD_COLUMN].to_numpy() == fold
+    y = frame[outcome].to_numpy(dtype=np.float64)
+    started = time.perf_counter()
+    if kind == 'model':
+        model = spec().fit(frame[~in_test], outcome)
+        fitted = time.perf_counter()
+        score = np.asarray(model.score(frame[in_test]), dtype=np.float64)
+        probability = score
+    else:
+        values = _score_values(spec, frame)
+        fitted = time.perf_counter()
+        score = values[in_test]
+        probability = _level_rates(values[~in_test], y[~in_test], score)
+    finished = time.perf_counter()
+
+    result = {'candidate': name, 'kind': kind, 'fold': fold,
+              'n_train': int((~in_test).sum()), 'n_test': int(in_test.sum()),
+              'auc': roc_auc(y[in_test], score)}
+    result.update(calibration(y[in_test], probability))
+    result['fit_seconds'] = fitted - started
+    result['score_seconds'] = finished - fitted
+    return result
+
+
+def _shared_fold(outcome, name, kind, spec, fold):
+    data = worker_dataset()
+    return evaluate_fold(data.frame('data'), outcome, name, kind, spec, fold)
+
+
+def cross_validate(df, outcome, scores=None, models=None, folds=5, seed=0, workers=None):
+    """Stratified k-fold evaluation of scores and models, one task per (candidate, fold)
+
+    Args:
+        df: DataFrame with the outcome and the columns the candidates use
+        outcome: 0/1 outcome column
+        scores: {name: column name or callable(frame) -> score array} (no fitting)
+        models: {name: picklable factory returning an object with
+            fit(frame, outcome) and score(frame)}, e.g. partial(RiskModel, features)
+        folds: Number of folds
+        seed: Random seed for the fold assignment
+        workers: Worker processes (default: CPU count, 1 = in-process)
+
+    Returns:
+        DataFrame with one row per candidate and fold
+    """
+    candidates = [(name, 'score', spec) for name, spec in (scores or {}).items()]
+    candidates += [(name, 'model', spec) for name, spec in (models or {}).items()]
+    if not candidates:
+        raise ValueError("Nothing to evaluate; pass scores and/or models")
+
+    data = df.dropna(subset=[outcome]).reset_index(drop=True)
+    y = data[outcome].to_numpy()
+    if not np.isin(y, (0, 1)).all():
+        raise ValueError(f"Outcome '{outcome}' must be 0/1")
+    data[FOLD_COLUMN] = stratified_folds(y, folds, seed)
+    tasks = [(name, kind, spec, fold) for name, kind, spec in candidates for fold in range(folds)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        rows = [evaluate_fold(data, outcome, *task) for task in tasks]
+    else:
+        with SharedDataset.publish({'data': data}) as shared, \
+                shared_pool(shared, max_workers=min(workers, len(tasks))) as pool:
+            rows = list(pool.map(_shared_fold, *zip(*[(outcome,) + task for task in tasks])))
+    return pd.DataFrame(rows)
+
+
+def out_of_fold_scores(df, outcome, model, folds=5, seed=0):
+    """Score every row with a model fitted on the other folds
+
+    Scoring the rows a model was trained on rewards overfitting; here each
+    fold is scored by a model that never saw it, with the same stratified
+    folds as cross_validate().
+
+    Args:
+        df: DataFrame with the outcome and the model's columns
+        outcome: 0/1 outcome column
+        model: Factory returning an object with fit(frame, outcome) and score(frame)
+        folds: Number of folds
+        seed: Random seed for the fold assignment
+
+    Returns:
+        Series aligned with df (NaN where the outcome is missing)
+    """
+    known = df[outcome].notna().to_numpy()
+    data = df[known]
+    assignment = stratified_folds(data[outcome].to_numpy(), folds, seed)
+    scores = np.full(len(data), np.nan)
+    for fold in range(folds):
+        in_test = assignment == fold
+        fitted = model().fit(data[~in_test], outcome)
+        scores[in_test] = np.asarray(fitted.score(data[in_test]), dtype=np.float64)
+    result = pd.Series(np.nan, index=df.index)
+    result[known] = scores
+    return result
+
+
+def summarize(results):
+    """Mean and standard deviation over folds per candidate, best AUC first"""
+    metrics = ['auc', 'brier', 'ece', 'fit_seconds', 'score_seconds']
+    summary = results.groupby(['candidate', 'kind'])[metrics].agg(['mean', 'std'])
+    summary.columns = [f'{metric}_{stat}' for metric, stat in summary.columns]
+    return summary.sort_values('auc_mean', ascending=False).reset_index()
+
+
+def default_candidates(dataset, columns):
+    """Hand-made score kernels plus a logistic model for 'pima' or 'brfss'"""
+    from pipeline.riskmodel import RiskModel, BRFSS_RISK_FEATURES
+    from pipeline import score
+
+    if dataset == 'pima':
+        features = [c for c in ('Pregnancies', 'Glucose', 'BloodPressure', 'BMI',
+                                'DiabetesPedigreeFunction', 'Age') if c in columns]
+        return ({'Clinical_Risk_Score': score.clinical_risk_score},
+                {'logistic': partial(RiskModel, features, batch_size=64)}, 'Outcome')
+    if dataset == 'brfss':
+        features = [c for c in BRFSS_RISK_FEATURES if c in columns]
+        return ({'Behavioral_Risk_Score': score.behavioral_risk_score,
+                 'Healthcare_Barrier': score.healthcare_barrier},
+                {'logistic': partial(RiskModel, features)}, 'Diabetes_binary')
+    raise ValueError(f"Unknown dataset '{dataset}'. Use 'pima' or 'brfss'")
+
+
+def main():
+    """Cross-validate the hand-made scores against a logistic model"""
+    usage = "Usage: python -m pipeline.evaluate <pima|brfss> <input_csv> [folds] [workers]"
+    if len(sys.argv) < 3 or len(sys.argv) > 5:
+        print(usage)
+        sys.exit(1)
+
+    dataset, input_file = sys.argv[1], sys.argv[2]
+    try:
+        folds = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+        workers = int(sys.argv[4]) if len(sys.argv) > 4 else None
+        df = read_csv(input_file)
+        if dataset == 'brfss' and 'Fruits_or_Veggies' not in df.columns:
+            from pipeline.score import fruits_or_veggies
+            df['Fruits_or_Veggies'] = fruits_or_veggies(df)
+        scores, models, outcome = default_candidates(dataset, df.columns)
+        started = time.perf_counter()
+        results = cross_validate(df, outcome, scores, models, folds=folds, workers=workers)
+        elapsed = time.perf_counter() - started
+    except FileNotFoundError:
+        print(f"✗ Error: File '{input_file}' not found")
+        sys.exit(1)
+    except (KeyError, ValueError) as e:
+        print(f"✗ Error: {e}")
+        sys.exit(1)
+
+    print(f"✓ {folds}-fold cross-validation of {results['candidate'].nunique()} candidate(s) "
+          f"on {results['n_test'].sum() // results['candidate'].nunique():,} rows in {elapsed:.2f}s")
+    with pd.option_context('display.width', 160):
+        print("\nPer fold:")
+        print(results.round(4).to_string(index=False))
+        print("\nSummary:")
+        print(summarize(results).round(4).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Frequent-itemset and association-rule mining over BRFSS risk factors.
+
+Every (column, value) pair of the binary indicators and of the binned
+categorical columns becomes an item, stored as a bitset (see
+pipeline.bitmap). Itemsets are grown depth-first: extending an itemset is
+one AND of its bitset with the new item's, and its support is a popcount. An
+extension below min_support is pruned together with all of its supersets,
+since support can only shrink. Items from the same column never combine,
+because they are mutually exclusive.
+
+For every frequent itemset X the same pass counts X & outcome, which gives
+the rule X -> outcome with its support, confidence and lift. This covers
+combinations like HighBP=1, HighChol=1, PhysActivity=0 -> Diabetes_binary,
+not just the hand-built risk score sums.
+
+Example:
+    from pipeline.itemsets import association_rules
+
+    rules = association_rules(df_health, outcome='Diabetes_binary',
+                              categorical=['Age_Group', 'BMI_Category', 'Income_Level'],
+                              min_support=0.02, max_len=3, min_lift=1.5)
+    print(rules.head(20))
+
+Usage:
+    python -m pipeline.itemsets <input_csv> [min_support] [max_len] [outcome]
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from pipeline.bitmap import BRFSS_BINARY_COLUMNS, Bitset, pack, popcount
+from pipeline.labels import read_csv
+
+
+def item_bitsets(df, binary=None, categorical=None, bins=None, exclude=()):
+    """Build one bitset per (column, value) item
+
+    Args:
+        df: Input DataFrame
+        binary: 0/1 columns (default: the BRFSS binary columns present in df);
+            both values become items, e.g. PhysActivity=0 and PhysActivity=1
+        categorical: Columns whose every value becomes an item (default: the
+            object/category columns of df)
+        bins: {column: bin edges} for numeric columns to bin with pd.cut first
+        exclude: Columns to leave out (e.g. the outcome)
+
+    Returns:
+        List of (label, column, words) tuples, label like 'HighBP=1'
+    """
+    if binary is None:
+        binary = [c for c in BRFSS_BINARY_COLUMNS if c in df.columns]
+    if categorical is None:
+        categorical = [c for c in df.columns
+                       if df[c].dtype == object or isinstance(df[c].dtype, pd.CategoricalDtype)]
+    bins = bins or {}
+
+    items = []
+    for column in binary:
+        if column in exclude:
+            continue
+        values = df[column].to_numpy()
+        for value in (0, 1):
+            mask = values == value
+            items.append((f'{column}={value}', column, pack(mask)))
+
+    binned = {column: pd.cut(df[column], edges) for column, edges in bins.items()}
+    for column in list(categorical) + list(binned):
+        if column in exclude:
+            continue
+        codes, levels = pd.factorize(binned[column] if column in binned else df[column], sort=True)
+        for code, level in enumerate(levels):
+            items.append((f'{column}={level}', column, pack(codes == code)))
+    return items
+
+
+def _mine(items, n, min_count, max_len, target=None):
+    """Depth-first itemset growth with min-support pruning
+
+    Yields (labels, count, target_count) for every frequent itemset.
+    """
+    # Frequent single items only; rarer items first keeps intersections small
+    singles = [(label, column, words, popcount(words)) for label, column, words in items]
+    singles = sorted((s for s in singles if s[3] >= min_count), key=lambda s: s[3])
+
+    def extend(labels, columns, words, start):
+        for i in range(start, len(singles)):
+            label, column, item_words, _ = singles[i]
+            if column in columns:
+                continue
+            joined = item_words if words is None else words & item_words
+            count = popcount(joined)
+            if count < min_count:
+                continue
+            hits = popcount(joined & target) if target is not None else None
+            yield labels + (label,), count, hits
+            if len(labels) + 1 < max_len:
+                yield from extend(labels + (label,), columns | {column}, joined, i + 1)
+
+    yield from extend((), frozenset(), None, 0)
+
+
+def frequent_itemsets(df, min_support=0.05, max_len=3, **item_options):
+    """All itemsets with support >= min_support (see item_bitsets for item options)
+
+    Returns:
+        DataFrame with itemset (tuple of labels), size, count and support
+    """
+    items = item_bitsets(df, **item_options)
+    n = len(df)
+    rows = [{'itemset': labels, 'size': len(labels), 'count': count, 'support': count / n}
+            for labels, count, _ in _mine(items, n, max(1, int(np.ceil(min_support * n))), max_len)]
+    table = pd.DataFrame(rows, columns=['itemset', 'size', 'count', 'support'])
+    return table.sort_values(['support', 'size'], ascending=[False, True]).reset_index(drop=True)
+
+
+def association_rules(df, outcome='Diabetes_binary', min_support=0.05, min_confidence=0.0,
+                      min_lift=1.0, max_len=3, **item_options):
+    """Rules X -> outcome=1 over frequent risk-factor itemsets X
+
+    Args:
+        df: Input DataFrame with a 0/1 outcome column
+        outcome: Outcome column predicted by the rules
+        min_support: Minimum support of the antecedent X
+        min_confidence: Minimum P(outcome | X)
+        min_lift: Minimum confidence / P(outcome)
+        max_len: Maximum number of items in X
+        item_options: binary, categorical, bins (see item_bitsets)
+
+    Returns:
+        DataFrame sorted by lift with antecedent, size, antecedent_support,
+        support (of X and outcome), confidence, lift, count and events
+    """
+    values = df[outcome].to_numpy()
+    target = pack(values == 1)
+    n = len(df)
+    base_rate = Bitset(target, n).mean()
+    if not base_rate:
+        raise ValueError(f"Outcome '{outcome}' has no positive rows")
+
+    items = item_bitsets(df, exclude=(outcome,), **item_options)
+    rows = []
+    for labels, count, events in _mine(items, n, max(1, int(np.ceil(min_support * n))), max_len,
+                                       target=target):
+        confidence = events / count
+        lift = confidence / base_rate
+        if confidence >= min_confidence and lift >= min_lift:
+            rows.append({'antecedent': ' & '.join(labels), 'size': len(labels),
+                         'antecedent_support': count / n, 'support': events / n,
+                         'confidence': confidence, 'lift': lift, 'count': count, 'events': events})
+    columns = ['antecedent', 'size', 'antecedent_support', 'support', 'confidence', 'lift',
+               'count', 'events']
+    rules = pd.DataFrame(rows, columns=columns)
+    return rules.sort_values(['lift', 'support'], ascending=False).reset_index(drop=True)
+
+
+def main():
+    """Print the strongest rules for the outcome in a cleaned BRFSS file"""
+    if len(sys.argv) < 2 or len(sys.argv) > 5:
+        print("Usage: python -m pipeline.itemsets <input_csv> [min_support] [max_len] [outcome]")
+        sys.exit(1)
+
+    input_file = sys.argv[1]
+    try:
+        min_support = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+        max_len = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+        outcome = sys.argv[4] if len(sys.argv) > 4 else 'Diabetes_binary'
+        df = read_csv(input_file)
+        rules = association_rules(df, outcome=outcome, min_support=min_support, max_len=max_len)
+    except FileNotFoundError:
+        print(f"✗ Error: File '{input_file}' not found")
+        sys.exit(1)
+    except (KeyError, ValueError) as e:
+        print(f"✗ Error: {e}")
+        sys.exit(1)
+
+    print(f"✓ {len(rules):,} rules -> {outcome} with support >= {min_support} and lift >= 1")
+    with pd.option_context('display.width', 160, 'display.max_colwidth', 80):
+        print(rules.head(25).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Dictionary-encoded label columns: integer codes plus an ordered dictionary.
+
+The derived labels (BMI_Category, Age_Group, Glucose_Category, BP_Category,
+Pregnancy_Group, Income_Level) used to be written to new/*.csv as repeated
+strings ("Medium (4-6)", "$35k-50k", ...) and read back as object columns,
+which lost their order (groupby / plots sorted "$10k-15k" before "<$10k")
+and cost a Python string per row. Here they stay ordered pandas categoricals
+from feature construction to analysis:
+  - build them with pd.cut(..., labels=...) or ordered_labels(codes, mapping)
+  - to_csv() writes each categorical column as its integer code (empty for
+    missing) and stores the ordered dictionaries next to the file in
+    <name>.labels.json
+  - read_csv() reads the codes as small integers and restores the ordered
+    categoricals from that file (a file without one is read as before)
+
+Memory and groupby cost of a label column are then those of an int8 column,
+and the category order is kept for sort_index(), pivots and plot axes.
+
+Example:
+    from pipeline import labels
+
+    df['Income_Level'] = labels.ordered_labels(df['Income'], income_mapping)
+    labels.to_csv(df, 'new/indicator.csv')       # + new/indicator.labels.json
+
+    df = labels.read_csv('new/indicator.csv')
+    df.groupby('Income_Level', observed=True)['Diabetes_binary'].mean()
+
+Usage:
+    python -m pipeline.labels <csv>
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+LABELS_VERSION = 1
+SUFFIX = '.labels.json'
+
+
+def dictionary_path(path):
+    """Path of the label dictionary file stored next to a CSV file"""
+    return f'{os.path.splitext(path)[0]}{SUFFIX}'
+
+
+def ordered_labels(codes, mapping):
+    """Ordered categorical from integer codes and a {code: label} mapping
+
+    The category order is the order of the sorted codes (e.g. the BRFSS Age
+    and Income levels); codes missing from the mapping become NaN.
+    """
+    categories = [mapping[code] for code in sorted(mapping)]
+    return pd.Categorical(pd.Series(codes).map(mapping), categories=categories, ordered=True)
+
+
+def dictionaries(df):
+    """{column: {'labels': [...], 'ordered': bool}} of the categorical columns of df"""
+    return {column: {'labels': [str(c) if isinstance(c, pd.Interval) else c
+                                for c in df[column].cat.categories],
+                     'ordered': bool(df[column].cat.ordered)}
+            for column in df.columns if isinstance(df[column].dtype, pd.CategoricalDtype)}
+
+
+def encode(df):
+    """Copy of df with every categorical column replaced by its integer codes
+
+    Returns:
+        (encoded DataFrame, dictionaries)
+    """
+    specs = dictionaries(df)
+    if not specs:
+        return df, specs
+    encoded = df.copy(deep=False)
+    for column in specs:
+        codes = df[column].cat.codes
+        encoded[column] = codes.where(codes >= 0).astype('Int16' if len(specs[column]['labels'])
+                                                          > 127 else 'Int8')
+    return encoded, specs
+
+
+def decode(df, specs):
+    """Restore the categorical columns of an encoded frame (in place); returns df"""
+    for column, spec in specs.items():
+        if column not in df.columns:
+            continue
+        codes = df[column].fillna(-1).to_numpy(dtype=np.int64)
+        if codes.max(initial=-1) >= len(spec['labels']) or codes.min(initial=0) < -1:
+            raise ValueError(f"Column '{column}' has codes outside its dictionary "
+                             f"(0-{len(spec['labels']) - 1})")
+        df[column] = pd.Categorical.from_codes(codes, categories=spec['labels'],
+                                               ordered=spec.get('ordered', True))
+    return df
+
+
+def write_dictionaries(path, specs):
+    """Store the dictionaries for a CSV file (and remove a stale file if there are none)"""
+    target = dictionary_path(path)
+    if not specs:
+        if os.path.exists(target):
+            os.remove(target)
+        return None
+    with open(target, 'w') as f:
+        json.dump({'version': LABELS_VERSION, 'columns': specs}, f, indent=2)
+    return target
+
+
+def read_dictionaries(path):
+    """Dictionaries stored for a CSV file ({} if it has none, or for buffers)"""
+    if not isinstance(path, (str, os.PathLike)):
+        return {}
+    try:
+        with open(dictionary_path(path)) as f:
+            spec = json.load(f)
+    except FileNotFoundError:
+        return {}
+    if spec.get('version') != LABELS_VERSION:
+        raise ValueError(f"Unsupported label dictionary version in {dictionary_path(path)}")
+    return spec['columns']
+
+
+def to_csv(df, path, **to_csv_options):
+    """Write df with label columns as integer codes, plus their dictionaries
+
+    Returns:
+        Path of the dictionary file (None if df has no categorical columns)
+    """
+    encoded, specs = encode(df)
+    to_csv_options.setdefault('index', False)
+    encoded.to_csv(path, **to_csv_options)
+    return write_dictionaries(path, specs)
+
+
+class DecodingReader:
+    """pandas TextFileReader whose chunks come out decoded
+
+    Keeps the reader's API: iteration, get_chunk(), close() and use as a
+    context manager (which closes the file).
+    """
+
+    def __init__(self, reader, specs):
+        self.reader = reader
+        self.specs = specs
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return decode(next(self.reader), self.specs)
+
+    def get_chunk(self, size=None):
+        return decode(self.reader.get_chunk(size), self.specs)
+
+    def read(self, nrows=None):
+        return decode(self.reader.read(nrows), self.specs)
+
+    def close(self):
+        self.reader.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_csv(path, **read_options):
+    """pd.read_csv that restores the ordered label columns written by to_csv()
+
+    With chunksize / iterator it returns a DecodingReader, so chunks are
+    decoded as they are read.
+    """
+    specs = read_dictionaries(path)
+    if not specs:
+        return pd.read_csv(path, **read_options)
+    usecols = read_options.get('usecols')
+    if usecols is not None and not callable(usecols):
+        specs = {column: spec for column, spec in specs.items() if column in usecols}
+    dtype = read_options.pop('dtype', None) or {}
+    if not isinstance(dtype, dict):
+        dtype = {column: dtype for column in pd.read_csv(path, nrows=0).columns}
+    dtype = dict(dtype, **{column: 'Int16' for column in specs})
+    reader = pd.read_csv(path, dtype=dtype, **read_options)
+    if isinstance(reader, pd.DataFrame):
+        return decode(reader, specs)
+    return DecodingReader(reader, specs)
+
+
+def main():
+    """Print the label dictionaries stored for a CSV file"""
+    if len(sys.argv) != 2:
+        print("Usage: python -m pipeline.labels <csv>")
+        sys.exit(1)
+
+    path = sys.argv[1]
+    try:
+        if not os.path.exists(path):
+            raise FileNotFoundError(2, 'No such file', path)
+        specs = read_dictionaries(path)
+    except FileNotFoundError as e:
+        print(f"✗ Error: File '{e.filename}' not found")
+        sys.exit(1)
+    except (KeyError, ValueError) as e:
+        print(f"✗ Error: {e}")
+        sys.exit(1)
+
+    if not specs:
+        print(f"✓ {path} has no label dictionaries ({dictionary_path(path)} not found)")
+        return
+    print(f"✓ {len(specs)} label column(s) in {dictionary_path(path)}")
+    for column, spec in specs.items():
+        order = ' < '.join(map(str, spec['labels'])) if spec['ordered'] else ', '.join(
+            map(str, spec['labels']))
+        print(f"  {column}: {order}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Row-level lineage of the cleaning pipelines as compressed bitmaps.
+
+Rows disappear at several steps (Pima dropna() after zero-to-NaN, BRFSS
+duplicate and range removals, world aggregate filtering and the dropna()
+after the pivot). A Lineage remembers, for every (stage, rule), which rows
+of the source file that rule removed: one bit per source row, packed 64 rows
+per uint64 word (pipeline.bitmap.Bitset) and stored deflate-compressed next
+to the cleaned output. A rule that removed nothing compresses to a few bytes.
+
+Rows are identified by their position in the source file (0 = first data
+row), so the source DataFrame must still have the RangeIndex it was read
+with; pandas filters keep those labels, so record() only compares the index
+before and after a step. Audit questions are then answered from the file
+alone, without re-running the pipeline or diffing CSV copies:
+  - which rows did the GenHlth rule remove?     lineage.rows('GenHlth outside 1-5')
+  - why is source row 1234 not in the output?   lineage.why(1234)
+  - how many rows did each rule remove?         lineage.summary()
+
+Example:
+    from pipeline.lineage import Lineage
+
+    lineage = Lineage(df, 'pima')
+    df_cleaned = lineage.record(df_cleaned, df_cleaned.dropna(), 'missing values')
+    lineage.save(os.path.splitext(output_file)[0] + '_lineage.npz')
+
+    Lineage.load('new/pima_lineage.npz').rows('missing values')
+
+Usage:
+    python -m pipeline.lineage show <lineage_npz>
+    python -m pipeline.lineage rows <lineage_npz> <rule> [input_csv]
+    python -m pipeline.lineage why <lineage_npz> <row>
+"""
+
+import json
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from pipeline.bitmap import Bitset, pack
+
+
+class Lineage:
+    """Which source rows each (stage, rule) removed, one bitmap per rule
+
+    Args:
+        source: Source DataFrame (with its RangeIndex) or number of source rows
+        dataset: Dataset name, e.g. 'pima', 'brfss' or 'world'
+        source_file: Path of the source file (for the record)
+    """
+
+    def __init__(self, source, dataset=None, source_file=None):
+        if isinstance(source, pd.DataFrame):
+            if not source.index.equals(pd.RangeIndex(len(source))):
+                raise ValueError("Lineage needs the source rows' RangeIndex; "
+                                 "create it before any rows are dropped or reordered")
+            source = len(source)
+        self.n = int(source)
+        self.dataset = dataset
+        self.source_file = source_file
+        self.created_at = None
+        self.rules = {}      # (stage, rule) -> packed words
+
+    def _words(self, positions):
+        positions = np.asarray(positions, dtype=np.int64)
+        if len(positions) and (positions.min() < 0 or positions.max() >= self.n):
+            raise ValueError(f"Row positions must be between 0 and {self.n - 1}")
+        mask = np.zeros(self.n, dtype=bool)
+        mask[positions] = True
+        return pack(mask)
+
+    def discard(self, positions, rule, stage='clean'):
+        """Record that `rule` removed the source rows at `positions`"""
+        words = self._words(positions)
+        key = (stage, rule)
+        self.rules[key] = self.rules[key] | words if key in self.rules else words
+        return self
+
+    def record(self, before, after, rule, stage='clean'):
+        """Record the rows of `before` missing from `after`; returns `after`
+
+        Use around any row filter: record(df, df.dropna(), 'missing values').
+        """
+        removed = before.index.difference(after.index)
+        self.discard(removed.to_numpy(), rule, stage)
+        return after
+
+    def removed(self, rule=None, stage=None):
+        """Bitset of the source rows removed by a rule / stage (default: by any rule)"""
+        keys = [key for key in self.rules
+                if (rule is None or key[1] == rule) and (stage is None or key[0] == stage)]
+        if rule is not None and not keys:
+            raise KeyError(f"No rule '{rule}'. Rules: {', '.join(r for _, r in self.rules)}")
+        words = np.zeros(-(-self.n // 64), dtype='<u8')
+        for key in keys:
+            words = words | self.rules[key]
+        return Bitset(words, self.n)
+
+    def kept(self):
+        """Bitset of the source rows that reached the output"""
+        return ~self.removed()
+
+    def rows(self, rule=None, stage=None):
+        """Source row positions removed by a rule / stage"""
+        return self.removed(rule, stage).indices()
+
+    def why(self, position):
+        """(stage, rule) pairs that removed one source row ([] if it was kept)"""
+        if not 0 <= position < self.n:
+            raise ValueError(f"Row must be between 0 and {self.n - 1}")
+        word, bit = divmod(int(position), 64)
+        return [key for key, words in self.rules.items() if (int(words[word]) >> bit) & 1]
+
+    def summary(self):
+        """Rows removed per (stage, rule), in the order the rules were recorded"""
+        rows = [{'stage': stage, 'rule': rule, 'rows': Bitset(words, self.n).count()}
+                for (stage, rule), words in self.rules.items()]
+        table = pd.DataFrame(rows, columns=['stage', 'rule', 'rows'])
+        table['share'] = table['rows'] / self.n if self.n else np.nan
+        return table
+
+    def save(self, path):
+        """Write every rule's bitmap (deflate-compressed) plus metadata to an .npz file"""
+        meta = {'dataset': self.dataset, 'source_file': self.source_file, 'rows': self.n,
+                'rules': [list(key) for key in self.rules],
+                'created_at': datetime.now().isoformat(timespec='seconds')}
+        arrays = {f'rule_{i}': words for i, words in enumerate(self.rules.values())}
+        np.savez_compressed(path, meta=np.array(json.dumps(meta)), **arrays)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """Lineage saved with save()"""
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            lineage = cls(meta['rows'], meta.get('dataset'), meta.get('source_file'))
+            for i, (stage, rule) in enumerate(meta['rules']):
+                lineage.rules[(stage, rule)] = data[f'rule_{i}']
+            lineage.created_at = meta.get('created_at')
+        return lineage
+
+    def __repr__(self):
+        return (f"Lineage({self.dataset or 'dataset'}: {self.kept().count():,} of {self.n:,} "
+                f"source rows kept, {len(self.rules)} rule(s))")
+
+
+def main():
+    """Summarize a lineage file, list the rows a rule removed, or explain one row"""
+    usage = ("Usage: python -m pipeline.lineage show <lineage_npz>\n"
+             "       python -m pipeline.lineage rows <lineage_npz> <rule> [input_csv]\n"
+             "       python -m pipeline.lineage why <lineage_npz> <row>")
+    commands = {'show': (3, 3), 'rows': (4, 5), 'why': (4, 4)}
+    if len(sys.argv) < 2 or sys.argv[1] not in commands or not (
+            commands[sys.argv[1]][0] <= len(sys.argv) <= commands[sys.argv[1]][1]):
+        print(usage)
+        sys.exit(1)
+
+    command, path = sys.argv[1], sys.argv[2]
+    try:
+        lineage = Lineage.load(path)
+        if command == 'show':
+            print(f"✓ {lineage}")
+            if lineage.source_file:
+                print(f"  source: {lineage.source_file}")
+            print(lineage.summary().to_string(index=False))
+        elif command == 'rows':
+            rows = lineage.rows(sys.argv[3])
+            print(f"✓ Rule '{sys.argv[3]}' removed {len(rows):,} source row(s)")
+            if len(sys.argv) > 4:
+                # Row positions are 0-based data rows; line 0 of the file is the header
+                wanted = set((rows + 1).tolist())
+                frame = pd.read_csv(sys.argv[4], skiprows=lambda i: i and i not in wanted)
+                frame.index = rows
+                with pd.option_context('display.width', 160, 'display.max_rows', 200):
+                    print(frame.to_string())
+            else:
+                print(' '.join(map(str, rows)))
+        else:
+            row = int(sys.argv[3])
+            reasons = lineage.why(row)
+            if reasons:
+                for stage, rule in reasons:
+                    print(f"✓ Row {row} removed at stage '{stage}' by rule '{rule}'")
+            else:
+                print(f"✓ Row {row} was kept")
+    except FileNotFoundError as e:
+        print(f"✗ Error: File '{e.filename}' not found")
+        sys.exit(1)
+    except (KeyError, ValueError) as e:
+        print(f"✗ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
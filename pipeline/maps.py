@@ -0,0 +1,197 @@
+"""
+Choropleth export with shared, offline plotly.js assets.
+
+fig.write_html() embeds the full plotly.js bundle (~4.5 MB) in every file.
+Here the bundle is written once next to the figures (Figures/assets/) and
+every HTML file references it with a relative <script src>, which keeps each
+map small.
+
+Choropleths also need the world topojson, which plotly.js normally fetches
+from its CDN when the map is opened. A copy ships with the package
+(pipeline/assets/world_110m.json) and is written into the same assets folder
+as a script that pre-registers it, so maps render from file:// with no
+network access at any point. The copy was built from the public-domain
+Natural Earth 1:110m admin-0 countries: 'countries' (ISO-3 ids), 'land' and
+'coastlines' layers; 'ocean', 'lakes', 'rivers' and 'subunits' are empty.
+Other scopes / resolutions have no local copy and are fetched when opened.
+
+write_prevalence_map() turns long-format prevalence data (Entity, Code, Year,
+value) into a single map with a selector over every year plus the change
+between the first and last year, instead of one HTML file per view.
+
+Example:
+    from pipeline.maps import write_prevalence_map
+
+    long_df = df_global.melt(id_vars=['Entity', 'Code'], value_vars=['2011', '2024'],
+                             var_name='Year', value_name='Prevalence')
+    fig = write_prevalence_map(long_df, 'Figures/global_map.html')
+    fig.show()
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import plotly
+import plotly.graph_objects as go
+from plotly.offline import get_plotlyjs
+
+
+ASSET_DIR = 'assets'
+TOPOJSON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+GEO_TRACES = ('choropleth', 'scattergeo')
+
+PAGE_TEMPLATE = """<html>
+<head>
+<meta charset="utf-8" />
+{scripts}
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+
+def ensure_plotlyjs(directory, asset_dir=ASSET_DIR):
+    """Write the plotly.js bundle once and return its path relative to `directory`"""
+    filename = f'plotly-{plotly.__version__}.min.js'
+    relative = os.path.join(asset_dir, filename)
+    target = os.path.join(directory, relative)
+    if not os.path.exists(target):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'w', encoding='utf-8') as f:
+            f.write(get_plotlyjs())
+    return relative.replace(os.sep, '/')
+
+
+def ensure_topojson(directory, name='world_110m', asset_dir=ASSET_DIR):
+    """Write a packaged plotly.js topojson as a script that pre-registers it
+
+    Returns:
+        Path of the script relative to `directory`, or None if the package has
+        no local copy of that topojson
+    """
+    relative = os.path.join(asset_dir, f'topojson-{name}.js')
+    target = os.path.join(directory, relative)
+    if not os.path.exists(target):
+        try:
+            with open(os.path.join(TOPOJSON_DIR, f'{name}.json'), encoding='utf-8') as f:
+                topojson = json.load(f)
+        except FileNotFoundError:
+            print(f"⚠ No local topojson '{name}' in {TOPOJSON_DIR}; "
+                  f"the map will fetch it when opened")
+            return None
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'w', encoding='utf-8') as f:
+            f.write("window.PlotlyGeoAssets = window.PlotlyGeoAssets || {topojson: {}};\n")
+            f.write(f"window.PlotlyGeoAssets.topojson[{json.dumps(name)}] = ")
+            json.dump(topojson, f, separators=(',', ':'))
+            f.write(";\n")
+    return relative.replace(os.sep, '/')
+
+
+def _topojson_name(fig):
+    """Name plotly.js uses for a figure's topojson, e.g. 'world_110m'"""
+    scope = fig.layout.geo.scope or 'world'
+    resolution = fig.layout.geo.resolution or 110
+    return f"{scope.replace(' ', '-')}_{int(resolution)}m"
+
+
+def write_html(fig, path, asset_dir=ASSET_DIR):
+    """fig.write_html() that links shared local assets instead of embedding plotly.js"""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    scripts = [ensure_plotlyjs(directory, asset_dir)]
+    if any(trace.type in GEO_TRACES for trace in fig.data):
+        topojson = ensure_topojson(directory, _topojson_name(fig), asset_dir)
+        if topojson is not None:
+            scripts.append(topojson)
+
+    body = fig.to_html(include_plotlyjs=False, full_html=False)
+    tags = "\n".join(f'<script charset="utf-8" src="{src}"></script>' for src in scripts)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(PAGE_TEMPLATE.format(scripts=tags, body=body))
+    return path
+
+
+def prevalence_views(long_df, entity='Entity', code='Code', year='Year', value=None):
+    """Build the selectable map views from long-format data
+
+    Returns:
+        (wide, views) where wide has one row per country and views is a list of
+        dicts with label, values, colorscale and color range
+    """
+    if value is None:
+        value = [c for c in long_df.columns if c not in (entity, code, year)][0]
+    data = long_df.dropna(subset=[code])
+    wide = data.pivot_table(index=[code, entity], columns=year, values=value, aggfunc='first')
+    wide.columns = [str(c) for c in wide.columns]
+    years = sorted(wide.columns, key=lambda c: float(c))
+    wide = wide[years].reset_index()
+
+    # One colour range for all years so the maps are comparable
+    low = float(np.nanmin(wide[years].to_numpy()))
+    high = float(np.nanmax(wide[years].to_numpy()))
+    views = [{'label': f'Prevalence {y}', 'values': wide[y], 'colorscale': 'Reds',
+              'zmin': low, 'zmax': high, 'colorbar': '%'} for y in years]
+
+    if len(years) >= 2:
+        first, last = years[0], years[-1]
+        change = wide[last] - wide[first]
+        percent = change / wide[first] * 100
+        for label, series, unit in [(f'Change {first}-{last}', change, 'pp'),
+                                    (f'Percent change {first}-{last}', percent, '%')]:
+            bound = float(np.nanmax(np.abs(series.replace([np.inf, -np.inf], np.nan))))
+            views.append({'label': label, 'values': series, 'colorscale': 'RdYlGn_r',
+                          'zmin': -bound, 'zmax': bound, 'colorbar': unit})
+    return wide, views
+
+
+def prevalence_map(long_df, title='Global Diabetes Prevalence', entity='Entity', code='Code',
+                   year='Year', value=None):
+    """Single choropleth figure with a dropdown over years and change metrics"""
+    wide, views = prevalence_views(long_df, entity, code, year, value)
+    first = views[0]
+
+    def z(view):
+        return [None if pd.isnull(v) or np.isinf(v) else round(float(v), 3)
+                for v in view['values']]
+
+    fig = go.Figure(go.Choropleth(
+        locations=wide[code],
+        text=wide[entity],
+        z=z(first),
+        zmin=first['zmin'],
+        zmax=first['zmax'],
+        colorscale=first['colorscale'],
+        colorbar_title=first['colorbar'],
+        hovertemplate='%{text}<br>%{z}<extra></extra>',
+    ))
+
+    buttons = [{
+        'label': view['label'],
+        'method': 'update',
+        'args': [
+            {'z': [z(view)], 'zmin': [view['zmin']], 'zmax': [view['zmax']],
+             'colorscale': [view['colorscale']], 'colorbar.title.text': [view['colorbar']]},
+            {'title.text': f"{title} - {view['label']}"},
+        ],
+    } for view in views]
+
+    fig.update_layout(
+        title_text=f"{title} - {first['label']}",
+        geo={'showframe': False, 'projection_type': 'natural earth'},
+        updatemenus=[{'buttons': buttons, 'direction': 'down', 'x': 0.0, 'y': 1.08,
+                      'xanchor': 'left', 'yanchor': 'top', 'showactive': True}],
+        margin={'l': 0, 'r': 0, 't': 60, 'b': 0},
+    )
+    return fig
+
+
+def write_prevalence_map(long_df, path, title='Global Diabetes Prevalence', **columns):
+    """Write the combined prevalence map to `path` and return the figure"""
+    fig = prevalence_map(long_df, title=title, **columns)
+    write_html(fig, path)
+    return fig
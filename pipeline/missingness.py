@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Missingness patterns from aggregates instead of row-level plots.
+
+isnull().sum() gives the nulls per column but not which columns go missing
+together, and a missingno matrix plot draws every row, which is slow and
+unreadable beyond a few thousand rows. Here each row's null pattern is
+encoded as one integer (bit j set = column j is null) and the distinct
+patterns are counted with np.bincount. Everything else is computed from that
+small pattern table, never from the rows again:
+  - nulls per column (the isnull().sum() table)
+  - pairwise null co-occurrence: one matrix product of the pattern bits
+    weighted by the pattern counts (diagonal = nulls per column)
+  - P(column j null | column i null), from the co-occurrence matrix
+  - a compact chart: one line per pattern (the columns it misses) next to a
+    bar of how many rows have it
+
+Encoding is one np.packbits pass over the isnull mask and counting one
+bincount, tens of milliseconds per million rows; everything after that
+depends only on the number of distinct patterns. CSV files are read in chunks, and summaries of chunks
+(or workers) can be merged.
+
+Example:
+    from pipeline.missingness import MissingnessSummary
+
+    summary = MissingnessSummary.from_frame(df)
+    summary.patterns(top=10)       # most frequent null patterns
+    summary.cooccurrence()         # rows where both columns are null
+    summary.plot()                 # Figure; save with render.savefig()
+
+Usage:
+    python -m pipeline.missingness <input_csv> [figure_path] [top]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+from pipeline.labels import read_csv
+from pipeline.query import DEFAULT_CHUNKSIZE
+
+
+# Row codes below 2**20 are counted with np.bincount, larger ones with np.unique
+MAX_BINCOUNT_BITS = 20
+# Bits of the per-row pattern code
+MAX_COLUMNS = 64
+TOP_PATTERNS = 15
+
+
+class MissingnessSummary:
+    """Counts of the distinct row null patterns over a fixed set of columns
+
+    Args:
+        columns: Columns to summarize, in order (bit j of a pattern = columns[j])
+        zero_missing: Columns where 0 also means missing (e.g. the raw Pima file)
+    """
+
+    def __init__(self, columns, zero_missing=()):
+        if len(columns) > MAX_COLUMNS:
+            raise ValueError(f"At most {MAX_COLUMNS} columns can be encoded per row, "
+                             f"got {len(columns)}")
+        self.columns = list(columns)
+        self.zero_missing = [c for c in zero_missing if c in self.columns]
+        self.n = 0
+        self.counts = {}        # pattern code -> rows
+
+    @classmethod
+    def from_frame(cls, df, columns=None, zero_missing=()):
+        """Summary of a DataFrame (default: all of its columns)"""
+        return cls(df.columns if columns is None else columns, zero_missing).update(df)
+
+    def _nulls(self, chunk):
+        if list(chunk.columns) != self.columns:
+            chunk = chunk[self.columns]
+        nulls = chunk.isna().to_numpy()
+        for name in self.zero_missing:
+            j = self.columns.index(name)
+            nulls[:, j] |= (chunk[name] == 0).to_numpy()
+        return nulls
+
+    def update(self, chunk):
+        """Add the rows of one DataFrame chunk"""
+        nulls = self._nulls(chunk)
+        rows = len(nulls)
+        self.n += rows
+
+        # Row codes: the null flags packed little-endian (column j at bit j),
+        # padded to the next unsigned integer width
+        packed = np.packbits(nulls, axis=1, bitorder='little')
+        width = next(w for w in (1, 2, 4, 8) if w >= packed.shape[1])
+        if width != packed.shape[1]:
+            packed = np.pad(packed, ((0, 0), (0, width - packed.shape[1])))
+        codes = np.ascontiguousarray(packed).view(f'<u{width}').ravel()
+
+        # Small codes (nulls only in the first columns, or none at all) are
+        # counted with bincount; otherwise the distinct codes are sorted out
+        if int(np.bitwise_or.reduce(codes)) < 1 << MAX_BINCOUNT_BITS:
+            counts = np.bincount(codes)
+            codes = np.flatnonzero(counts)
+            counts = counts[codes]
+        else:
+            codes, counts = np.unique(codes, return_counts=True)
+        for code, count in zip(codes.tolist(), counts.tolist()):
+            self.counts[code] = self.counts.get(code, 0) + count
+        return self
+
+    def merge(self, other):
+        """Add the counts of a summary over the same columns"""
+        if other.columns != self.columns:
+            raise ValueError("Only summaries over the same columns can be merged")
+        self.n += other.n
+        for code, count in other.counts.items():
+            self.counts[code] = self.counts.get(code, 0) + count
+        return self
+
+    def _bits(self):
+        """(pattern bit matrix, pattern counts), most frequent pattern first"""
+        codes = sorted(self.counts, key=lambda code: (-self.counts[code], code))
+        bits = np.array([[code >> j & 1 for j in range(len(self.columns))] for code in codes],
+                        dtype=np.int64).reshape(len(codes), len(self.columns))
+        counts = np.array([self.counts[code] for code in codes], dtype=np.int64)
+        return bits, counts
+
+    def column_nulls(self):
+        """Nulls per column, as isnull().sum() would report them"""
+        bits, counts = self._bits()
+        return pd.Series(counts @ bits, index=self.columns, name='nulls')
+
+    def cooccurrence(self):
+        """Rows where both columns are null (diagonal: nulls per column)"""
+        bits, counts = self._bits()
+        matrix = (bits * counts[:, None]).T @ bits
+        return pd.DataFrame(matrix, index=self.columns, columns=self.columns)
+
+    def conditional(self):
+        """P(column null | row column null): co-occurrence divided by the row's nulls"""
+        matrix = self.cooccurrence()
+        nulls = np.diag(matrix.to_numpy()).astype(float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return matrix.div(np.where(nulls > 0, nulls, np.nan), axis=0)
+
+    def patterns(self, top=None, columns='missing'):
+        """One row per null pattern with its row count and share, most frequent first
+
+        Args:
+            top: Only the `top` most frequent patterns
+            columns: 'missing' to list only columns that have nulls, 'all' for every column
+        """
+        bits, counts = self._bits()
+        keep = bits.any(axis=0) if columns == 'missing' else np.ones(len(self.columns), bool)
+        table = pd.DataFrame(bits[:, keep].astype(bool),
+                             columns=[c for c, k in zip(self.columns, keep) if k])
+        table.insert(0, 'missing', bits.sum(axis=1))
+        table['rows'] = counts
+        table['share'] = counts / self.n if self.n else np.nan
+        return table.head(top) if top else table
+
+    def complete_rows(self):
+        """Rows without any null in the summarized columns"""
+        return self.counts.get(0, 0)
+
+    def plot(self, top=TOP_PATTERNS, fig=None):
+        """Compact pattern chart: pattern grid (left) and rows per pattern (right)
+
+        Only columns with nulls are drawn; their null share is in the tick
+        labels. Returns a matplotlib Figure (not registered with pyplot).
+        """
+        table = self.patterns(top=top)
+        names = [c for c in table.columns if c not in ('missing', 'rows', 'share')]
+        nulls = self.column_nulls()
+        height = 1.2 + 0.3 * len(table)
+        fig = fig or Figure(figsize=(max(6, 0.6 * len(names) + 4), height), layout='constrained')
+        grid_ax, bar_ax = fig.subplots(1, 2, sharey=True,
+                                       gridspec_kw={'width_ratios': [max(len(names), 1), 3]})
+
+        grid = table[names].to_numpy(dtype=float) if names else np.zeros((len(table), 1))
+        grid_ax.imshow(grid, aspect='auto', cmap='Greys', vmin=0, vmax=1.4,
+                       interpolation='nearest')
+        grid_ax.set_xticks(range(len(names)))
+        grid_ax.set_xticklabels([f'{name} ({nulls[name] / self.n:.1%})' for name in names],
+                                rotation=60, ha='right', fontsize=8)
+        grid_ax.set_yticks(range(len(table)))
+        grid_ax.set_yticklabels(table['missing'].astype(str) + ' missing', fontsize=8)
+        grid_ax.set_xticks(np.arange(-0.5, len(names)), minor=True)
+        grid_ax.set_yticks(np.arange(-0.5, len(table)), minor=True)
+        grid_ax.grid(which='minor', color='white', linewidth=1)
+        grid_ax.tick_params(which='minor', length=0)
+
+        bar_ax.barh(range(len(table)), table['rows'], color='steelblue')
+        for y, (rows, share) in enumerate(zip(table['rows'], table['share'])):
+            bar_ax.text(rows, y, f' {rows:,} ({share:.1%})', va='center', fontsize=8)
+        bar_ax.set_xlabel('Rows')
+        bar_ax.margins(x=0.35)
+        bar_ax.grid(True, axis='x')
+
+        fig.suptitle(f'Missingness patterns: top {len(table)} of {len(self.counts)} '
+                     f'({self.n:,} rows, {self.complete_rows() / self.n:.1%} complete)'
+                     if self.n else 'Missingness patterns (no rows)', fontsize=10)
+        return fig
+
+    def __repr__(self):
+        return (f"MissingnessSummary({len(self.columns)} columns, {self.n:,} rows, "
+                f"{len(self.counts)} pattern(s))")
+
+
+def missingness_csv(path, columns=None, zero_missing=(), chunksize=DEFAULT_CHUNKSIZE,
+                    **read_options):
+    """MissingnessSummary of a CSV file, read in chunks"""
+    summary = None
+    for chunk in read_csv(path, usecols=columns, chunksize=chunksize, **read_options):
+        if summary is None:
+            summary = MissingnessSummary(chunk.columns if columns is None else columns,
+                                         zero_missing)
+        summary.update(chunk)
+    if summary is None:
+        summary = MissingnessSummary(pd.read_csv(path, usecols=columns, nrows=0,
+                                                 **read_options).columns, zero_missing)
+    return summary
+
+
+def main():
+    """Print the null patterns of a CSV file and optionally save the pattern chart"""
+    if len(sys.argv) < 2 or len(sys.argv) > 4:
+        print("Usage: python -m pipeline.missingness <input_csv> [figure_path] [top]")
+        sys.exit(1)
+
+    input_file = sys.argv[1]
+    figure_path = sys.argv[2] if len(sys.argv) > 2 else None
+    try:
+        top = int(sys.argv[3]) if len(sys.argv) > 3 else TOP_PATTERNS
+        start = time.perf_counter()
+        summary = missingness_csv(input_file)
+        seconds = time.perf_counter() - start
+    except FileNotFoundError:
+        print(f"✗ Error: File '{input_file}' not found")
+        sys.exit(1)
+    except (KeyError, ValueError) as e:
+        print(f"✗ Error: {e}")
+        sys.exit(1)
+
+    print(f"✓ {summary} in {seconds:.2f}s")
+    nulls = summary.column_nulls()
+    nulls = nulls[nulls > 0]
+    if nulls.empty:
+        print("  No missing values")
+        return
+    print("\nNulls per column:")
+    print(nulls.to_string())
+    print(f"\nTop {top} null patterns:")
+    print(summary.patterns(top=top).to_string(index=False))
+    print("\nNull co-occurrence:")
+    print(summary.cooccurrence().loc[nulls.index, nulls.index].to_string())
+
+    if figure_path:
+        from pipeline import render
+        path = render.savefig(figure_path, fig=summary.plot(top=top))
+        print(f"\n✓ Pattern chart saved to: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Concurrent refresh of the per-dataset pipelines under a memory budget.
+
+The refresh is declared as a dependency graph instead of one long script:
+
+    inspect:pima  -> clean:pima  --.
+    inspect:brfss -> clean:brfss ---+-> eda
+    inspect:world -> clean:world --'
+
+  - inspect:<dataset>  profile report of the raw file (pipeline.profile)
+  - clean:<dataset>    the dataset's notebook (pima / indicator / world.ipynb),
+                       which cleans the data and adds the engineered features
+  - eda                eda.ipynb on the three cleaned outputs
+
+Independent branches run concurrently in worker processes. A task is started
+only when its dependencies finished and its estimated memory fits: the
+estimates of the running tasks plus the new one must stay within the budget
+(by default a fraction of the RAM available at start, from psutil), and the
+new one must fit into the RAM available right now. A task larger than the
+whole budget still runs, but alone. Ready tasks are started longest remaining
+branch first, so the refresh takes about as long as its longest branch.
+Seconds recorded by the previous refresh in the same output directory are
+used as the branch lengths; before that, input file sizes are.
+
+If a task fails, the tasks that depend on it are skipped and the other
+branches carry on. summary.csv in the output directory records status, start,
+end and memory estimate per task.
+
+Example:
+    from pipeline.orchestrate import default_tasks, run_graph
+
+    tasks = default_tasks(datasets=['pima', 'world'])
+    summary = run_graph(tasks, workers=3, memory_budget=4 * 2**30)
+
+Usage:
+    python -m pipeline.orchestrate plan|run [output_dir] [workers] [memory_budget_mb]
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+import psutil
+
+
+DEFAULT_OUTPUT_DIR = os.path.join('runs', 'refresh')
+# Share of the RAM available at start that running tasks may reserve
+MEMORY_FRACTION = 0.8
+# Estimates: fixed process / kernel overhead plus a multiple of the input size
+KERNEL_BYTES = 300 * 2**20
+NOTEBOOK_FACTOR = 10         # pandas frames, copies and figures of a notebook
+PROFILE_BYTES = 200 * 2**20  # streaming profile, one chunk per worker
+
+# dataset: (notebook, raw input, cleaned output), paths relative to the repository
+DATASETS = {
+    'pima': ('pima.ipynb', os.path.join('raw', 'pima_diabetes.csv'),
+             os.path.join('new', 'pima.csv')),
+    'brfss': ('indicator.ipynb', os.path.join('raw', 'diabetes_binary_health_indicators_BRFSS2015.csv'),
+              os.path.join('new', 'indicator.csv')),
+    'world': ('world.ipynb', os.path.join('raw', 'world_diabetes.csv'),
+              os.path.join('new', 'world.csv')),
+}
+EDA_PARAMETERS = {'pima': 'pima_file', 'brfss': 'indicator_file', 'world': 'world_file'}
+
+
+class Task:
+    """One node of the refresh graph
+
+    Args:
+        name: Unique task name, e.g. 'clean:pima'
+        func: Picklable module-level function; returns a dict with at least
+            'status' ('ok' or 'failed') and 'error'
+        args: Arguments for func
+        deps: Names of the tasks that must finish first
+        memory: Estimated peak memory in bytes
+        cost: Relative run time, used to start the longest branch first
+        dataset: Dataset the task belongs to (for the summary)
+        stage: 'inspect', 'clean', 'eda', ...
+    """
+
+    def __init__(self, name, func, args=(), deps=(), memory=0, cost=1.0, dataset=None, stage=None):
+        self.name = name
+        self.func = func
+        self.args = tuple(args)
+        self.deps = tuple(deps)
+        self.memory = int(memory)
+        self.cost = float(cost)
+        self.dataset = dataset
+        self.stage = stage
+
+    def __repr__(self):
+        deps = f", after {', '.join(self.deps)}" if self.deps else ''
+        return f"Task({self.name!r}, {self.memory / 2**20:,.0f} MB{deps})"
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def inspect_task(input_file, report_file):
+    """Profile a raw file and write the summary report"""
+    from pipeline.profile import profile_csv, render_report
+
+    try:
+        profile = profile_csv(input_file, workers=1)
+        target = next((c for c in ('Diabetes_binary', 'Outcome') if c in profile.columns), None)
+        os.makedirs(os.path.dirname(report_file) or '.', exist_ok=True)
+        with open(report_file, 'w') as f:
+            f.write(render_report(profile, os.path.basename(input_file), target=target))
+    except (OSError, KeyError, ValueError) as e:
+        return {'status': 'failed', 'error': f'{type(e).__name__}: {e}', 'output': None}
+    return {'status': 'ok', 'error': None, 'output': report_file}
+
+
+def notebook_task(variant, output_dir):
+    """Execute a notebook variant (see pipeline.batch.run_notebook)"""
+    from pipeline.batch import run_notebook
+
+    result = run_notebook(variant, output_dir)
+    return {'status': result['status'], 'error': result['error'], 'output': result['output']}
+
+
+def default_tasks(root='.', output_dir=DEFAULT_OUTPUT_DIR, datasets=None, new_dir='new',
+                  figures_dir='Figures', previous=None):
+    """The inspect -> clean -> eda graph for the datasets in DATASETS
+
+    Args:
+        root: Repository directory (notebooks and raw/)
+        output_dir: Directory for reports, executed notebooks and summary.csv
+        datasets: Datasets to refresh (default: all). eda reads the cleaned
+            files of the others as they are.
+        new_dir: Directory the cleaned outputs are written to (relative to root)
+        figures_dir: Directory eda.ipynb saves figures to (relative to root)
+        previous: {task name: seconds} from an earlier refresh (default: read
+            from <output_dir>/summary.csv if it exists)
+    """
+    datasets = list(datasets or DATASETS)
+    unknown = [name for name in datasets if name not in DATASETS]
+    if unknown:
+        raise ValueError(f"Unknown dataset(s): {', '.join(unknown)}. Use: {', '.join(DATASETS)}")
+    if previous is None:
+        previous = previous_seconds(output_dir)
+    notebooks_dir = os.path.join(output_dir, 'notebooks')
+
+    tasks = []
+    cleaned = {}
+    for dataset, (notebook, raw_file, clean_file) in DATASETS.items():
+        clean_file = os.path.join(root, new_dir, os.path.basename(clean_file))
+        cleaned[dataset] = os.path.abspath(clean_file)
+        if dataset not in datasets:
+            continue
+        raw_file = os.path.abspath(os.path.join(root, raw_file))
+        size = _file_size(raw_file)
+        inspect_name, clean_name = f'inspect:{dataset}', f'clean:{dataset}'
+        tasks.append(Task(inspect_name, inspect_task,
+                          (raw_file, os.path.join(output_dir, f'{dataset}_profile.txt')),
+                          memory=PROFILE_BYTES, cost=previous.get(inspect_name, size),
+                          dataset=dataset, stage='inspect'))
+        variant = {'notebook': os.path.join(root, notebook), 'name': dataset,
+                   'parameters': {'input_file': raw_file, 'output_file': cleaned[dataset]}}
+        tasks.append(Task(clean_name, notebook_task, (variant, notebooks_dir), deps=[inspect_name],
+                          memory=KERNEL_BYTES + NOTEBOOK_FACTOR * size,
+                          cost=previous.get(clean_name, NOTEBOOK_FACTOR * size),
+                          dataset=dataset, stage='clean'))
+
+    parameters = {EDA_PARAMETERS[dataset]: path for dataset, path in cleaned.items()}
+    parameters['figures_dir'] = os.path.abspath(os.path.join(root, figures_dir))
+    inputs = sum(_file_size(os.path.join(root, raw)) for _, raw, _ in DATASETS.values())
+    variant = {'notebook': os.path.join(root, 'eda.ipynb'), 'name': 'eda', 'parameters': parameters}
+    tasks.append(Task('eda', notebook_task, (variant, notebooks_dir),
+                      deps=[f'clean:{dataset}' for dataset in datasets],
+                      memory=KERNEL_BYTES + NOTEBOOK_FACTOR * inputs,
+                      cost=previous.get('eda', NOTEBOOK_FACTOR * inputs), stage='eda'))
+    return tasks
+
+
+def previous_seconds(output_dir):
+    """{task name: seconds} of the successful tasks in an earlier summary.csv"""
+    path = os.path.join(output_dir, 'summary.csv')
+    if not os.path.exists(path):
+        return {}
+    summary = pd.read_csv(path)
+    done = summary[summary['status'] == 'ok']
+    return dict(zip(done['name'], done['seconds']))
+
+
+def topological_order(tasks):
+    """Task names with every task after its dependencies; raises on cycles"""
+    by_name = {task.name: task for task in tasks}
+    if len(by_name) != len(tasks):
+        raise ValueError("Task names must be unique")
+    for task in tasks:
+        missing = [dep for dep in task.deps if dep not in by_name]
+        if missing:
+            raise KeyError(f"Task '{task.name}' depends on unknown task(s): {', '.join(missing)}")
+
+    order, state = [], {}
+
+    def visit(name, path):
+        if state.get(name) == 'done':
+            return
+        if state.get(name) == 'visiting':
+            raise ValueError(f"Dependency cycle: {' -> '.join(path + [name])}")
+        state[name] = 'visiting'
+        for dep in by_name[name].deps:
+            visit(dep, path + [name])
+        state[name] = 'done'
+        order.append(name)
+
+    for task in tasks:
+        visit(task.name, [])
+    return order
+
+
+def critical_path(tasks):
+    """{task name: cost of the task plus its longest chain of dependents}"""
+    by_name = {task.name: task for task in tasks}
+    dependents = {task.name: [] for task in tasks}
+    for task in tasks:
+        for dep in task.deps:
+            dependents[dep].append(task.name)
+    remaining = {}
+    for name in reversed(topological_order(tasks)):
+        remaining[name] = by_name[name].cost + max((remaining[d] for d in dependents[name]),
+                                                   default=0.0)
+    return remaining
+
+
+def _run_task(func, args):
+    started = time.time()
+    try:
+        result = func(*args)
+    except Exception as e:  # a failing task must not stop the other branches
+        result = {'status': 'failed', 'error': f'{type(e).__name__}: {e}', 'output': None}
+    result['seconds'] = round(time.time() - started, 2)
+    return result
+
+
+def run_graph(tasks, workers=None, memory_budget=None, output_dir=DEFAULT_OUTPUT_DIR):
+    """Run a task graph concurrently within a memory budget
+
+    Args:
+        tasks: list of Task
+        workers: Worker processes (default: CPU count, 1 = in-process, one task at a time)
+        memory_budget: Bytes the running tasks' estimates may add up to
+            (default: MEMORY_FRACTION of the RAM available now)
+        output_dir: Directory for summary.csv
+
+    Returns:
+        DataFrame with one row per task: name, dataset, stage, status,
+        seconds, start, end (seconds since the refresh started),
+        memory_mb (estimate), output and error
+    """
+    order = topological_order(tasks)
+    by_name = {task.name: task for task in tasks}
+    priority = critical_path(tasks)
+    workers = workers or os.cpu_count() or 1
+    if memory_budget is None:
+        memory_budget = int(psutil.virtual_memory().available * MEMORY_FRACTION)
+
+    results = {}
+    pending = list(order)
+    running = {}      # future -> (task, start)
+    started = time.time()
+
+    def record(task, result, start):
+        results[task.name] = {'name': task.name, 'dataset': task.dataset, 'stage': task.stage,
+                              'status': result['status'], 'seconds': result.get('seconds'),
+                              'start': round(start - started, 2) if start else None,
+                              'end': round(time.time() - started, 2) if start else None,
+                              'memory_mb': round(task.memory / 2**20),
+                              'output': result.get('output'), 'error': result.get('error')}
+        mark = {'ok': '✓', 'skipped': '-'}.get(result['status'], '✗')
+        took = f", {result['seconds']}s" if result.get('seconds') is not None else ''
+        print(f"  {mark} {task.name} ({result['status']}{took})")
+
+    def admit(task):
+        if not running:
+            return True   # nothing to wait for; a task over budget runs alone
+        reserved = sum(t.memory for t, _ in running.values())
+        return (len(running) < workers and reserved + task.memory <= memory_budget
+                and task.memory <= psutil.virtual_memory().available * MEMORY_FRACTION)
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        while pending or running:
+            # Skip tasks whose dependencies failed; start ready ones, longest branch first
+            for name in list(pending):
+                failed = [d for d in by_name[name].deps
+                          if d in results and results[d]['status'] != 'ok']
+                if failed:
+                    pending.remove(name)
+                    record(by_name[name], {'status': 'skipped',
+                                           'error': f"dependency failed: {', '.join(failed)}"}, None)
+            ready = sorted((name for name in pending
+                            if all(d in results for d in by_name[name].deps)),
+                           key=lambda name: -priority[name])
+            for name in ready:
+                task = by_name[name]
+                if not admit(task):
+                    continue
+                pending.remove(name)
+                if pool is None:
+                    start = time.time()
+                    record(task, _run_task(task.func, task.args), start)
+                    break
+                running[pool.submit(_run_task, task.func, task.args)] = (task, time.time())
+            if pool is None or not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                task, start = running.pop(future)
+                record(task, future.result(), start)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    summary = pd.DataFrame([results[name] for name in order])
+    os.makedirs(output_dir, exist_ok=True)
+    summary.to_csv(os.path.join(output_dir, 'summary.csv'), index=False)
+    return summary
+
+
+def main():
+    """Print the refresh graph, or run it"""
+    usage = "Usage: python -m pipeline.orchestrate plan|run [output_dir] [workers] [memory_budget_mb]"
+    if len(sys.argv) < 2 or len(sys.argv) > 5 or sys.argv[1] not in ('plan', 'run'):
+        print(usage)
+        sys.exit(1)
+
+    output_dir = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_OUTPUT_DIR
+    try:
+        workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+        budget = int(float(sys.argv[4]) * 2**20) if len(sys.argv) > 4 else None
+        tasks = default_tasks(output_dir=output_dir)
+        priority = critical_path(tasks)
+    except (KeyError, ValueError) as e:
+        print(f"✗ Error: {e}")
+        sys.exit(1)
+
+    if sys.argv[1] == 'plan':
+        by_name = {task.name: task for task in tasks}
+        print(f"✓ {len(tasks)} task(s), longest branch first within each wave")
+        for name in topological_order(tasks):
+            task = by_name[name]
+            after = ', '.join(task.deps) or '-'
+            print(f"  {name:<14} after {after:<45} ~{task.memory / 2**20:>7,.0f} MB  "
+                  f"branch {priority[name]:,.0f}")
+        return
+
+    available = psutil.virtual_memory().available
+    print(f"Running {len(tasks)} task(s) -> {output_dir}/ "
+          f"(budget {(budget or available * MEMORY_FRACTION) / 2**20:,.0f} MB)")
+    started = time.perf_counter()
+    summary = run_graph(tasks, workers, budget, output_dir)
+    elapsed = time.perf_counter() - started
+    print("\n" + summary.drop(columns=['output']).to_string(index=False))
+    failed = int((summary['status'] != 'ok').sum())
+    if failed:
+        print(f"\n✗ {failed} of {len(summary)} task(s) failed or skipped ({elapsed:.1f}s)")
+        sys.exit(1)
+    print(f"\n✅ Refresh finished in {elapsed:.1f}s - summary: {os.path.join(output_dir, 'summary.csv')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Streaming robust outlier scores for the Pima and BRFSS clinical measurements.
+
+Rows are flagged, never dropped. Every row gets:
+  - Outlier_Score: robust Mahalanobis distance of its measurements
+  - Outlier_Flag: 1 if that distance is beyond the chi-square cutoff, or any
+    single measurement is more than z_cutoff robust standard deviations from
+    the median (robust z = (x - median) / (IQR / 1.349))
+
+The robust location and covariance are estimated in four streaming passes
+over the data, each linear in the number of rows with one chunk in memory:
+  1. quantile sketches (pipeline.profile) give each column's median and IQR
+  2. mean and covariance of the rows whose robust z is within `trim` in
+     every column (a coordinate-wise trimmed estimate)
+  3. median squared distance under that estimate, to rescale it to the
+     chi-square distribution of clean Gaussian data
+  4. mean and covariance of the rows within the 97.5% chi-square cutoff
+     (one reweighting step, as done after the MCD estimator), with the usual
+     consistency factor
+Missing measurements count as the median (they add nothing to the distance).
+Pima stores missing Glucose / BloodPressure / BMI / ... as 0; pass them as
+`zero_missing` when scoring the raw file.
+
+Example:
+    from pipeline.outliers import OutlierDetector, PIMA_COLUMNS
+
+    detector = OutlierDetector(PIMA_COLUMNS).fit(df_cleaned)
+    df_cleaned[['Outlier_Score', 'Outlier_Flag']] = detector.score(df_cleaned)
+    print(detector.summary())
+
+Usage:
+    python -m pipeline.outliers <pima|brfss> <input_csv> [output_csv] [model_json]
+"""
+
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from pipeline.profile import MomentSketch, QuantileSketch
+from pipeline.query import DEFAULT_CHUNKSIZE
+from pipeline.riskmodel import iter_chunks
+from pipeline.score import append_columns
+
+
+# Continuous clinical measurements per dataset
+PIMA_COLUMNS = ['Pregnancies', 'Glucose', 'BloodPressure', 'SkinThickness', 'Insulin', 'BMI',
+                'DiabetesPedigreeFunction', 'Age']
+BRFSS_COLUMNS = ['BMI', 'MentHlth', 'PhysHlth']
+# Pima measurements where 0 means "not measured"
+PIMA_ZERO_MISSING = ['Glucose', 'BloodPressure', 'SkinThickness', 'Insulin', 'BMI']
+
+IQR_TO_SD = 1.349           # IQR of the standard normal distribution
+SKETCH_K = 1024             # quantile sketch capacity (rank error well under 1%)
+REWEIGHT_QUANTILE = 0.975
+SCORE_COLUMNS = ['Outlier_Score', 'Outlier_Flag']
+
+
+class OutlierDetector:
+    """Robust univariate and Mahalanobis outlier scores fitted on streamed chunks
+
+    Args:
+        columns: Measurement columns
+        z_cutoff: Robust z beyond which a single measurement is an outlier
+        quantile: Chi-square quantile of the squared distance beyond which a
+            row is a multivariate outlier
+        trim: Robust z beyond which a row is left out of the initial covariance
+        zero_missing: Columns where 0 means missing (e.g. PIMA_ZERO_MISSING)
+    """
+
+    def __init__(self, columns=None, z_cutoff=4.0, quantile=0.999, trim=3.0, zero_missing=()):
+        self.columns = list(columns or PIMA_COLUMNS)
+        self.z_cutoff = z_cutoff
+        self.quantile = quantile
+        self.trim = trim
+        self.zero_missing = [c for c in zero_missing if c in self.columns]
+        self.median = None
+        self.scale = None
+        self.location = None
+        self.covariance = None
+        self.rows = 0
+        self.seconds = None
+
+    def _matrix(self, frame):
+        """Float matrix of the columns with NaN for missing values"""
+        missing = [c for c in self.columns if c not in frame.columns]
+        if missing:
+            raise KeyError(f"Missing measurement columns: {', '.join(missing)}")
+        X = frame[self.columns].to_numpy(dtype=np.float64)  # always a copy
+        for position, column in enumerate(self.columns):
+            if column in self.zero_missing:
+                X[X[:, position] == 0, position] = np.nan
+        return X
+
+    def _filled(self, X):
+        """Missing values replaced by the median, so they add nothing to a distance"""
+        nan = np.isnan(X)
+        if nan.any():
+            X = np.where(nan, self.median, X)
+        return X
+
+    def _z(self, X):
+        return (X - self.median) / self.scale
+
+    def _chunks(self, data, chunksize):
+        for chunk in iter_chunks(data, self.columns, chunksize):
+            yield self._matrix(chunk)
+
+    def _moments(self, data, chunksize, keep):
+        """Mean and covariance of the rows selected by keep(X) -> bool mask"""
+        k = len(self.columns)
+        count, total, products = 0, np.zeros(k), np.zeros((k, k))
+        shift = self.median   # shifted sums keep the covariance numerically stable
+        for X in self._chunks(data, chunksize):
+            X = self._filled(X)
+            X = X[keep(X)] - shift
+            count += len(X)
+            total += X.sum(axis=0)
+            products += X.T @ X
+        if count <= k:
+            raise ValueError(f"Only {count} rows left for the covariance of {k} columns")
+        mean = total / count
+        covariance = (products - count * np.outer(mean, mean)) / (count - 1)
+        return mean + shift, covariance
+
+    def _squared_distance(self, X, location, precision):
+        centred = X - location
+        return np.einsum('ij,jk,ik->i', centred, precision, centred)
+
+    def fit(self, data, chunksize=DEFAULT_CHUNKSIZE):
+        """Estimate the robust location and covariance from `data` in four passes
+
+        Args:
+            data: DataFrame, CSV path, or callable returning DataFrame chunks
+            chunksize: Rows per chunk
+        """
+        started = time.perf_counter()
+        k = len(self.columns)
+
+        # 1. Median and IQR per column
+        sketches = [QuantileSketch(SKETCH_K) for _ in self.columns]
+        moments = [MomentSketch() for _ in self.columns]
+        rows = 0
+        for X in self._chunks(data, chunksize):
+            rows += len(X)
+            for position in range(k):
+                values = X[:, position]
+                values = values[~np.isnan(values)]
+                sketches[position].update(values)
+                moments[position].update(values)
+        if not rows:
+            raise ValueError("No rows to fit")
+        quartiles = np.array([sketch.quantiles([0.25, 0.5, 0.75]) for sketch in sketches])
+        self.median = quartiles[:, 1]
+        scale = (quartiles[:, 2] - quartiles[:, 0]) / IQR_TO_SD
+        # Columns with a zero IQR (mostly one value) fall back to the standard deviation
+        std = np.array([m.std() for m in moments])
+        scale = np.where(scale > 0, scale, np.where(std > 0, std, 1.0))
+        self.scale = np.nan_to_num(scale, nan=1.0)
+
+        # 2. Coordinate-wise trimmed estimate
+        location, covariance = self._moments(
+            data, chunksize, lambda X: (np.abs(self._z(X)) <= self.trim).all(axis=1))
+
+        # 3. Rescale so the median squared distance matches the chi-square median
+        precision = np.linalg.pinv(covariance)
+        sketch = QuantileSketch(SKETCH_K)
+        for X in self._chunks(data, chunksize):
+            sketch.update(self._squared_distance(self._filled(X), location, precision))
+        covariance = covariance * sketch.quantiles([0.5])[0] / stats.chi2.ppf(0.5, k)
+
+        # 4. One reweighting step with the consistency factor of the cutoff
+        precision = np.linalg.pinv(covariance)
+        cutoff = stats.chi2.ppf(REWEIGHT_QUANTILE, k)
+        self.location, covariance = self._moments(
+            data, chunksize,
+            lambda X: self._squared_distance(X, location, precision) <= cutoff)
+        self.covariance = covariance * REWEIGHT_QUANTILE / stats.chi2.cdf(cutoff, k + 2)
+        self.rows = rows
+        self.seconds = time.perf_counter() - started
+        return self
+
+    def _check_fitted(self):
+        if self.covariance is None:
+            raise ValueError("Detector is not fitted; call fit() or OutlierDetector.load()")
+
+    def robust_z(self, frame):
+        """(x - median) / robust SD for every measurement (NaN where missing)"""
+        self._check_fitted()
+        return pd.DataFrame(self._z(self._matrix(frame)), index=frame.index, columns=self.columns)
+
+    def score(self, frame):
+        """DataFrame with Outlier_Score and Outlier_Flag for every row"""
+        self._check_fitted()
+        X = self._matrix(frame)
+        squared = self._squared_distance(self._filled(X), self.location,
+                                         np.linalg.pinv(self.covariance))
+        extreme = (np.abs(np.nan_to_num(self._z(X))) > self.z_cutoff).any(axis=1)
+        flag = (squared > stats.chi2.ppf(self.quantile, len(self.columns))) | extreme
+        return pd.DataFrame({'Outlier_Score': np.sqrt(np.maximum(squared, 0)),
+                             'Outlier_Flag': flag.astype(np.int8)}, index=frame.index)
+
+    def summary(self):
+        """Median, robust SD and robust location / SD per column"""
+        self._check_fitted()
+        return pd.DataFrame({
+            'column': self.columns,
+            'median': self.median,
+            'robust_sd': self.scale,
+            'location': self.location,
+            'sd': np.sqrt(np.diag(self.covariance)),
+            'low': self.median - self.z_cutoff * self.scale,
+            'high': self.median + self.z_cutoff * self.scale,
+        })
+
+    def to_dict(self):
+        self._check_fitted()
+        return {
+            'columns': self.columns,
+            'z_cutoff': self.z_cutoff,
+            'quantile': self.quantile,
+            'trim': self.trim,
+            'zero_missing': self.zero_missing,
+            'median': self.median.tolist(),
+            'scale': self.scale.tolist(),
+            'location': self.location.tolist(),
+            'covariance': self.covariance.tolist(),
+            'rows': self.rows,
+        }
+
+    def save(self, path):
+        """Write the fitted estimates as JSON"""
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """Detector saved with save()"""
+        with open(path) as f:
+            spec = json.load(f)
+        detector = cls(spec['columns'], z_cutoff=spec['z_cutoff'], quantile=spec['quantile'],
+                       trim=spec['trim'], zero_missing=spec['zero_missing'])
+        detector.median = np.array(spec['median'])
+        detector.scale = np.array(spec['scale'])
+        detector.location = np.array(spec['location'])
+        detector.covariance = np.array(spec['covariance'])
+        detector.rows = spec['rows']
+        return detector
+
+    def __repr__(self):
+        state = f"fitted on {self.rows:,} rows" if self.covariance is not None else 'unfitted'
+        return f"OutlierDetector({len(self.columns)} columns, {state})"
+
+
+def default_detector(dataset, columns):
+    """Detector over the measurement columns of 'pima' or 'brfss' present in `columns`"""
+    if dataset == 'pima':
+        return OutlierDetector([c for c in PIMA_COLUMNS if c in columns],
+                               zero_missing=PIMA_ZERO_MISSING)
+    if dataset == 'brfss':
+        return OutlierDetector([c for c in BRFSS_COLUMNS if c in columns])
+    raise ValueError(f"Unknown dataset '{dataset}'. Use 'pima' or 'brfss'")
+
+
+def flag_csv(source, target, detector, chunksize=DEFAULT_CHUNKSIZE):
+    """Append Outlier_Score / Outlier_Flag to every row of a CSV, chunk by chunk
+
+    Only the measurement columns are parsed; every input line is written back
+    unchanged with the two columns appended (pipeline.score.append_columns),
+    so records must be one per line.
+
+    Returns:
+        (rows, flagged)
+    """
+    flagged = 0
+
+    def compute(chunk):
+        nonlocal flagged
+        scores = detector.score(chunk)
+        scores['Outlier_Score'] = scores['Outlier_Score'].round(4)
+        flagged += int(scores['Outlier_Flag'].sum())
+        return scores
+
+    rows, _ = append_columns(source, target, SCORE_COLUMNS, compute, detector.columns, chunksize)
+    return rows, flagged
+
+
+def main():
+    """Fit a detector on a CSV, print the estimates and optionally write the flagged rows"""
+    usage = "Usage: python -m pipeline.outliers <pima|brfss> <input_csv> [output_csv] [model_json]"
+    if len(sys.argv) < 3 or len(sys.argv) > 5:
+        print(usage)
+        sys.exit(1)
+
+    dataset, input_file = sys.argv[1], sys.argv[2]
+    try:
+        header = pd.read_csv(input_file, nrows=0).columns
+        detector = default_detector(dataset, header).fit(input_file)
+        print(f"✓ Fitted {detector} in {detector.seconds:.2f}s")
+        print(detector.summary().round(3).to_string(index=False))
+        if len(sys.argv) > 4:
+            detector.save(sys.argv[4])
+            print(f"✓ Saved estimates to {sys.argv[4]}")
+        if len(sys.argv) > 3:
+            started = time.perf_counter()
+            rows, flagged = flag_csv(input_file, sys.argv[3], detector)
+            print(f"✓ Flagged {flagged:,} of {rows:,} rows ({flagged / max(rows, 1):.2%}) "
+                  f"-> {sys.argv[3]} ({time.perf_counter() - started:.2f}s)")
+    except FileNotFoundError as e:
+        print(f"✗ Error: File '{e.filename}' not found")
+        sys.exit(1)
+    except (KeyError, ValueError) as e:
+        print(f"✗ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+Partitioned multi-year BRFSS dataset with partition pruning.
+
+Each survey year (and optionally a second key such as Sex) is stored as its
+own CSV file under a hive-style directory layout:
+
+    data/brfss/
+        manifest.json
+        year=2014/part-00000.csv
+        year=2015/part-00000.csv
+        ...
+
+or, partitioned by year and Sex, year=2015/Sex=0/part-00000.csv (rows with a
+missing Sex go to Sex=__null__). Partition key values live in the directory
+names, not in the files. manifest.json records, for every partition, its key
+values, row count and per-column min/max/null count. Label columns (pipeline.labels) are stored as integer
+codes with their dictionaries next to each part file and in the manifest,
+and come back as ordered categoricals when scanned.
+
+Queries use the lazy query layer (pipeline.query). Before anything is read,
+each filter predicate is checked against the manifest and partitions that
+cannot contain a matching row are skipped. A query restricted to 2015 only
+opens the 2015 files. Row counts that only need partition keys are answered
+from the manifest without reading any file. Adding a year writes one new
+partition directory and updates the manifest; other years are not touched.
+
+Usage:
+    python -m pipeline.partition ingest <dataset_dir> <input_csv> <year> [second_key]
+    python -m pipeline.partition show <dataset_dir>
+
+Example:
+    from pipeline.partition import PartitionedDataset
+    from pipeline.query import col
+
+    brfss = PartitionedDataset('data/brfss')
+    brfss.ingest_csv('raw/diabetes_binary_health_indicators_BRFSS2015.csv', year=2015)
+
+    recent = (brfss.scan()
+              .filter((col('year') >= 2014) & (col('BMI') >= 30))
+              .group_by('year')
+              .agg(rate=('Diabetes_binary', 'mean'), n=('Diabetes_binary', 'count'))
+              .collect())
+    print(brfss.scan().filter(col('year') == 2015).explain())
+"""
+
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+from pipeline import labels
+from pipeline.query import (DEFAULT_CHUNKSIZE, Column, Compare, IsIn, IsNull, LazyFrame,
+                            Literal, Logical, _apply_filters)
+
+
+MANIFEST = 'manifest.json'
+YEAR_KEY = 'year'
+PART_FILE = 'part-00000.csv'
+NULL_DIR = '__null__'  # directory name of a missing partition key value
+
+# Compare ops with the operands swapped, for predicates written as `5 < col('x')`
+_FLIPPED = {'==': '==', '!=': '!=', '<': '>', '<=': '>=', '>': '<', '>=': '<='}
+
+
+def _plain(value):
+    """numpy scalar -> JSON-serializable Python value"""
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _key(value):
+    """Partition key value -> JSON value; every missing value maps to None
+
+    NaN != NaN, so a NaN key would open a new partition for every chunk.
+    """
+    return None if pd.isnull(value) else _plain(value)
+
+
+def _partition_dir(keys):
+    return os.path.join(*[f'{name}={NULL_DIR if value is None else value}'
+                          for name, value in keys.items()])
+
+
+class _ColumnStats:
+    """Running min/max/null count for the columns of one partition"""
+
+    def __init__(self):
+        self.stats = {}
+
+    def update(self, frame):
+        for name in frame.columns:
+            values = frame[name]
+            entry = self.stats.setdefault(name, {'min': None, 'max': None, 'nulls': 0})
+            entry['nulls'] += int(values.isnull().sum())
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                # Label order is not the order of the strings a predicate compares
+                entry['unordered'] = True
+                continue
+            values = values.dropna()
+            if values.empty:
+                continue
+            try:
+                low, high = _plain(values.min()), _plain(values.max())
+                if entry['min'] is not None:
+                    low, high = min(low, entry['min']), max(high, entry['max'])
+            except TypeError:  # mixed types: no usable range
+                entry['min'] = entry['max'] = None
+                entry['unordered'] = True
+                continue
+            if not entry.get('unordered'):
+                entry['min'], entry['max'] = low, high
+
+
+def may_match(predicate, partition):
+    """False only if no row of the partition can satisfy `predicate`
+
+    Uses the partition's key values and column min/max from the manifest;
+    anything it cannot reason about (expressions over several columns, ~,
+    unordered columns) conservatively returns True.
+    """
+    if isinstance(predicate, Logical):
+        left, right = may_match(predicate.left, partition), may_match(predicate.right, partition)
+        return (left and right) if predicate.op == '&' else (left or right)
+    if isinstance(predicate, IsNull) and isinstance(predicate.inner, Column):
+        stats = _range(predicate.inner.name, partition)
+        return stats is None or stats['nulls'] > 0
+    if isinstance(predicate, IsIn) and isinstance(predicate.inner, Column):
+        stats = _range(predicate.inner.name, partition)
+        if stats is None or stats['min'] is None:
+            return stats is None or stats['nulls'] < partition['rows']
+        try:
+            return any(stats['min'] <= v <= stats['max'] for v in predicate.values)
+        except TypeError:
+            return True
+    if isinstance(predicate, Compare):
+        if isinstance(predicate.left, Column) and isinstance(predicate.right, Literal):
+            name, op, value = predicate.left.name, predicate.op, predicate.right.value
+        elif isinstance(predicate.right, Column) and isinstance(predicate.left, Literal):
+            name, op, value = predicate.right.name, _FLIPPED[predicate.op], predicate.left.value
+        else:
+            return True
+        stats = _range(name, partition)
+        if stats is None:
+            return True
+        if stats['min'] is None:
+            # All values missing: no comparison can be true
+            return stats.get('unordered', False) or stats['nulls'] < partition['rows']
+        low, high = stats['min'], stats['max']
+        try:
+            return {
+                '==': low <= value <= high,
+                '!=': not (low == high == value),
+                '<': low < value,
+                '<=': low <= value,
+                '>': high > value,
+                '>=': high >= value,
+            }[op]
+        except TypeError:
+            return True
+    return True
+
+
+def _range(name, partition):
+    """min/max/nulls of a column in a partition (keys are constant columns)"""
+    if name in partition['keys']:
+        value = partition['keys'][name]
+        if value is None:
+            return {'min': None, 'max': None, 'nulls': partition['rows']}
+        return {'min': value, 'max': value, 'nulls': 0}
+    return partition['columns'].get(name)
+
+
+class PartitionedDataset:
+    """Directory of per-year (and optional second key) CSV partitions
+
+    Args:
+        root: Dataset directory (holds manifest.json)
+        partition_by: Extra partition column after year, e.g. 'Sex'. Only
+            used when the dataset is created; afterwards the manifest decides.
+    """
+
+    def __init__(self, root, partition_by=None):
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST)
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+            if partition_by and [YEAR_KEY, partition_by] != self.manifest['partition_by']:
+                raise ValueError(f"Dataset '{root}' is partitioned by {self.manifest['partition_by']}")
+        else:
+            self.manifest = {'partition_by': [YEAR_KEY] + ([partition_by] if partition_by else []),
+                             'columns': [], 'partitions': []}
+
+    @property
+    def partition_by(self):
+        return list(self.manifest['partition_by'])
+
+    @property
+    def columns(self):
+        return list(self.manifest['columns'])
+
+    @property
+    def years(self):
+        return sorted({p['keys'][YEAR_KEY] for p in self.manifest['partitions']})
+
+    def _save_manifest(self):
+        os.makedirs(self.root, exist_ok=True)
+        temp = f'{self.manifest_path}.tmp'
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(temp, self.manifest_path)
+
+    # ----- writing -----
+
+    def write(self, df, year):
+        """Write (or replace) all partitions of one year from a DataFrame"""
+        return self.ingest_chunks([df], year)
+
+    @property
+    def labels(self):
+        """Label dictionaries of the dataset's categorical columns (pipeline.labels)"""
+        return dict(self.manifest.get('labels', {}))
+
+    def ingest_csv(self, path, year, chunksize=DEFAULT_CHUNKSIZE, **read_options):
+        """Stream a CSV into the partitions of one year (replacing that year)"""
+        with labels.read_csv(path, chunksize=chunksize, **read_options) as chunks:
+            return self.ingest_chunks(chunks, year)
+
+    def ingest_chunks(self, chunks, year):
+        """Write an iterable of DataFrame chunks as the partitions of `year`
+
+        Files are written to a staging directory first and swapped in at the
+        end, so a failed ingest leaves the previous version of the year intact.
+
+        Returns:
+            List of the manifest entries written
+        """
+        year = int(year)
+        extra = self.partition_by[1:]
+        staging = os.path.join(self.root, f'.staging-{YEAR_KEY}={year}-{os.getpid()}')
+        shutil.rmtree(staging, ignore_errors=True)
+        written = {}  # partition key tuple -> (keys, relative dir, stats, rows)
+        columns = specs = None
+
+        try:
+            for chunk in chunks:
+                if columns is None:
+                    columns = list(chunk.columns)
+                    missing = [c for c in extra if c not in columns]
+                    if missing:
+                        raise KeyError(f"Partition column(s) missing from input: {missing}")
+                    if self.columns:
+                        expected = [c for c in self.columns if c != YEAR_KEY]
+                        if columns != expected:
+                            raise ValueError(f"Columns of year {year} differ from the dataset: "
+                                             f"{columns} vs {expected}")
+                chunk_specs = labels.dictionaries(chunk)
+                if specs is None:
+                    specs = chunk_specs
+                    if self.columns and specs != self.labels:
+                        raise ValueError(f"Label dictionaries of year {year} differ from the "
+                                         f"dataset's")
+                elif chunk_specs != specs:
+                    raise ValueError("Label dictionaries differ between chunks")
+                groups = (chunk.groupby(extra, dropna=False, sort=False, observed=True) if extra
+                          else [((), chunk)])
+                for values, part in groups:
+                    values = values if isinstance(values, tuple) else (values,)
+                    keys = {YEAR_KEY: year, **{k: _key(v) for k, v in zip(extra, values)}}
+                    token = tuple(keys.values())
+                    if token not in written:
+                        relative = _partition_dir(keys)
+                        os.makedirs(os.path.join(staging, relative), exist_ok=True)
+                        written[token] = [keys, relative, _ColumnStats(), 0]
+                    entry = written[token]
+                    data = part.drop(columns=extra)
+                    target = os.path.join(staging, entry[1], PART_FILE)
+                    encoded, part_specs = labels.encode(data)
+                    new_file = not os.path.exists(target)
+                    encoded.to_csv(target, mode='a', header=new_file, index=False)
+                    if new_file:
+                        labels.write_dictionaries(target, part_specs)
+                    entry[2].update(data)
+                    entry[3] += len(data)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        if columns is None:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise ValueError(f"No rows to write for year {year}")
+
+        # Swap the staged year in place of the old one
+        final = os.path.join(self.root, f'{YEAR_KEY}={year}')
+        shutil.rmtree(final, ignore_errors=True)
+        os.makedirs(self.root, exist_ok=True)
+        os.replace(os.path.join(staging, f'{YEAR_KEY}={year}'), final)
+        shutil.rmtree(staging, ignore_errors=True)
+
+        entries = [{'keys': keys, 'path': os.path.join(relative, PART_FILE).replace(os.sep, '/'),
+                    'rows': rows, 'columns': stats.stats}
+                   for keys, relative, stats, rows in written.values()]
+        self.manifest['partitions'] = (
+            [p for p in self.manifest['partitions'] if p['keys'][YEAR_KEY] != year] + entries)
+        self.manifest['partitions'].sort(key=lambda p: [str(v) for v in p['keys'].values()])
+        if not self.manifest['columns']:
+            self.manifest['columns'] = columns + ([YEAR_KEY] if YEAR_KEY not in columns else [])
+            if specs:
+                self.manifest['labels'] = specs
+        self._save_manifest()
+        return entries
+
+    # ----- reading -----
+
+    def partitions(self, filters=()):
+        """Manifest entries of the partitions that may satisfy every filter"""
+        return [p for p in self.manifest['partitions']
+                if all(may_match(predicate, p) for predicate in filters)]
+
+    def scan(self, chunksize=DEFAULT_CHUNKSIZE, **read_options):
+        """Lazy query over the dataset (see pipeline.query) with partition pruning"""
+        return DatasetFrame(self, chunksize=chunksize, read_options=read_options)
+
+    def read(self, columns=None, filters=None):
+        """Read the rows matching `filters` (a query expression) into memory"""
+        frame = self.scan()
+        if filters is not None:
+            frame = frame.filter(filters)
+        if columns is not None:
+            frame = frame.select(*columns)
+        return frame.collect()
+
+    def summary(self):
+        """One row per partition: keys, rows and file path"""
+        rows = [{**p['keys'], 'rows': p['rows'], 'path': p['path']}
+                for p in self.manifest['partitions']]
+        return pd.DataFrame(rows, columns=self.partition_by + ['rows', 'path'])
+
+
+class DatasetFrame(LazyFrame):
+    """LazyFrame whose scan reads only the partitions its filters can match"""
+
+    def __init__(self, dataset, chunksize=DEFAULT_CHUNKSIZE, read_options=None, ops=None):
+        super().__init__(dataset.root, chunksize, read_options, ops)
+        self.dataset = dataset
+
+    def _with(self, op):
+        return DatasetFrame(self.dataset, self.chunksize, self.read_options, self.ops + [op])
+
+    def schema(self):
+        return self.dataset.columns
+
+    def _chunks(self, plan):
+        keys = self.dataset.partition_by
+        file_columns = [c for c in plan['usecols'] if c not in keys]
+        for partition in self.dataset.partitions(plan['filters']):
+            if file_columns:
+                path = os.path.join(self.dataset.root, partition['path'])
+                reader = labels.read_csv(path, usecols=file_columns, chunksize=self.chunksize,
+                                         **self.read_options)
+            else:
+                # Only partition keys needed: the row count comes from the manifest
+                rows = partition['rows']
+                reader = (pd.DataFrame(index=pd.RangeIndex(start, min(start + self.chunksize, rows)))
+                          for start in range(0, rows, self.chunksize))
+            specs = self.dataset.labels
+            for chunk in reader:
+                for key in keys:
+                    if key in plan['usecols']:
+                        value = partition['keys'][key]
+                        if value is None:
+                            value = np.nan
+                        if key in specs:
+                            spec = specs[key]
+                            code = -1 if pd.isnull(value) else spec['labels'].index(value)
+                            value = pd.Categorical.from_codes(np.full(len(chunk), code),
+                                categories=spec['labels'], ordered=spec.get('ordered', True))
+                        chunk[key] = value
+                yield _apply_filters(chunk[plan['usecols']], plan['filters'])
+
+    def explain(self):
+        plan = self.plan()
+        selected = self.dataset.partitions(plan['filters'])
+        total = len(self.dataset.manifest['partitions'])
+        lines = super().explain().split('\n')
+        lines[0] = (f"SCAN {self.dataset.root} ({len(selected)} of {total} partitions, "
+                    f"{sum(p['rows'] for p in selected):,} rows)")
+        lines[1:1] = [f"  partition {p['path']}" for p in selected]
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return f"DatasetFrame({self.dataset.root!r}, ops={self.ops})"
+
+
+def main():
+    """Ingest one year into a dataset, or show its partitions"""
+    usage = ("Usage: python -m pipeline.partition ingest <dataset_dir> <input_csv> <year> [second_key]\n"
+             "       python -m pipeline.partition show <dataset_dir>")
+    if len(sys.argv) < 3 or sys.argv[1] not in ('ingest', 'show'):
+        print(usage)
+        sys.exit(1)
+
+    command, root = sys.argv[1], sys.argv[2]
+    try:
+        if command == 'ingest':
+            if len(sys.argv) not in (5, 6):
+                print(usage)
+                sys.exit(1)
+            input_file, year = sys.argv[3], sys.argv[4]
+            dataset = PartitionedDataset(root, sys.argv[5] if len(sys.argv) == 6 else None)
+            entries = dataset.ingest_csv(input_file, year)
+            print(f"✓ Wrote {len(entries)} partition(s), {sum(e['rows'] for e in entries):,} rows "
+                  f"for {YEAR_KEY} {year}")
+        dataset = PartitionedDataset(root)
+    except FileNotFoundError as e:
+        print(f"✗ Error: File '{e.filename}' not found")
+        sys.exit(1)
+    except (KeyError, ValueError) as e:
+        print(f"✗ Error: {e}")
+        sys.exit(1)
+
+    summary = dataset.summary()
+    print(f"\nDataset '{root}': partitioned by {dataset.partition_by}, "
+          f"{len(summary)} partition(s), {int(summary['rows'].sum()):,} rows")
+    print(summary.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
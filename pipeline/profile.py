@@ -0,0 +1,545 @@
+#!/usr/bin/env python3
+"""
+Streaming column profiles built from mergeable sketches.
+
+One pass over the input produces, per column:
+  - counts (rows, nulls, zeros)
+  - min/max and the first four moments (mean, std, skew, kurtosis)
+  - approximate quantiles (KLL-style compactor sketch)
+  - approximate distinct count (HyperLogLog)
+  - heavy hitters / value counts (Misra-Gries summary)
+
+Every sketch can be merged with another one of the same kind, so the file is
+split into byte ranges that are profiled by separate worker processes and the
+partial profiles are merged at the end. Memory per worker is bounded by the
+chunk size, not the file size.
+
+Usage:
+    python -m pipeline.profile <input_csv> [report_txt]
+"""
+
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from pipeline import labels
+
+
+DEFAULT_CHUNKSIZE = 100_000
+QUANTILE_K = 256         # compactor capacity, rank error ~ O(log(n/k) / k)
+HLL_PRECISION = 12       # 4096 registers, ~1.6% relative error
+HEAVY_HITTERS = 64       # exact value counts for columns with <= 64 distinct values
+SAMPLE_ROWS = 10_000     # rows read up front to decide each column's kind
+
+
+# ============================================
+# SKETCHES
+# ============================================
+
+class MomentSketch:
+    """Count, min, max and central moments up to order 4 (Pebay merge)"""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.m4 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values):
+        if len(values) == 0:
+            return
+        other = MomentSketch()
+        other.n = len(values)
+        other.mean = float(values.mean())
+        delta = values - other.mean
+        delta2 = delta * delta
+        other.m2 = float(delta2.sum())
+        other.m3 = float((delta2 * delta).sum())
+        other.m4 = float((delta2 * delta2).sum())
+        other.min = float(values.min())
+        other.max = float(values.max())
+        self.merge(other)
+
+    def merge(self, other):
+        if other.n == 0:
+            return
+        if self.n == 0:
+            self.__dict__.update(other.__dict__)
+            return
+        na, nb = self.n, other.n
+        n = na + nb
+        delta = other.mean - self.mean
+        delta2 = delta * delta
+        m2 = self.m2 + other.m2 + delta2 * na * nb / n
+        m3 = (self.m3 + other.m3
+              + delta * delta2 * na * nb * (na - nb) / n ** 2
+              + 3 * delta * (na * other.m2 - nb * self.m2) / n)
+        m4 = (self.m4 + other.m4
+              + delta2 * delta2 * na * nb * (na * na - na * nb + nb * nb) / n ** 3
+              + 6 * delta2 * (na * na * other.m2 + nb * nb * self.m2) / n ** 2
+              + 4 * delta * (na * other.m3 - nb * self.m3) / n)
+        self.mean += delta * nb / n
+        self.m2, self.m3, self.m4 = m2, m3, m4
+        self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def std(self):
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else float('nan')
+
+    def skew(self):
+        """Adjusted Fisher-Pearson skewness, same definition as Series.skew()"""
+        n = self.n
+        if n < 3 or self.m2 == 0:
+            return float('nan')
+        g1 = math.sqrt(n) * self.m3 / self.m2 ** 1.5
+        return g1 * math.sqrt(n * (n - 1)) / (n - 2)
+
+    def kurtosis(self):
+        """Unbiased excess kurtosis, same definition as Series.kurt()"""
+        n = self.n
+        if n < 4 or self.m2 == 0:
+            return float('nan')
+        g2 = n * self.m4 / self.m2 ** 2 - 3
+        return ((n + 1) * g2 + 6) * (n - 1) / ((n - 2) * (n - 3))
+
+
+class QuantileSketch:
+    """Compactor-based quantile sketch (KLL with equal level capacities)
+
+    Level h holds items of weight 2**h. When a level overflows it is sorted
+    and every other item (random offset) is promoted to the next level.
+    """
+
+    def __init__(self, k=QUANTILE_K, seed=0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        if len(values) == 0:
+            return
+        self.levels[0] = np.concatenate([self.levels[0], np.asarray(values, dtype=float)])
+        self._compress()
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self._compress()
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            items = self.levels[h]
+            if len(items) > self.k:
+                items = np.sort(items)
+                # Keep one item when the count is odd so weights stay exact
+                keep = items[:1] if len(items) % 2 else items[:0]
+                rest = items[len(keep):]
+                promoted = rest[self.rng.integers(0, 2)::2]
+                self.levels[h] = keep
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            h += 1
+
+    def quantiles(self, qs):
+        items = np.concatenate(self.levels)
+        if len(items) == 0:
+            return [float('nan')] * len(qs)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h)
+                                  for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind='mergesort')
+        items, cumulative = items[order], np.cumsum(weights[order])
+        total = cumulative[-1]
+        positions = np.searchsorted(cumulative, np.asarray(qs) * total, side='left')
+        return [float(items[min(p, len(items) - 1)]) for p in positions]
+
+    def size(self):
+        return sum(len(level) for level in self.levels)
+
+
+class DistinctSketch:
+    """HyperLogLog distinct-count estimator"""
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.p = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, values):
+        if len(values) == 0:
+            return
+        hashes = pd.util.hash_array(np.asarray(values))
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - _bit_length(rest) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(2.0 ** -self.registers.astype(float))
+        zeros = int((self.registers == 0).sum())
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+
+class HeavyHitters:
+    """Misra-Gries frequent-items summary with at most `k` counters
+
+    Counts are exact while a column has at most `k` distinct values, otherwise
+    each count is an underestimate by at most n / (k + 1).
+    """
+
+    def __init__(self, k=HEAVY_HITTERS):
+        self.k = k
+        self.counts = {}
+        self.exact = True
+
+    def update(self, values):
+        if len(values) == 0:
+            return
+        chunk = pd.Series(values).value_counts(sort=False)
+        other = HeavyHitters(self.k)
+        other.counts = {_py(key): int(count) for key, count in chunk.items()}
+        self.merge(other)
+
+    def merge(self, other):
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.exact = self.exact and other.exact
+        if len(self.counts) > self.k:
+            self.exact = False
+            threshold = sorted(self.counts.values(), reverse=True)[self.k]
+            self.counts = {key: count - threshold for key, count in self.counts.items()
+                           if count > threshold}
+
+    def most_common(self, n=None):
+        items = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+        return items if n is None else items[:n]
+
+
+class ColumnProfile:
+    """All sketches for one column"""
+
+    def __init__(self, name, numeric):
+        self.name = name
+        self.numeric = numeric
+        self.rows = 0
+        self.nulls = 0
+        self.zeros = 0
+        self.moments = MomentSketch() if numeric else None
+        self.quantiles = QuantileSketch() if numeric else None
+        self.distinct = DistinctSketch()
+        self.heavy = HeavyHitters()
+
+    def update(self, series):
+        self.rows += len(series)
+        if self.numeric:
+            series = pd.to_numeric(series, errors='coerce')
+        values = series.dropna()
+        self.nulls += len(series) - len(values)
+        self.distinct.update(values.to_numpy())
+        self.heavy.update(values.to_numpy())
+        if self.numeric:
+            array = values.to_numpy(dtype=float)
+            self.zeros += int((array == 0).sum())
+            self.moments.update(array)
+            self.quantiles.update(array)
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.nulls += other.nulls
+        self.zeros += other.zeros
+        self.distinct.merge(other.distinct)
+        self.heavy.merge(other.heavy)
+        if self.numeric:
+            self.moments.merge(other.moments)
+            self.quantiles.merge(other.quantiles)
+
+    @property
+    def count(self):
+        return self.rows - self.nulls
+
+    def distinct_count(self):
+        """Exact when the heavy-hitter summary saw every value, else the HLL estimate"""
+        return len(self.heavy.counts) if self.heavy.exact else self.distinct.estimate()
+
+
+class DatasetProfile:
+    """Mergeable profile of a whole table"""
+
+    def __init__(self, columns, numeric_columns):
+        self.columns = list(columns)
+        self.profiles = {name: ColumnProfile(name, name in numeric_columns) for name in columns}
+        self.rows = 0
+        self.chunks = 0
+        self.seconds = 0.0
+
+    def update(self, frame):
+        self.rows += len(frame)
+        self.chunks += 1
+        for name in self.columns:
+            self.profiles[name].update(frame[name])
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.chunks += other.chunks
+        for name in self.columns:
+            self.profiles[name].merge(other.profiles[name])
+
+    def __getitem__(self, name):
+        return self.profiles[name]
+
+    # ----- rendering (drop-in views for describe / info / value_counts) -----
+
+    def describe(self, columns=None):
+        """Same layout as DataFrame.describe() for numeric columns"""
+        names = [c for c in (columns or self.columns) if self.profiles[c].numeric]
+        out = {}
+        for name in names:
+            p = self.profiles[name]
+            q25, q50, q75 = p.quantiles.quantiles([0.25, 0.5, 0.75])
+            out[name] = {
+                'count': float(p.count), 'mean': p.moments.mean if p.count else float('nan'),
+                'std': p.moments.std(), 'min': p.moments.min if p.count else float('nan'),
+                '25%': q25, '50%': q50, '75%': q75,
+                'max': p.moments.max if p.count else float('nan'),
+            }
+        return pd.DataFrame(out)
+
+    def info(self):
+        """Per-column overview similar to DataFrame.info() plus sketch extras"""
+        rows = []
+        for name in self.columns:
+            p = self.profiles[name]
+            rows.append({
+                'Column': name,
+                'Non-Null Count': p.count,
+                'Nulls': p.nulls,
+                'Kind': 'numeric' if p.numeric else 'categorical',
+                'Distinct (est.)': p.distinct_count(),
+                'Zeros': p.zeros if p.numeric else None,
+                'Skew': p.moments.skew() if p.numeric else None,
+            })
+        return pd.DataFrame(rows).set_index('Column')
+
+    def value_counts(self, column, n=None):
+        """Value counts from the heavy-hitter summary (exact for low-cardinality columns)"""
+        counts = self.profiles[column].heavy.most_common(n)
+        return pd.Series(dict(counts), name='count', dtype='int64')
+
+    def skew(self):
+        return pd.Series({name: p.moments.skew() for name, p in self.profiles.items() if p.numeric})
+
+
+def _bit_length(values):
+    """Vectorized int.bit_length() for uint64 arrays"""
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    with np.errstate(divide='ignore'):
+        high_bits = np.where(high > 0, np.floor(np.log2(high)) + 33, 0)
+        low_bits = np.where(low > 0, np.floor(np.log2(low)) + 1, 0)
+    return np.where(high > 0, high_bits, low_bits).astype(np.int64)
+
+
+def _py(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+# ============================================
+# PROFILING
+# ============================================
+
+def profile_frame(df, numeric_columns=None):
+    """Profile an in-memory DataFrame (e.g. right after cleaning)"""
+    if numeric_columns is None:
+        numeric_columns = set(df.select_dtypes(include=[np.number, 'bool']).columns)
+    profile = DatasetProfile(df.columns, set(numeric_columns))
+    start = time.perf_counter()
+    profile.update(df)
+    profile.seconds = time.perf_counter() - start
+    return profile
+
+
+class _RangeReader:
+    """File-like view of bytes [start, end) so pandas can parse one split"""
+
+    def __init__(self, path, start, end):
+        self.handle = open(path, 'rb')
+        self.handle.seek(start)
+        self.remaining = end - start
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.handle.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.handle.close()
+
+
+def _split_ranges(path, parts):
+    """Split a CSV body into byte ranges that start on line boundaries"""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as handle:
+        handle.readline()
+        body_start = handle.tell()
+        bounds = [body_start]
+        for i in range(1, parts):
+            target = body_start + (size - body_start) * i // parts
+            if target <= bounds[-1]:
+                continue
+            handle.seek(target)
+            handle.readline()
+            if handle.tell() < size and handle.tell() > bounds[-1]:
+                bounds.append(handle.tell())
+        bounds.append(size)
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1) if bounds[i + 1] > bounds[i]]
+
+
+def _profile_range(path, start, end, columns, numeric_columns, chunksize, read_options, specs):
+    profile = DatasetProfile(columns, set(numeric_columns))
+    reader = _RangeReader(path, start, end)
+    try:
+        for chunk in pd.read_csv(reader, header=None, names=columns,
+                                 chunksize=chunksize, **read_options):
+            profile.update(labels.decode(chunk, specs))
+    finally:
+        reader.close()
+    return profile
+
+
+def profile_csv(path, chunksize=DEFAULT_CHUNKSIZE, workers=None, **read_options):
+    """Profile a CSV file in one streaming pass, in parallel across byte ranges
+
+    Args:
+        path: CSV file to profile (must not contain quoted newlines)
+        chunksize: Rows parsed at a time by each worker
+        workers: Number of worker processes (default: CPU count, 1 = in-process)
+        read_options: Extra keyword arguments passed to pd.read_csv
+
+    Label columns written by pipeline.labels are profiled as their labels
+    (categorical), not as their integer codes.
+
+    Returns:
+        DatasetProfile with merged sketches for every column
+    """
+    start = time.perf_counter()
+    sample = labels.read_csv(path, nrows=SAMPLE_ROWS, **read_options)
+    columns = list(sample.columns)
+    numeric_columns = list(sample.select_dtypes(include=[np.number, 'bool']).columns)
+    specs = {name: spec for name, spec in labels.read_dictionaries(path).items()
+             if name in columns}
+
+    workers = workers or os.cpu_count() or 1
+    # Several ranges per worker keeps the pool busy when ranges differ in cost
+    ranges = _split_ranges(path, workers * 4 if workers > 1 else 1)
+    profile = DatasetProfile(columns, set(numeric_columns))
+
+    if workers == 1:
+        for begin, end in ranges:
+            profile.merge(_profile_range(path, begin, end, columns, numeric_columns,
+                                         chunksize, read_options, specs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_profile_range, path, begin, end, columns,
+                                   numeric_columns, chunksize, read_options, specs)
+                       for begin, end in ranges]
+            for future in futures:
+                profile.merge(future.result())
+
+    profile.seconds = time.perf_counter() - start
+    return profile
+
+
+# ============================================
+# REPORT
+# ============================================
+
+def render_report(profile, title, target=None, top_values=10):
+    """Render a text summary report (same sections as data_summary_report.txt)"""
+    lines = []
+    lines.append("=" * 80)
+    lines.append("DATA SUMMARY REPORT")
+    lines.append(title)
+    lines.append("=" * 80)
+    lines.append("")
+    lines.append(f"Total Records: {profile.rows}")
+    lines.append(f"Total Features: {len(profile.columns)}")
+    if target is not None and target in profile.profiles:
+        counts = profile.value_counts(target)
+        cases, non_cases = int(counts.get(1, 0)), int(counts.get(0, 0))
+        total = max(cases + non_cases, 1)
+        lines.append(f"Diabetes Cases: {cases} ({cases / total * 100:.1f}%)")
+        lines.append(f"Non-Diabetes: {non_cases} ({non_cases / total * 100:.1f}%)")
+    lines.append("")
+
+    lines.append("Column Overview:")
+    lines.append(profile.info().to_string())
+    lines.append("")
+
+    described = profile.describe()
+    if not described.empty:
+        lines.append("Key Statistics (approximate quantiles):")
+        lines.append(described.to_string())
+        lines.append("")
+
+    for name in profile.columns:
+        p = profile[name]
+        if (p.heavy.exact and len(p.heavy.counts) <= top_values) or not p.numeric:
+            lines.append(f"Value Counts - {name}{'' if p.heavy.exact else ' (approximate)'}:")
+            for value, count in p.heavy.most_common(top_values):
+                lines.append(f"  {value}: {count}")
+            lines.append("")
+
+    lines.append(f"Profiled {profile.rows:,} rows in {profile.chunks} chunks "
+                 f"({profile.seconds:.2f}s)")
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    """Profile a CSV file and print or save the summary report"""
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python -m pipeline.profile <input_csv> [report_txt]")
+        print("Example: python -m pipeline.profile new/indicator.csv data_summary_report.txt")
+        sys.exit(1)
+
+    input_file = sys.argv[1]
+    try:
+        profile = profile_csv(input_file)
+    except FileNotFoundError:
+        print(f"✗ Error: File '{input_file}' not found")
+        sys.exit(1)
+
+    target = next((c for c in ('Diabetes_binary', 'Outcome') if c in profile.columns), None)
+    report = render_report(profile, os.path.basename(input_file), target=target)
+
+    if len(sys.argv) == 3:
+        with open(sys.argv[2], 'w') as f:
+            f.write(report)
+        print(f"✓ Generated: {sys.argv[2]}")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
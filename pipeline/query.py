@@ -0,0 +1,612 @@
+"""
+Lazy query layer over the cleaned CSV outputs (new/*.csv).
+
+A LazyFrame only records operations. Nothing is read until collect() is
+called, and then only the columns the query needs are read, chunk by chunk,
+with filters applied to each chunk before it is kept or aggregated.
+
+Example:
+    from pipeline.query import scan_csv, col
+
+    health = scan_csv('new/indicator.csv')
+
+    # df_health[df_health['Diabetes_binary']==0]['BMI']
+    bmi_no_diabetes = health.filter(col('Diabetes_binary') == 0).select('BMI').collect()
+
+    # Top 10 high-risk subgroups
+    high_risk = (health
+                 .group_by('Age_Group', 'BMI_Category', 'Income_Level')
+                 .agg(mean=('Diabetes_binary', 'mean'), count=('Diabetes_binary', 'count'))
+                 .filter(col('count') >= 100)
+                 .sort('mean', descending=True)
+                 .head(10)
+                 .collect())
+
+    print(health.filter(col('BMI') >= 30).select('BMI').explain())
+"""
+
+import numpy as np
+import pandas as pd
+
+from pipeline import labels
+
+
+DEFAULT_CHUNKSIZE = 200_000
+
+# Aggregations that can be computed from per-chunk partial results
+AGG_FUNCS = ['count', 'size', 'sum', 'mean', 'min', 'max', 'std', 'var']
+
+
+# ============================================
+# EXPRESSIONS
+# ============================================
+
+class Expr:
+    """Base class for column expressions and predicates"""
+
+    def columns(self):
+        """Return the set of source columns this expression reads"""
+        raise NotImplementedError
+
+    def evaluate(self, frame):
+        """Evaluate the expression against a DataFrame chunk"""
+        raise NotImplementedError
+
+    def _compare(self, op, other):
+        return Compare(op, self, _wrap(other))
+
+    def __eq__(self, other):
+        return self._compare('==', other)
+
+    def __ne__(self, other):
+        return self._compare('!=', other)
+
+    def __lt__(self, other):
+        return self._compare('<', other)
+
+    def __le__(self, other):
+        return self._compare('<=', other)
+
+    def __gt__(self, other):
+        return self._compare('>', other)
+
+    def __ge__(self, other):
+        return self._compare('>=', other)
+
+    def __and__(self, other):
+        return Logical('&', self, _wrap(other))
+
+    def __or__(self, other):
+        return Logical('|', self, _wrap(other))
+
+    def __invert__(self):
+        return Not(self)
+
+    def isin(self, values):
+        return IsIn(self, list(values))
+
+    def between(self, low, high):
+        """Inclusive range check, like Series.between"""
+        return (self >= low) & (self <= high)
+
+    def isnull(self):
+        return IsNull(self)
+
+    def notnull(self):
+        return ~IsNull(self)
+
+    __hash__ = object.__hash__
+
+
+class Column(Expr):
+    def __init__(self, name):
+        self.name = name
+
+    def columns(self):
+        return {self.name}
+
+    def evaluate(self, frame):
+        return frame[self.name]
+
+    def __repr__(self):
+        return f"col('{self.name}')"
+
+
+class Literal(Expr):
+    def __init__(self, value):
+        self.value = value
+
+    def columns(self):
+        return set()
+
+    def evaluate(self, frame):
+        return self.value
+
+    def __repr__(self):
+        return repr(self.value)
+
+
+class Compare(Expr):
+    OPS = {
+        '==': lambda a, b: a == b,
+        '!=': lambda a, b: a != b,
+        '<': lambda a, b: a < b,
+        '<=': lambda a, b: a <= b,
+        '>': lambda a, b: a > b,
+        '>=': lambda a, b: a >= b,
+    }
+
+    def __init__(self, op, left, right):
+        self.op = op
+        self.left = left
+        self.right = right
+
+    def columns(self):
+        return self.left.columns() | self.right.columns()
+
+    def evaluate(self, frame):
+        return self.OPS[self.op](self.left.evaluate(frame), self.right.evaluate(frame))
+
+    def __repr__(self):
+        return f"({self.left!r} {self.op} {self.right!r})"
+
+
+class Logical(Expr):
+    def __init__(self, op, left, right):
+        self.op = op
+        self.left = left
+        self.right = right
+
+    def columns(self):
+        return self.left.columns() | self.right.columns()
+
+    def evaluate(self, frame):
+        left = _as_mask(self.left.evaluate(frame), frame)
+        right = _as_mask(self.right.evaluate(frame), frame)
+        return left & right if self.op == '&' else left | right
+
+    def __repr__(self):
+        return f"({self.left!r} {self.op} {self.right!r})"
+
+
+class Not(Expr):
+    def __init__(self, inner):
+        self.inner = inner
+
+    def columns(self):
+        return self.inner.columns()
+
+    def evaluate(self, frame):
+        return ~_as_mask(self.inner.evaluate(frame), frame)
+
+    def __repr__(self):
+        return f"~{self.inner!r}"
+
+
+class IsIn(Expr):
+    def __init__(self, inner, values):
+        self.inner = inner
+        self.values = values
+
+    def columns(self):
+        return self.inner.columns()
+
+    def evaluate(self, frame):
+        return self.inner.evaluate(frame).isin(self.values)
+
+    def __repr__(self):
+        return f"{self.inner!r}.isin({self.values!r})"
+
+
+class IsNull(Expr):
+    def __init__(self, inner):
+        self.inner = inner
+
+    def columns(self):
+        return self.inner.columns()
+
+    def evaluate(self, frame):
+        return self.inner.evaluate(frame).isnull()
+
+    def __repr__(self):
+        return f"{self.inner!r}.isnull()"
+
+
+def col(name):
+    """Reference a column by name inside a query expression"""
+    return Column(name)
+
+
+def _wrap(value):
+    return value if isinstance(value, Expr) else Literal(value)
+
+
+def _as_mask(values, frame):
+    """Turn an evaluated predicate into a boolean Series (missing -> False)"""
+    if isinstance(values, pd.Series):
+        return values.fillna(False).astype(bool)
+    return pd.Series(bool(values), index=frame.index)
+
+
+# ============================================
+# LOGICAL PLAN
+# ============================================
+
+class Select:
+    def __init__(self, columns):
+        self.columns = list(columns)
+
+    def __repr__(self):
+        return f"SELECT {self.columns}"
+
+
+class Filter:
+    def __init__(self, predicate):
+        self.predicate = predicate
+
+    def __repr__(self):
+        return f"FILTER {self.predicate!r}"
+
+
+class Aggregate:
+    def __init__(self, keys, specs):
+        self.keys = list(keys)
+        self.specs = specs
+
+    def __repr__(self):
+        specs = ', '.join(f"{name}={value!r}.{func}" for name, (value, func) in self.specs.items())
+        if self.keys:
+            return f"AGGREGATE BY {self.keys}: {specs}"
+        return f"AGGREGATE: {specs}"
+
+
+class Sort:
+    def __init__(self, by, descending):
+        self.by = by
+        self.descending = descending
+
+    def __repr__(self):
+        return f"SORT {self.by} {'DESC' if self.descending else 'ASC'}"
+
+
+class Limit:
+    def __init__(self, n):
+        self.n = n
+
+    def __repr__(self):
+        return f"LIMIT {self.n}"
+
+
+class GroupBy:
+    """Intermediate handle returned by LazyFrame.group_by; call .agg() on it"""
+
+    def __init__(self, frame, keys):
+        self._frame = frame
+        self._keys = keys
+
+    def agg(self, **specs):
+        return self._frame._aggregate(self._keys, specs)
+
+
+class LazyFrame:
+    """Deferred query over a CSV file
+
+    Args:
+        path: CSV file to scan
+        chunksize: Number of rows read per chunk
+        read_options: Extra keyword arguments passed to pd.read_csv
+    """
+
+    def __init__(self, path, chunksize=DEFAULT_CHUNKSIZE, read_options=None, ops=None):
+        self.path = path
+        self.chunksize = chunksize
+        self.read_options = dict(read_options or {})
+        self.ops = list(ops or [])
+
+    def _with(self, op):
+        return LazyFrame(self.path, self.chunksize, self.read_options, self.ops + [op])
+
+    # ----- building the query -----
+
+    def select(self, *columns):
+        return self._with(Select(columns))
+
+    def filter(self, predicate):
+        if not isinstance(predicate, Expr):
+            raise TypeError("filter() expects an expression built from col(...)")
+        return self._with(Filter(predicate))
+
+    def group_by(self, *keys):
+        return GroupBy(self, keys)
+
+    def agg(self, **specs):
+        """Aggregate the whole (filtered) frame into a single row"""
+        return self._aggregate((), specs)
+
+    def sort(self, by, descending=False):
+        return self._with(Sort(by, descending))
+
+    def head(self, n=5):
+        return self._with(Limit(n))
+
+    def _aggregate(self, keys, specs):
+        if not specs:
+            raise ValueError("agg() needs at least one name=(column, func) pair")
+        parsed = {}
+        for name, spec in specs.items():
+            value, func = spec
+            if func not in AGG_FUNCS:
+                raise ValueError(f"Unsupported aggregation '{func}'. Supported: {', '.join(AGG_FUNCS)}")
+            parsed[name] = (col(value) if isinstance(value, str) else value, func)
+        return self._with(Aggregate(keys, parsed))
+
+    # ----- planning -----
+
+    def schema(self):
+        """Column names of the underlying file (reads only the header)"""
+        return list(pd.read_csv(self.path, nrows=0, **self.read_options).columns)
+
+    def plan(self):
+        """Split the operations into the scan stage and the in-memory stage
+
+        Everything up to the first aggregation, sort or limit runs inside the
+        chunked scan: filters become per-chunk predicates and selects narrow the
+        projection. The remaining operations run on the (small) scan result.
+        """
+        source = self.schema()
+        available = list(source)
+        scan_filters = []
+        projection = None
+        aggregate = None
+        limit = None
+        rest = []
+
+        for position, op in enumerate(self.ops):
+            if isinstance(op, Filter):
+                missing = op.predicate.columns() - set(available)
+                if missing:
+                    raise KeyError(f"Filter references unknown columns: {sorted(missing)}")
+                scan_filters.append(op.predicate)
+            elif isinstance(op, Select):
+                missing = [c for c in op.columns if c not in available]
+                if missing:
+                    raise KeyError(f"Select references unknown columns: {missing}")
+                available = list(op.columns)
+                projection = list(op.columns)
+            elif isinstance(op, Aggregate):
+                needed = set(op.keys)
+                for value, _ in op.specs.values():
+                    needed |= value.columns()
+                missing = needed - set(available)
+                if missing:
+                    raise KeyError(f"Aggregate references unknown columns: {sorted(missing)}")
+                aggregate = op
+                rest = self.ops[position + 1:]
+                break
+            elif isinstance(op, Limit) and all(isinstance(o, Limit) for o in self.ops[position:]):
+                # A trailing limit on a plain scan lets us stop reading early
+                limit = min(o.n for o in self.ops[position:])
+                break
+            else:
+                rest = self.ops[position:]
+                break
+
+        # Projection pushdown: read only what the scan stage touches
+        needed = set()
+        for predicate in scan_filters:
+            needed |= predicate.columns()
+        if aggregate is not None:
+            needed |= set(aggregate.keys)
+            for value, _ in aggregate.specs.values():
+                needed |= value.columns()
+            output = None
+        else:
+            output = projection if projection is not None else list(source)
+            needed |= set(output)
+            needed |= self._post_scan_columns(rest)
+        usecols = [c for c in source if c in needed]
+
+        final = output
+        for op in self.ops:
+            if isinstance(op, Select):
+                final = list(op.columns)
+
+        return {
+            'usecols': usecols,
+            'filters': scan_filters,
+            'output': output,
+            'final': final,
+            'aggregate': aggregate,
+            'limit': limit,
+            'rest': rest,
+        }
+
+    @staticmethod
+    def _post_scan_columns(ops):
+        needed = set()
+        for op in ops:
+            if isinstance(op, Filter):
+                needed |= op.predicate.columns()
+            elif isinstance(op, Sort):
+                needed |= set([op.by] if isinstance(op.by, str) else op.by)
+            elif isinstance(op, Select):
+                needed |= set(op.columns)
+        return needed
+
+    def explain(self):
+        """Return a readable description of the physical plan"""
+        plan = self.plan()
+        lines = [f"SCAN {self.path}",
+                 f"  read columns: {plan['usecols']}"]
+        for predicate in plan['filters']:
+            lines.append(f"  pushed-down FILTER {predicate!r}")
+        if plan['aggregate'] is not None:
+            lines.append(f"  streaming {plan['aggregate']!r}")
+        elif plan['output'] is not None:
+            lines.append(f"  output columns: {plan['output']}")
+        if plan['limit'] is not None:
+            lines.append(f"  stop after {plan['limit']} rows")
+        for op in plan['rest']:
+            lines.append(f"{op!r}")
+        return "\n".join(lines)
+
+    # ----- execution -----
+
+    def _chunks(self, plan):
+        # Label columns written by pipeline.labels come back as ordered categoricals
+        reader = labels.read_csv(self.path, usecols=plan['usecols'],
+                                 chunksize=self.chunksize, **self.read_options)
+        for chunk in reader:
+            yield _apply_filters(chunk, plan['filters'])
+
+    def collect(self):
+        """Execute the query and return a pandas DataFrame"""
+        plan = self.plan()
+
+        if plan['aggregate'] is not None:
+            result = _streaming_aggregate(self._chunks(plan), plan['aggregate'])
+        else:
+            keep = plan['output'] + [c for c in self._post_scan_columns(plan['rest'])
+                                     if c not in plan['output']]
+            parts = []
+            remaining = plan['limit']
+            for chunk in self._chunks(plan):
+                if remaining is not None:
+                    chunk = chunk.head(remaining)
+                    remaining -= len(chunk)
+                parts.append(chunk[keep])
+                if remaining is not None and remaining <= 0:
+                    break
+            if parts:
+                result = pd.concat(parts, ignore_index=True)
+            else:
+                result = pd.DataFrame(columns=keep)
+
+        result = _apply_in_memory(result, plan['rest'])
+        if plan['aggregate'] is None:
+            result = result[plan['final']]
+        return result
+
+    def __repr__(self):
+        return f"LazyFrame({self.path!r}, ops={self.ops})"
+
+
+def scan_csv(path, chunksize=DEFAULT_CHUNKSIZE, **read_options):
+    """Create a lazy handle over a CSV file without reading it"""
+    return LazyFrame(path, chunksize=chunksize, read_options=read_options)
+
+
+# ============================================
+# EXECUTION HELPERS
+# ============================================
+
+def _streaming_aggregate(chunks, aggregate):
+    """Combine per-chunk partial aggregates so only group state stays in memory"""
+    keys = aggregate.keys
+    partials = []
+
+    for chunk in chunks:
+        values = {}
+        for name, (expr, func) in aggregate.specs.items():
+            series = expr.evaluate(chunk)
+            if not isinstance(series, pd.Series):
+                series = pd.Series(series, index=chunk.index)
+            values[name] = series.astype(float) if series.dtype == bool else series
+        frame = pd.DataFrame(values, index=chunk.index)
+        for key in keys:
+            frame[key] = chunk[key]
+        partials.append(_partial(frame, keys, aggregate.specs))
+
+    if not partials:
+        columns = list(keys) + list(aggregate.specs)
+        return pd.DataFrame(columns=columns)
+
+    combined = pd.concat(partials, ignore_index=True)
+    if keys:
+        grouped = combined.groupby(list(keys), sort=True, observed=True)
+        merged = pd.DataFrame({
+            column: getattr(grouped[column], 'min' if column.endswith('__min')
+                            else 'max' if column.endswith('__max') else 'sum')()
+            for column in combined.columns if column not in keys
+        })
+    else:
+        merged = pd.DataFrame({
+            column: [combined[column].min() if column.endswith('__min')
+                     else combined[column].max() if column.endswith('__max')
+                     else combined[column].sum()]
+            for column in combined.columns
+        })
+
+    result = pd.DataFrame(index=merged.index)
+    for name, (_, func) in aggregate.specs.items():
+        count = merged[f'{name}__count']
+        if func == 'count':
+            result[name] = count.astype('int64')
+        elif func == 'size':
+            result[name] = merged[f'{name}__size'].astype('int64')
+        elif func == 'sum':
+            result[name] = merged[f'{name}__sum']
+        elif func == 'mean':
+            result[name] = merged[f'{name}__sum'] / count.replace(0, np.nan)
+        elif func == 'min':
+            result[name] = merged[f'{name}__min']
+        elif func == 'max':
+            result[name] = merged[f'{name}__max']
+        else:
+            total = merged[f'{name}__sum']
+            squares = merged[f'{name}__sumsq']
+            var = (squares - total ** 2 / count) / (count - 1).where(count > 1)
+            result[name] = var.clip(lower=0) if func == 'var' else np.sqrt(var.clip(lower=0))
+
+    return result.reset_index() if keys else result
+
+
+def _partial(frame, keys, specs):
+    """Per-chunk sufficient statistics for every requested aggregation"""
+    if keys:
+        grouped = frame.groupby(list(keys), sort=False, observed=True, dropna=True)
+    out = {}
+    for name, (_, func) in specs.items():
+        target = grouped[name] if keys else frame[name]
+        out[f'{name}__count'] = target.count()
+        if func == 'size':
+            out[f'{name}__size'] = target.size() if keys else len(frame)
+        if func in ('sum', 'mean', 'std', 'var'):
+            out[f'{name}__sum'] = target.sum()
+        if func in ('std', 'var'):
+            squared = frame[name].astype(float) ** 2
+            out[f'{name}__sumsq'] = (squared.groupby([frame[k] for k in keys], sort=False,
+                                                     observed=True).sum()
+                                     if keys else squared.sum())
+        if func == 'min':
+            out[f'{name}__min'] = target.min()
+        if func == 'max':
+            out[f'{name}__max'] = target.max()
+    if keys:
+        return pd.DataFrame(out).reset_index()
+    return pd.DataFrame({k: [v] for k, v in out.items()})
+
+
+def _apply_filters(chunk, filters):
+    """Keep the rows of a chunk that satisfy every pushed-down predicate"""
+    if not filters:
+        return chunk
+    mask = pd.Series(True, index=chunk.index)
+    for predicate in filters:
+        mask &= _as_mask(predicate.evaluate(chunk), chunk)
+    return chunk[mask]
+
+
+def _apply_in_memory(frame, ops):
+    for op in ops:
+        if isinstance(op, Filter):
+            frame = frame[_as_mask(op.predicate.evaluate(frame), frame)]
+        elif isinstance(op, Select):
+            frame = frame[op.columns]
+        elif isinstance(op, Sort):
+            frame = frame.sort_values(op.by, ascending=not op.descending)
+        elif isinstance(op, Limit):
+            frame = frame.head(op.n)
+        elif isinstance(op, Aggregate):
+            frame = _streaming_aggregate(iter([frame]), op)
+    return frame.reset_index(drop=True)
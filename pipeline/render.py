@@ -0,0 +1,196 @@
+"""
+Render profiles for draft versus publication figures.
+
+Every figure used to be saved with dpi=300 and bbox_inches='tight', which
+makes quick iterations slow. A render profile bundles those settings and is
+selected once per run, either in code or with an environment variable:
+
+    PIPELINE_RENDER_PROFILE=draft jupyter nbconvert --execute eda.ipynb
+
+Profiles:
+    draft        72 dpi PNG, no tight-bbox pass, fast PNG compression and
+                 aggressive path simplification
+    publication  300 dpi PNG with a tight bounding box (the previous default)
+    vector       PDF with a tight bounding box (the path's extension is swapped)
+
+set_profile() also writes the profile into matplotlib's savefig rcParams, so a
+bare plt.savefig() follows it too.
+
+HistBoxTemplate is the histogram-plus-boxplot pair drawn per variable in
+eda.ipynb. It builds its figure once and only redraws the data for each
+variable, instead of creating a new figure in every loop iteration. The
+panels are drawn from pre-binned counts and box statistics
+(pipeline.binned), never from the raw rows.
+
+Example:
+    from pipeline import render
+
+    render.set_profile()  # PIPELINE_RENDER_PROFILE, default 'publication'
+    template = render.HistBoxTemplate()
+    for var in ['Glucose', 'BMI']:
+        template.draw(df_pima, var, 'Outcome')
+        template.save(f'Figures/pima_{var}_distribution.png')
+        template.show()
+"""
+
+import os
+
+import matplotlib as mpl
+from matplotlib.figure import Figure
+
+from pipeline import binned
+
+
+ENV_VAR = 'PIPELINE_RENDER_PROFILE'
+DEFAULT_PROFILE = 'publication'
+
+PROFILES = {
+    'draft': {
+        'dpi': 72,
+        'bbox_inches': None,
+        'format': 'png',
+        'pil_kwargs': {'compress_level': 1},
+        'rc': {'path.simplify': True, 'path.simplify_threshold': 1.0,
+               'agg.path.chunksize': 10000},
+    },
+    'publication': {
+        'dpi': 300,
+        'bbox_inches': 'tight',
+        'format': 'png',
+        'pil_kwargs': None,
+        'rc': {},
+    },
+    'vector': {
+        'dpi': 300,
+        'bbox_inches': 'tight',
+        'format': 'pdf',
+        'pil_kwargs': None,
+        'rc': {'pdf.fonttype': 42},
+    },
+}
+
+_active = None
+
+
+def _profile_rc(name):
+    """rc settings of a profile, with keys only other profiles set back to matplotlib's defaults
+
+    rcParams.update() only adds settings, so without the reset draft's path
+    simplification would stay on after switching to publication or vector.
+    """
+    keys = {key for profile in PROFILES.values() for key in profile['rc']}
+    rc = {key: mpl.rcParamsDefault[key] for key in keys}
+    rc.update(PROFILES[name]['rc'])
+    return rc
+
+
+def set_profile(name=None):
+    """Select the render profile for this run
+
+    Args:
+        name: 'draft', 'publication' or 'vector' (default: the
+            PIPELINE_RENDER_PROFILE environment variable, else 'publication')
+
+    Returns:
+        The profile name
+    """
+    global _active
+    name = name or os.environ.get(ENV_VAR) or DEFAULT_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"Unknown render profile '{name}'. Use one of: {', '.join(PROFILES)}")
+    profile = PROFILES[name]
+    mpl.rcParams.update(_profile_rc(name))
+    mpl.rcParams['savefig.dpi'] = profile['dpi']
+    mpl.rcParams['savefig.bbox'] = profile['bbox_inches']
+    mpl.rcParams['savefig.format'] = profile['format']
+    _active = name
+    return name
+
+
+def get_profile():
+    """Name of the active profile (selects the default on first use)"""
+    return _active or set_profile()
+
+
+def output_path(path, profile=None):
+    """Swap the file extension for the profile's output format"""
+    fmt = PROFILES[profile or get_profile()]['format']
+    root, ext = os.path.splitext(path)
+    return path if ext.lstrip('.').lower() == fmt else f'{root}.{fmt}'
+
+
+def savefig(path, fig=None, profile=None):
+    """Save a figure (default: the current pyplot figure) with the active profile
+
+    Returns:
+        The path actually written, which has the profile's extension
+    """
+    if fig is None:
+        import matplotlib.pyplot as plt
+        fig = plt.gcf()
+    name = profile or get_profile()
+    settings = PROFILES[name]
+    path = output_path(path, name)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    options = {'dpi': settings['dpi'], 'bbox_inches': settings['bbox_inches']}
+    if settings['pil_kwargs'] and settings['format'] == 'png':
+        options['pil_kwargs'] = settings['pil_kwargs']
+    with mpl.rc_context(_profile_rc(name)):
+        fig.savefig(path, **options)
+    return path
+
+
+def show(fig):
+    """Display a figure that is not managed by pyplot (no-op outside IPython)"""
+    try:
+        from IPython.display import display
+    except ImportError:
+        return
+    display(fig)
+
+
+class HistBoxTemplate:
+    """Reusable histogram-by-outcome plus boxplot-by-outcome figure
+
+    Args:
+        figsize: Figure size in inches
+        bins: Histogram bins per group
+        labels: Legend label per outcome value, in sorted outcome order
+        colors: Histogram colour per outcome value
+    """
+
+    def __init__(self, figsize=(14, 5), bins=30, labels=('No Diabetes', 'Diabetes'),
+                 colors=('skyblue', 'salmon')):
+        self.bins = bins
+        self.labels = labels
+        self.colors = colors
+        # Not registered with pyplot, so it is neither auto-shown nor closed
+        # by the inline backend and can be redrawn for every variable
+        self.fig = Figure(figsize=figsize, layout='tight')
+        self.hist_ax, self.box_ax = self.fig.subplots(1, 2)
+
+    def draw(self, df, var, by):
+        """Redraw both panels for column `var` split by the outcome column `by`"""
+        return self.draw_summary(binned.summarize(df, var, by, self.bins))
+
+    def draw_summary(self, summary):
+        """Redraw both panels from a pipeline.binned summary (no raw rows needed)"""
+        self.hist_ax.clear()
+        binned.plot_hist(self.hist_ax, summary, labels=self.labels, colors=self.colors)
+        self.hist_ax.set_title(f'{summary.var} Distribution by Outcome')
+        self.hist_ax.grid(True)
+        self.hist_ax.legend()
+
+        self.box_ax.clear()
+        binned.plot_box(self.box_ax, summary)
+        self.box_ax.set_xlabel(summary.by)
+        self.box_ax.set_title(f'{summary.var} by Diabetes Status')
+        self.box_ax.grid(True)
+        return self.fig
+
+    def save(self, path, profile=None):
+        """Save the current drawing; returns the path written"""
+        return savefig(path, fig=self.fig, profile=profile)
+
+    def show(self):
+        show(self.fig)
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Streaming mini-batch logistic risk model for BRFSS.
+
+Learns a diabetes risk score next to the hand-weighted Clinical_Risk_Score /
+Behavioral_Risk_Score sums. Training reads the data chunk by chunk (a
+DataFrame, a CSV path read with chunksize, or a callable returning chunks),
+so the full dataset never has to be in memory:
+  1. one pass accumulates per-feature mean and variance for standardization
+  2. each epoch runs L2-regularized logistic regression with Adam updates
+     on shuffled mini-batches, each one a single matrix-vector product
+     and its transpose; the weights are averaged over the last epoch, which
+     removes most of the mini-batch noise
+
+The coefficients are exported on the original feature scale, so scoring is
+one matrix-vector product plus a sigmoid; missing values are scored as the
+training mean.
+
+Example:
+    from pipeline.riskmodel import RiskModel, BRFSS_RISK_FEATURES
+
+    model = RiskModel(BRFSS_RISK_FEATURES).fit('new/indicator.csv', 'Diabetes_binary', epochs=3)
+    model.save('new/indicator_risk_model.json')
+    df_health['Model_Risk_Score'] = model.score(df_health)
+    print(model.coefficients())
+
+Usage:
+    python -m pipeline.riskmodel train <input_csv> <model_json> [outcome] [epochs]
+    python -m pipeline.riskmodel show <model_json>
+"""
+
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from pipeline.labels import read_csv
+from pipeline.query import DEFAULT_CHUNKSIZE
+
+
+# Columns of the cleaned BRFSS output (new/indicator.csv) used as predictors
+BRFSS_RISK_FEATURES = [
+    'HighBP', 'HighChol', 'BMI', 'Smoker', 'PhysActivity', 'HvyAlcoholConsump',
+    'AnyHealthcare', 'NoDocbcCost', 'GenHlth', 'Sex', 'Age', 'Education', 'Income',
+    'Fruits_or_Veggies',
+]
+
+ADAM_BETAS = (0.9, 0.999)
+ADAM_EPSILON = 1e-8
+
+
+def _sigmoid(z):
+    return 0.5 * (1.0 + np.tanh(0.5 * z))  # overflow-free logistic function
+
+
+def iter_chunks(data, columns, chunksize):
+    """DataFrame chunks with `columns` from a DataFrame, CSV path or chunk factory"""
+    if isinstance(data, pd.DataFrame):
+        for start in range(0, len(data), chunksize):
+            yield data.iloc[start:start + chunksize][columns]
+    elif isinstance(data, str):
+        with read_csv(data, usecols=columns, chunksize=chunksize) as reader:
+            yield from reader
+    elif callable(data):
+        for chunk in data():
+            yield chunk[columns]
+    else:
+        raise TypeError("data must be a DataFrame, a CSV path or a callable returning chunks")
+
+
+class RiskModel:
+    """L2-regularized logistic regression trained on streamed mini-batches
+
+    Args:
+        features: Predictor columns
+        l2: L2 penalty on the standardized coefficients (not the intercept)
+        learning_rate: Adam step size
+        batch_size: Rows per mini-batch update
+        seed: Random seed for the mini-batch shuffling
+    """
+
+    def __init__(self, features=None, l2=1e-4, learning_rate=0.05, batch_size=1024, seed=0):
+        self.features = list(features or BRFSS_RISK_FEATURES)
+        self.l2 = l2
+        self.learning_rate = learning_rate
+        self.batch_size = batch_size
+        self.seed = seed
+        self.outcome = None
+        self.mean = None
+        self.scale = None
+        self.coef = None        # original feature scale
+        self.intercept = None
+        self.history = []
+
+    def _matrix(self, frame):
+        """Float matrix of the features, missing values replaced by the training mean"""
+        missing = [c for c in self.features if c not in frame.columns]
+        if missing:
+            raise KeyError(f"Missing feature columns: {', '.join(missing)}")
+        X = frame[self.features].to_numpy(dtype=np.float64)
+        if self.mean is not None:
+            nan = np.isnan(X)
+            if nan.any():
+                X[nan] = np.broadcast_to(self.mean, X.shape)[nan]
+        return X
+
+    def _fit_scaler(self, data, chunksize):
+        count = np.zeros(len(self.features))
+        total = np.zeros(len(self.features))
+        squares = np.zeros(len(self.features))
+        rows = 0
+        for chunk in iter_chunks(data, self.features + [self.outcome], chunksize):
+            chunk = chunk.dropna(subset=[self.outcome])
+            X = chunk[self.features].to_numpy(dtype=np.float64)
+            valid = ~np.isnan(X)
+            count += valid.sum(axis=0)
+            total += np.where(valid, X, 0).sum(axis=0)
+            squares += np.where(valid, X ** 2, 0).sum(axis=0)
+            rows += len(chunk)
+        if not rows:
+            raise ValueError("No training rows with a known outcome")
+        self.mean = total / np.maximum(count, 1)
+        variance = squares / np.maximum(count, 1) - self.mean ** 2
+        std = np.sqrt(np.maximum(variance, 0))
+        self.scale = np.where(std > 0, std, 1.0)
+        return rows
+
+    def fit(self, data, outcome, epochs=3, chunksize=DEFAULT_CHUNKSIZE):
+        """Train on `data` (DataFrame, CSV path, or callable returning DataFrame chunks)
+
+        The data is streamed epochs + 1 times; only one chunk is held at a time.
+        """
+        if epochs < 1:
+            raise ValueError("epochs must be at least 1")
+        self.outcome = outcome
+        self.history = []
+        rows = self._fit_scaler(data, chunksize)
+        rng = np.random.default_rng(self.seed)
+        k = len(self.features)
+        w = np.zeros(k + 1)                 # standardized coefficients, intercept last
+        m = np.zeros(k + 1)
+        v = np.zeros(k + 1)
+        beta1, beta2 = ADAM_BETAS
+        penalty = np.r_[np.full(k, self.l2), 0.0]
+        step = 0
+        averaged = np.zeros(k + 1)
+        averaged_steps = 0
+
+        for epoch in range(epochs):
+            started = time.perf_counter()
+            loss = 0.0
+            for chunk in iter_chunks(data, self.features + [self.outcome], chunksize):
+                chunk = chunk.dropna(subset=[self.outcome])
+                y = chunk[self.outcome].to_numpy(dtype=np.float64)
+                X = np.empty((len(chunk), k + 1))
+                X[:, :k] = (self._matrix(chunk) - self.mean) / self.scale
+                X[:, k] = 1.0
+                order = rng.permutation(len(y))
+                for start in range(0, len(y), self.batch_size):
+                    batch = order[start:start + self.batch_size]
+                    Xb, yb = X[batch], y[batch]
+                    p = _sigmoid(Xb @ w)
+                    loss -= np.sum(yb * np.log(p + 1e-12) + (1 - yb) * np.log(1 - p + 1e-12))
+                    grad = Xb.T @ (p - yb) / len(yb) + penalty * w
+                    step += 1
+                    m = beta1 * m + (1 - beta1) * grad
+                    v = beta2 * v + (1 - beta2) * grad ** 2
+                    m_hat = m / (1 - beta1 ** step)
+                    v_hat = v / (1 - beta2 ** step)
+                    w -= self.learning_rate * m_hat / (np.sqrt(v_hat) + ADAM_EPSILON)
+                    if epoch == epochs - 1:
+                        averaged_steps += 1
+                        averaged += (w - averaged) / averaged_steps
+            self.history.append({'epoch': epoch + 1, 'rows': rows, 'log_loss': float(loss / rows),
+                                 'seconds': time.perf_counter() - started})
+
+        # Back to the original feature scale
+        w = averaged
+        self.coef = w[:k] / self.scale
+        self.intercept = float(w[k] - np.sum(w[:k] * self.mean / self.scale))
+        return self
+
+    def _check_fitted(self):
+        if self.coef is None:
+            raise ValueError("Model is not trained; call fit() or RiskModel.load()")
+
+    def linear(self, data):
+        """Log-odds for every row of a DataFrame or (rows x features) array"""
+        self._check_fitted()
+        if isinstance(data, pd.DataFrame):
+            X = self._matrix(data)
+        else:
+            X = np.asarray(data, dtype=np.float64)
+            if X.ndim != 2 or X.shape[1] != len(self.features):
+                raise ValueError(f"Expected an array with {len(self.features)} feature columns")
+            nan = np.isnan(X)
+            if nan.any():
+                X = np.where(nan, self.mean, X)
+        return X @ self.coef + self.intercept
+
+    def score(self, data):
+        """Predicted outcome probability for every row (vectorized)"""
+        return _sigmoid(self.linear(data))
+
+    def coefficients(self):
+        """Coefficients on the original scale plus odds ratio per one SD"""
+        self._check_fitted()
+        return pd.DataFrame({
+            'feature': self.features,
+            'coef': self.coef,
+            'odds_ratio_per_sd': np.exp(self.coef * self.scale),
+            'mean': self.mean,
+            'sd': self.scale,
+        }).sort_values('odds_ratio_per_sd', ascending=False, key=lambda s: np.abs(np.log(s)))
+
+    def to_dict(self):
+        self._check_fitted()
+        return {
+            'outcome': self.outcome,
+            'features': self.features,
+            'coefficients': self.coef.tolist(),
+            'intercept': self.intercept,
+            'mean': self.mean.tolist(),
+            'scale': self.scale.tolist(),
+            'l2': self.l2,
+            'learning_rate': self.learning_rate,
+            'batch_size': self.batch_size,
+            'history': self.history,
+        }
+
+    def save(self, path):
+        """Write the coefficients (and training settings) as JSON"""
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """Model saved with save()"""
+        with open(path) as f:
+            spec = json.load(f)
+        model = cls(spec['features'], l2=spec['l2'], learning_rate=spec['learning_rate'],
+                    batch_size=spec['batch_size'])
+        model.outcome = spec['outcome']
+        model.coef = np.array(spec['coefficients'])
+        model.intercept = spec['intercept']
+        model.mean = np.array(spec['mean'])
+        model.scale = np.array(spec['scale'])
+        model.history = spec.get('history', [])
+        return model
+
+    def __repr__(self):
+        state = f"trained on {self.history[-1]['rows']:,} rows" if self.history else (
+            'loaded' if self.coef is not None else 'untrained')
+        return f"RiskModel({len(self.features)} features, outcome={self.outcome!r}, {state})"
+
+
+def main():
+    """Train a model on a CSV and save it, or show a saved model"""
+    usage = ("Usage: python -m pipeline.riskmodel train <input_csv> <model_json> [outcome] [epochs]\n"
+             "       python -m pipeline.riskmodel show <model_json>")
+    if len(sys.argv) < 3 or sys.argv[1] not in ('train', 'show'):
+        print(usage)
+        sys.exit(1)
+
+    try:
+        if sys.argv[1] == 'train':
+            if len(sys.argv) < 4 or len(sys.argv) > 6:
+                print(usage)
+                sys.exit(1)
+            input_file, model_file = sys.argv[2], sys.argv[3]
+            outcome = sys.argv[4] if len(sys.argv) > 4 else 'Diabetes_binary'
+            epochs = int(sys.argv[5]) if len(sys.argv) > 5 else 3
+            model = RiskModel().fit(input_file, outcome, epochs=epochs)
+            model.save(model_file)
+            for entry in model.history:
+                print(f"  epoch {entry['epoch']}: log loss {entry['log_loss']:.4f} "
+                      f"({entry['seconds']:.2f}s)")
+            print(f"✓ Saved model to {model_file}")
+        else:
+            model_file = sys.argv[2]
+            model = RiskModel.load(model_file)
+    except FileNotFoundError as e:
+        print(f"✗ Error: File '{e.filename}' not found")
+        sys.exit(1)
+    except (KeyError, ValueError) as e:
+        print(f"✗ Error: {e}")
+        sys.exit(1)
+
+    print(f"\n{model} -> {model_file}")
+    print(model.coefficients().to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Persistent run history for the cleaning and summary pipelines.
+
+Every run appends its row counts, dropped-row reasons, column statistics and
+step timings to a local SQLite file, so two runs can be compared without
+re-reading any CSV or diffing text reports.
+
+Usage (recording):
+    from pipeline.runlog import RunLog
+
+    with RunLog().run('brfss', 'clean', input_file=path) as run:
+        with run.step('remove_duplicates'):
+            ...
+        run.add_drop('duplicates', removed)
+        run.set_rows(rows_in, rows_out)
+        run.add_column_stats(df)
+
+Usage (querying):
+    python -m pipeline.runlog list [dataset] [stage]
+    python -m pipeline.runlog show <run_id>
+    python -m pipeline.runlog diff <run_id_a> <run_id_b>
+"""
+
+import os
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+
+# At the repo root, wherever a script is run from (PIPELINE_RUN_HISTORY overrides)
+DEFAULT_DB_PATH = os.environ.get(
+    'PIPELINE_RUN_HISTORY',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'run_history.sqlite'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    dataset     TEXT NOT NULL,
+    stage       TEXT NOT NULL,
+    started_at  TEXT NOT NULL,
+    finished_at TEXT,
+    seconds     REAL,
+    status      TEXT NOT NULL,
+    input_file  TEXT,
+    output_file TEXT,
+    rows_in     INTEGER,
+    rows_out    INTEGER,
+    note        TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_dataset ON runs (dataset);
+CREATE INDEX IF NOT EXISTS idx_runs_stage ON runs (stage);
+CREATE INDEX IF NOT EXISTS idx_runs_started_at ON runs (started_at);
+CREATE INDEX IF NOT EXISTS idx_runs_dataset_stage_time ON runs (dataset, stage, started_at);
+
+CREATE TABLE IF NOT EXISTS drops (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    rule   TEXT NOT NULL,
+    rows   INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_drops_run ON drops (run_id);
+
+CREATE TABLE IF NOT EXISTS column_stats (
+    run_id   INTEGER NOT NULL REFERENCES runs (run_id),
+    column   TEXT NOT NULL,
+    dtype    TEXT,
+    count    INTEGER,
+    nulls    INTEGER,
+    distinct_values INTEGER,
+    mean     REAL,
+    std      REAL,
+    min      REAL,
+    median   REAL,
+    max      REAL
+);
+CREATE INDEX IF NOT EXISTS idx_column_stats_run ON column_stats (run_id);
+
+CREATE TABLE IF NOT EXISTS timings (
+    run_id  INTEGER NOT NULL REFERENCES runs (run_id),
+    step    TEXT NOT NULL,
+    seconds REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_timings_run ON timings (run_id);
+"""
+
+
+class Run:
+    """Collects the statistics of one pipeline run until it is committed"""
+
+    def __init__(self, dataset, stage, input_file=None, output_file=None, note=None):
+        self.dataset = dataset
+        self.stage = stage
+        self.input_file = input_file
+        self.output_file = output_file
+        self.note = note
+        self.rows_in = None
+        self.rows_out = None
+        self.drops = []
+        self.columns = []
+        self.timings = []
+        self.run_id = None
+
+    def set_rows(self, rows_in=None, rows_out=None):
+        if rows_in is not None:
+            self.rows_in = int(rows_in)
+        if rows_out is not None:
+            self.rows_out = int(rows_out)
+
+    def add_drop(self, rule, rows):
+        """Record how many rows a named rule removed"""
+        self.drops.append((rule, int(rows)))
+
+    def add_timing(self, step, seconds):
+        self.timings.append((step, float(seconds)))
+
+    @contextmanager
+    def step(self, name):
+        """Time a block of work under a step name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_timing(name, time.perf_counter() - start)
+
+    def add_column_stats(self, df):
+        """Record per-column statistics of a DataFrame"""
+        for name in df.columns:
+            series = df[name]
+            row = {'column': name, 'dtype': str(series.dtype),
+                   'count': int(series.count()), 'nulls': int(series.isnull().sum()),
+                   'distinct_values': int(series.nunique()),
+                   'mean': None, 'std': None, 'min': None, 'median': None, 'max': None}
+            if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+                values = series.dropna()
+                if len(values):
+                    row.update(mean=float(values.mean()), std=_float(values.std()),
+                               min=float(values.min()), median=float(values.median()),
+                               max=float(values.max()))
+            self.columns.append(row)
+
+    def add_profile(self, profile):
+        """Record column statistics from a pipeline.profile.DatasetProfile"""
+        for name in profile.columns:
+            p = profile[name]
+            row = {'column': name, 'dtype': 'numeric' if p.numeric else 'categorical',
+                   'count': p.count, 'nulls': p.nulls, 'distinct_values': p.distinct_count(),
+                   'mean': None, 'std': None, 'min': None, 'median': None, 'max': None}
+            if p.numeric and p.count:
+                row.update(mean=p.moments.mean, std=_float(p.moments.std()),
+                           min=p.moments.min, median=p.quantiles.quantiles([0.5])[0],
+                           max=p.moments.max)
+            self.columns.append(row)
+
+
+class RunLog:
+    """SQLite-backed store of pipeline runs
+
+    Args:
+        path: SQLite file (created on first use)
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+
+    def connect(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Same setup as the memo index: batch variants record runs concurrently
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript(SCHEMA)
+        return conn
+
+    @contextmanager
+    def run(self, dataset, stage, input_file=None, output_file=None, note=None):
+        """Record a run; statistics are written when the block exits"""
+        run = Run(dataset, stage, input_file, output_file, note)
+        started_at = datetime.now().isoformat(timespec='seconds')
+        start = time.perf_counter()
+        status = 'ok'
+        try:
+            yield run
+        except BaseException:
+            status = 'failed'
+            raise
+        finally:
+            self._write(run, started_at, time.perf_counter() - start, status)
+
+    def _write(self, run, started_at, seconds, status):
+        conn = self.connect()
+        try:
+            with conn:
+                cursor = conn.execute(
+                    "INSERT INTO runs (dataset, stage, started_at, finished_at, seconds, status,"
+                    " input_file, output_file, rows_in, rows_out, note)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (run.dataset, run.stage, started_at,
+                     datetime.now().isoformat(timespec='seconds'), seconds, status,
+                     run.input_file, run.output_file, run.rows_in, run.rows_out, run.note))
+                run.run_id = cursor.lastrowid
+                conn.executemany("INSERT INTO drops (run_id, rule, rows) VALUES (?, ?, ?)",
+                                 [(run.run_id, rule, rows) for rule, rows in run.drops])
+                conn.executemany("INSERT INTO timings (run_id, step, seconds) VALUES (?, ?, ?)",
+                                 [(run.run_id, step, secs) for step, secs in run.timings])
+                conn.executemany(
+                    "INSERT INTO column_stats (run_id, column, dtype, count, nulls, distinct_values,"
+                    " mean, std, min, median, max) VALUES (:run_id, :column, :dtype, :count, :nulls,"
+                    " :distinct_values, :mean, :std, :min, :median, :max)",
+                    [dict(row, run_id=run.run_id) for row in run.columns])
+        finally:
+            conn.close()
+
+    # ----- queries -----
+
+    def _query(self, sql, params=()):
+        conn = self.connect()
+        try:
+            return pd.read_sql_query(sql, conn, params=params)
+        finally:
+            conn.close()
+
+    def runs(self, dataset=None, stage=None, limit=50):
+        sql = "SELECT * FROM runs WHERE 1=1"
+        params = []
+        if dataset:
+            sql += " AND dataset = ?"
+            params.append(dataset)
+        if stage:
+            sql += " AND stage = ?"
+            params.append(stage)
+        sql += " ORDER BY started_at DESC, run_id DESC LIMIT ?"
+        params.append(limit)
+        return self._query(sql, params)
+
+    def latest(self, dataset, stage, before=None):
+        """run_id of the most recent run of a dataset/stage (optionally before a run)"""
+        sql = "SELECT run_id FROM runs WHERE dataset = ? AND stage = ?"
+        params = [dataset, stage]
+        if before is not None:
+            sql += " AND run_id < ?"
+            params.append(before)
+        sql += " ORDER BY started_at DESC, run_id DESC LIMIT 1"
+        found = self._query(sql, params)
+        return int(found['run_id'].iloc[0]) if len(found) else None
+
+    def get(self, run_id):
+        runs = self._query("SELECT * FROM runs WHERE run_id = ?", (run_id,))
+        if runs.empty:
+            raise KeyError(f"No run with id {run_id}")
+        return {
+            'run': runs.iloc[0],
+            'drops': self._query("SELECT rule, rows FROM drops WHERE run_id = ?", (run_id,)),
+            'columns': self._query("SELECT * FROM column_stats WHERE run_id = ?", (run_id,))
+                           .drop(columns='run_id'),
+            'timings': self._query("SELECT step, seconds FROM timings WHERE run_id = ?", (run_id,)),
+        }
+
+    def diff(self, run_a, run_b):
+        """Compare two runs; returns DataFrames for summary, drops, columns and timings"""
+        a, b = self.get(run_a), self.get(run_b)
+
+        fields = ['dataset', 'stage', 'started_at', 'status', 'rows_in', 'rows_out', 'seconds']
+        summary = pd.DataFrame({f'run {run_a}': a['run'][fields], f'run {run_b}': b['run'][fields]})
+
+        drops = _side_by_side(a['drops'].groupby('rule')['rows'].sum(),
+                              b['drops'].groupby('rule')['rows'].sum(), run_a, run_b)
+        timings = _side_by_side(a['timings'].groupby('step')['seconds'].sum(),
+                                b['timings'].groupby('step')['seconds'].sum(), run_a, run_b)
+
+        stats = ['count', 'nulls', 'distinct_values', 'mean', 'std', 'min', 'median', 'max']
+        cols_a = a['columns'].set_index('column')[stats]
+        cols_b = b['columns'].set_index('column')[stats]
+        columns = cols_a.join(cols_b, how='outer', lsuffix=f'_{run_a}', rsuffix=f'_{run_b}')
+        ordered = []
+        for stat in stats:
+            ordered += [f'{stat}_{run_a}', f'{stat}_{run_b}']
+            if stat in ('count', 'nulls', 'mean', 'std'):
+                columns[f'{stat}_delta'] = columns[f'{stat}_{run_b}'] - columns[f'{stat}_{run_a}']
+                ordered.append(f'{stat}_delta')
+        columns = columns[ordered]
+        columns['added_or_removed'] = np.where(
+            cols_a.reindex(columns.index)['count'].isnull(), 'added',
+            np.where(cols_b.reindex(columns.index)['count'].isnull(), 'removed', ''))
+
+        return {'summary': summary, 'drops': drops, 'columns': columns, 'timings': timings}
+
+
+def _side_by_side(left, right, name_a, name_b):
+    frame = pd.DataFrame({f'run {name_a}': left, f'run {name_b}': right}).fillna(0)
+    frame['delta'] = frame[f'run {name_b}'] - frame[f'run {name_a}']
+    return frame
+
+
+def _float(value):
+    return None if value is None or pd.isnull(value) else float(value)
+
+
+# ============================================
+# COMMAND LINE
+# ============================================
+
+def _print_section(title, frame):
+    print("\n" + title)
+    print("-" * 60)
+    print(frame.to_string() if len(frame) else "  (none)")
+
+
+def main():
+    usage = ("Usage:\n"
+             "  python -m pipeline.runlog list [dataset] [stage]\n"
+             "  python -m pipeline.runlog show <run_id>\n"
+             "  python -m pipeline.runlog diff <run_id_a> [run_id_b]\n"
+             "\nWith one id, diff compares against the previous run of the same dataset/stage.\n"
+             f"Store: {DEFAULT_DB_PATH} (override with PIPELINE_RUN_HISTORY)")
+    if len(sys.argv) < 2 or sys.argv[1] not in ('list', 'show', 'diff'):
+        print(usage)
+        sys.exit(1)
+
+    log = RunLog()
+    command, args = sys.argv[1], sys.argv[2:]
+    try:
+        if command == 'list':
+            runs = log.runs(*args[:2])
+            columns = ['run_id', 'dataset', 'stage', 'started_at', 'status',
+                       'rows_in', 'rows_out', 'seconds']
+            print(runs[columns].to_string(index=False) if len(runs) else "No runs recorded yet")
+
+        elif command == 'show':
+            if len(args) != 1:
+                print(usage)
+                sys.exit(1)
+            run = log.get(int(args[0]))
+            _print_section(f"RUN {args[0]}", run['run'].to_frame('value'))
+            _print_section("DROPPED ROWS", run['drops'])
+            _print_section("TIMINGS", run['timings'])
+            _print_section("COLUMN STATISTICS", run['columns'].set_index('column'))
+
+        else:
+            if len(args) not in (1, 2):
+                print(usage)
+                sys.exit(1)
+            run_b = int(args[-1])
+            if len(args) == 2:
+                run_a = int(args[0])
+            else:
+                current = log.get(run_b)['run']
+                run_a = log.latest(current['dataset'], current['stage'], before=run_b)
+                if run_a is None:
+                    print(f"✗ Error: no earlier run of {current['dataset']}/{current['stage']}")
+                    sys.exit(1)
+            result = log.diff(run_a, run_b)
+            _print_section(f"RUN {run_a} vs RUN {run_b}", result['summary'])
+            _print_section("DROPPED ROWS BY RULE", result['drops'])
+            _print_section("TIMINGS", result['timings'])
+            _print_section("COLUMN STATISTICS", result['columns'])
+    except (KeyError, ValueError) as e:
+        print(f"✗ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
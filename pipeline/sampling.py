@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+One-pass stratified sampling with per-stratum reservoirs.
+
+Every row gets a random key (Exp(1) / weight) and each stratum keeps only
+the rows with the smallest keys seen so far (a bottom-k reservoir). The k
+smallest keys of a stratum are a uniform sample of size k without
+replacement (weighted, when a weight column is given), and the smaller
+requested sizes are simply prefixes of the same reservoir, so several sample
+sizes come out of a single pass. Memory holds at most
+max(sizes) rows per stratum, never the full input.
+
+Usage:
+    python -m pipeline.sampling <input_csv> <strata_columns> <sizes> [output_prefix]
+
+Example (the balanced 5k/5k sample that deprecated/code/clean-data.py draws):
+    python -m pipeline.sampling data/diabetes_binary_health_indicators_BRFSS2015.csv \\
+        Diabetes_binary 5000,1000 cdc_diabetes_sample
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from pipeline import labels
+
+
+DEFAULT_CHUNKSIZE = 200_000
+KEY_COLUMN = '__sample_key'
+
+
+class StratifiedReservoirSampler:
+    """Streaming stratified sampler producing several sample sizes at once
+
+    Args:
+        strata: Column name or list of column names defining the strata
+        sizes: Sample size(s) to draw from each stratum
+        seed: Seed for reproducible samples (same input + seed = same sample)
+        weight_column: Optional column of non-negative sampling weights
+    """
+
+    def __init__(self, strata, sizes, seed=42, weight_column=None):
+        self.strata = [strata] if isinstance(strata, str) else list(strata)
+        self.sizes = sorted({int(size) for size in ([sizes] if np.isscalar(sizes) else sizes)},
+                            reverse=True)
+        if not self.sizes or self.sizes[-1] <= 0:
+            raise ValueError("Sample sizes must be positive integers")
+        self.capacity = self.sizes[0]
+        self.seed = seed
+        self.weight_column = weight_column
+        self.rng = np.random.default_rng(seed)
+        self.reservoir = None
+        self.population = None
+        self.rows_seen = 0
+
+    def update(self, chunk):
+        """Offer one chunk of rows to the reservoirs"""
+        self.rows_seen += len(chunk)
+        # Uniform draws (not standard_exponential) keep the key stream
+        # independent of the chunk size, so samples only depend on the seed.
+        keys = -np.log(1.0 - self.rng.random(len(chunk)))
+        if self.weight_column is not None:
+            weights = chunk[self.weight_column].to_numpy(dtype=float)
+            with np.errstate(divide='ignore'):
+                keys = np.where(weights > 0, keys / weights, np.inf)
+
+        counts = chunk.groupby(self.strata, dropna=False, observed=True).size()
+        self.population = counts if self.population is None else \
+            self.population.add(counts, fill_value=0).astype('int64')
+
+        candidates = chunk.assign(**{KEY_COLUMN: keys})
+        candidates = candidates[np.isfinite(keys)]
+        if self.reservoir is not None and len(self.reservoir):
+            candidates = self._below_threshold(candidates)
+            candidates = pd.concat([self.reservoir, candidates], ignore_index=True)
+
+        candidates = candidates.sort_values(KEY_COLUMN, kind='mergesort')
+        self.reservoir = (candidates.groupby(self.strata, dropna=False, sort=False, observed=True)
+                          .head(self.capacity)
+                          .reset_index(drop=True))
+
+    def _below_threshold(self, candidates):
+        """Drop rows that cannot enter an already-full stratum reservoir"""
+        grouped = self.reservoir.groupby(self.strata, dropna=False, observed=True)[KEY_COLUMN]
+        full = grouped.size() >= self.capacity
+        if not full.any():
+            return candidates
+        thresholds = grouped.max()[full].rename('__threshold').reset_index()
+        merged = candidates.merge(thresholds, on=self.strata, how='left')
+        keep = merged['__threshold'].isnull() | (merged[KEY_COLUMN] < merged['__threshold'])
+        return merged.loc[keep.to_numpy()].drop(columns='__threshold')
+
+    def samples(self, shuffle=True):
+        """Return {size: DataFrame} with up to `size` rows per stratum"""
+        if self.reservoir is None:
+            return {size: pd.DataFrame() for size in self.sizes}
+        ordered = self.reservoir.sort_values(KEY_COLUMN, kind='mergesort')
+        out = {}
+        for size in self.sizes:
+            sample = (ordered.groupby(self.strata, dropna=False, sort=False, observed=True)
+                      .head(size)
+                      .drop(columns=KEY_COLUMN))
+            if shuffle:
+                sample = sample.sample(frac=1, random_state=self.seed)
+            out[size] = sample.reset_index(drop=True)
+        return out
+
+    def summary(self):
+        """Population and sampled counts per stratum"""
+        if self.population is None:
+            return pd.DataFrame()
+        summary = self.population.rename('population').to_frame()
+        kept = self.reservoir.groupby(self.strata, dropna=False, observed=True).size()
+        for size in self.sizes:
+            summary[f'sample_{size}'] = np.minimum(kept.reindex(summary.index).fillna(0), size).astype(int)
+        return summary
+
+
+def stratified_sample_csv(path, strata, sizes, seed=42, weight_column=None,
+                          chunksize=DEFAULT_CHUNKSIZE, **read_options):
+    """Draw stratified samples of several sizes from a CSV in one streaming pass
+
+    Args:
+        path: CSV file to sample
+        strata: Column or list of columns defining the strata
+        sizes: Per-stratum sample size(s)
+        seed: Random seed
+        weight_column: Optional column of sampling weights
+        chunksize: Rows read per chunk
+        read_options: Extra keyword arguments passed to pd.read_csv (label columns
+            written by pipeline.labels come back as ordered categoricals)
+
+    Returns:
+        (samples, summary) where samples maps each size to a DataFrame
+    """
+    sampler = StratifiedReservoirSampler(strata, sizes, seed=seed, weight_column=weight_column)
+    for chunk in labels.read_csv(path, chunksize=chunksize, **read_options):
+        sampler.update(chunk)
+    return sampler.samples(), sampler.summary()
+
+
+def main():
+    """Write one balanced sample file per requested size"""
+    if len(sys.argv) not in (4, 5):
+        print("Usage: python -m pipeline.sampling <input_csv> <strata_columns> <sizes> [output_prefix]")
+        print("Example: python -m pipeline.sampling cdc.csv Diabetes_binary 5000,1000 cdc_diabetes_sample")
+        print("\nstrata_columns and sizes are comma-separated; sizes are per stratum.")
+        sys.exit(1)
+
+    input_file = sys.argv[1]
+    strata = sys.argv[2].split(',')
+    sizes = [int(size) for size in sys.argv[3].split(',')]
+    prefix = sys.argv[4] if len(sys.argv) == 5 else f"{os.path.splitext(input_file)[0]}_sample"
+
+    try:
+        samples, summary = stratified_sample_csv(input_file, strata, sizes)
+    except FileNotFoundError:
+        print(f"✗ Error: File '{input_file}' not found")
+        sys.exit(1)
+    except (KeyError, ValueError) as e:
+        print(f"✗ Error: {e}")
+        sys.exit(1)
+
+    print("Strata:")
+    print(summary.to_string())
+    print("\n✅ SAVED:")
+    for size, sample in samples.items():
+        output_file = f"{prefix}_{size}.csv"
+        labels.to_csv(sample, output_file)
+        print(f"  '{output_file}' - {len(sample):,} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Cached schema inference and column mapping for heterogeneous sources.
+
+The world sources name their columns differently ("Entity" / "Country Name",
+"Diabetes prevalence (% of population ages 20 to 79)" / "Value", ...). Instead
+of loading the whole file and then guessing roles with substring tests, the
+schema is inferred from the header and a sample of rows:
+  - role of each column: entity, code, year, value, measure or label
+    (name hints first, as in clean-data.py, then the sampled values:
+    3-letter upper-case codes, whole numbers between 1800 and 2100, ...)
+  - dtype of each column as read from the sample
+
+The result is stored as JSON under a fingerprint of the header, so a repeat
+ingest of a source with the same shape reads only the header, skips the
+inference and reads the file with exact usecols and dtypes. If the cached
+dtypes no longer fit the data (e.g. missing values in an integer column
+beyond the sample), the schema is inferred again from the whole file and the
+cache entry is replaced.
+
+    PIPELINE_CACHE_DIR   schemas are stored in <cache dir>/schemas
+
+Example:
+    from pipeline.schema import infer_schema, ROLE_NAMES
+
+    schema = infer_schema('raw/world_diabetes.csv')
+    df = schema.read('raw/world_diabetes.csv', rename=ROLE_NAMES)   # Entity, Code, Year, ...
+    value_col = schema.column('value')
+
+Usage:
+    python -m pipeline.schema <input_csv> [sample_rows]
+"""
+
+import json
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+from pipeline.memo import DEFAULT_CACHE_DIR, fingerprint
+
+
+# Bump when the inference rules change, so cached schemas are inferred again
+SCHEMA_VERSION = 1
+SAMPLE_ROWS = 1_000
+ROLES = ('entity', 'code', 'year', 'value', 'measure', 'label')
+
+# Header substrings per role, tried in this order (the clean-data.py rules)
+NAME_HINTS = [
+    ('entity', ('entity', 'country')),
+    ('year', ('year',)),
+    ('code', ('code',)),
+    ('value', ('diabetes', 'prevalence')),
+]
+
+# Canonical column names for the roles shared by the world notebooks and scripts
+ROLE_NAMES = {'entity': 'Entity', 'code': 'Code', 'year': 'Year'}
+
+YEAR_RANGE = (1800, 2100)
+CODE_PATTERN = re.compile(r'^(?:[A-Z]{2,3}|OWID_[A-Z]+)$')
+
+
+def _role_from_values(values, dtype):
+    """Role suggested by the sampled values alone (None if undecided)"""
+    values = values.dropna()
+    if values.empty:
+        return None
+    if pd.api.types.is_numeric_dtype(dtype):
+        whole = np.all(np.mod(values, 1) == 0)
+        if whole and values.between(*YEAR_RANGE).all() and values.nunique() <= 300:
+            return 'year'
+        return 'measure'
+    text = values.astype(str)
+    if text.str.match(CODE_PATTERN).mean() >= 0.9:
+        return 'code'
+    return 'label'
+
+
+def infer_columns(sample):
+    """Role and dtype of every column of a sample DataFrame
+
+    Each of entity, code, year and value is given to at most one column:
+    header hints win over the values, and the first candidate wins. Of the
+    remaining text columns the one with the most distinct values becomes the
+    entity, and the first numeric one the value.
+
+    Returns:
+        list of {'name', 'role', 'dtype'} in file order
+    """
+    roles = {}
+    taken = set()
+    for role, hints in NAME_HINTS:
+        for column in sample.columns:
+            if column not in roles and any(hint in str(column).lower() for hint in hints):
+                roles[column] = role
+                taken.add(role)
+                break
+
+    guesses = {column: _role_from_values(sample[column], sample[column].dtype)
+               for column in sample.columns if column not in roles}
+    for role in ('year', 'code'):
+        for column, guess in guesses.items():
+            if role not in taken and guess == role and column not in roles:
+                roles[column] = role
+                taken.add(role)
+    if 'entity' not in taken:
+        text = [c for c, guess in guesses.items() if c not in roles and guess == 'label']
+        if text:
+            roles[max(text, key=lambda c: sample[c].nunique())] = 'entity'
+            taken.add('entity')
+    for column, guess in guesses.items():
+        if column in roles:
+            continue
+        if guess in ('year', 'measure'):
+            roles[column] = 'value' if 'value' not in taken else 'measure'
+            taken.add('value')
+        else:
+            roles[column] = 'label'
+
+    columns = []
+    for column in sample.columns:
+        dtype = sample[column].dtype
+        if roles[column] in ('entity', 'code', 'label') or not pd.api.types.is_numeric_dtype(dtype):
+            dtype = 'object'
+        elif pd.api.types.is_integer_dtype(dtype):
+            dtype = 'int64'
+        else:
+            dtype = 'float64'
+        columns.append({'name': column, 'role': roles[column], 'dtype': dtype})
+    return columns
+
+
+class Schema:
+    """Column roles and dtypes of one source shape
+
+    Args:
+        columns: list of {'name', 'role', 'dtype'} (see infer_columns)
+        key: Fingerprint of the header the schema was inferred for
+        sample_rows: Rows the inference looked at (None = whole file)
+        cached: True if the schema was loaded from the cache
+    """
+
+    def __init__(self, columns, key=None, sample_rows=None, cached=False):
+        self.columns = list(columns)
+        self.key = key
+        self.sample_rows = sample_rows
+        self.cached = cached
+
+    @property
+    def names(self):
+        return [c['name'] for c in self.columns]
+
+    def column(self, role):
+        """Name of the (first) column with the given role, or None"""
+        if role not in ROLES:
+            raise ValueError(f"Unknown role '{role}'. Use one of: {', '.join(ROLES)}")
+        return next((c['name'] for c in self.columns if c['role'] == role), None)
+
+    def usecols(self, roles=None):
+        """Column names, limited to the given roles if any"""
+        return [c['name'] for c in self.columns if roles is None or c['role'] in roles]
+
+    def dtypes(self, roles=None):
+        return {c['name']: c['dtype'] for c in self.columns if roles is None or c['role'] in roles}
+
+    def require(self, *roles):
+        """Raise KeyError unless every role has a column"""
+        missing = [role for role in roles if self.column(role) is None]
+        if missing:
+            raise KeyError(f"No column found for role(s): {', '.join(missing)}. "
+                           f"Available: {', '.join(map(str, self.names))}")
+        return self
+
+    def read(self, path, roles=None, rename=None, **read_options):
+        """Read a CSV with exact usecols and dtypes
+
+        Args:
+            path: CSV file with the header this schema was inferred for
+            roles: Only read columns with these roles (default: all)
+            rename: {role: new column name}, e.g. ROLE_NAMES
+            **read_options: Passed on to pd.read_csv
+        """
+        df = pd.read_csv(path, usecols=self.usecols(roles), dtype=self.dtypes(roles),
+                         **read_options)
+        if rename:
+            df = df.rename(columns={self.column(role): name for role, name in rename.items()
+                                    if self.column(role) is not None})
+        return df
+
+    def to_dict(self):
+        return {'version': SCHEMA_VERSION, 'key': self.key, 'sample_rows': self.sample_rows,
+                'columns': self.columns}
+
+    def to_frame(self):
+        return pd.DataFrame(self.columns, columns=['name', 'role', 'dtype'])
+
+    def __repr__(self):
+        roles = ', '.join(f"{c['role']}={c['name']!r}" for c in self.columns
+                          if c['role'] in ('entity', 'code', 'year', 'value'))
+        return f"Schema({len(self.columns)} columns, {roles}{', cached' if self.cached else ''})"
+
+
+class SchemaCache:
+    """Inferred schemas as JSON files named by header fingerprint
+
+    Args:
+        directory: Cache directory (default: <PIPELINE_CACHE_DIR>/schemas)
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.path.join(
+            os.environ.get('PIPELINE_CACHE_DIR', DEFAULT_CACHE_DIR), 'schemas')
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, key):
+        """Cached Schema for a header fingerprint, or None"""
+        try:
+            with open(self._path(key)) as f:
+                spec = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if spec.get('version') != SCHEMA_VERSION:
+            return None
+        return Schema(spec['columns'], key=key, sample_rows=spec.get('sample_rows'), cached=True)
+
+    def put(self, schema):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(schema.key)
+        temp = f'{path}.{os.getpid()}.tmp'
+        with open(temp, 'w') as f:
+            json.dump(schema.to_dict(), f, indent=2, default=str)
+        os.replace(temp, path)  # atomic, so concurrent readers never see half a file
+        return path
+
+
+def header_key(columns):
+    """Fingerprint of a source shape (its ordered column names)"""
+    return fingerprint('schema', SCHEMA_VERSION, [str(c) for c in columns])
+
+
+def infer_schema(path, sample_rows=SAMPLE_ROWS, cache=None, refresh=False, **read_options):
+    """Schema of a CSV file, from the cache when its header was seen before
+
+    Only the header is read on a cache hit; on a miss the header and
+    `sample_rows` rows (None = whole file) are read and the result is cached.
+
+    Args:
+        path: CSV file
+        sample_rows: Rows sampled for the inference
+        cache: SchemaCache (default: the one under PIPELINE_CACHE_DIR)
+        refresh: Infer again even if the header is cached
+        **read_options: Passed on to pd.read_csv (e.g. sep)
+    """
+    cache = cache or SchemaCache()
+    header = pd.read_csv(path, nrows=0, **read_options).columns
+    key = header_key(header)
+    if not refresh:
+        schema = cache.get(key)
+        if schema is not None:
+            return schema
+    sample = pd.read_csv(path, nrows=sample_rows, **read_options)
+    schema = Schema(infer_columns(sample), key=key, sample_rows=sample_rows)
+    cache.put(schema)
+    return schema
+
+
+def read_with_schema(path, roles=None, rename=None, sample_rows=SAMPLE_ROWS, cache=None,
+                     **read_options):
+    """Read a CSV with its (cached) schema; returns (DataFrame, Schema)
+
+    If the cached dtypes fail on the full file, the schema is inferred again
+    from the whole file, cached, and the file is read with it.
+    """
+    cache = cache or SchemaCache()
+    schema = infer_schema(path, sample_rows, cache, **read_options)
+    try:
+        return schema.read(path, roles, rename, **read_options), schema
+    except (ValueError, TypeError):
+        if schema.sample_rows is None:
+            raise
+    schema = infer_schema(path, None, cache, refresh=True, **read_options)
+    return schema.read(path, roles, rename, **read_options), schema
+
+
+def main():
+    """Print the inferred (or cached) schema of a CSV file"""
+    if len(sys.argv) < 2 or len(sys.argv) > 3:
+        print("Usage: python -m pipeline.schema <input_csv> [sample_rows]")
+        sys.exit(1)
+
+    input_file = sys.argv[1]
+    try:
+        sample_rows = int(sys.argv[2]) if len(sys.argv) > 2 else SAMPLE_ROWS
+        schema = infer_schema(input_file, sample_rows)
+    except FileNotFoundError:
+        print(f"✗ Error: File '{input_file}' not found")
+        sys.exit(1)
+    except (KeyError, ValueError) as e:
+        print(f"✗ Error: {e}")
+        sys.exit(1)
+
+    source = 'cache' if schema.cached else f'{schema.sample_rows or "all"} sampled rows'
+    print(f"✓ Schema of {input_file} ({source}, key {schema.key[:12]})")
+    print(schema.to_frame().to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Streaming batch scoring of the clinical and behavioral risk scores.
+
+Reads records from a CSV file or stdin in chunks, adds the risk scores with
+vectorized kernels (the same definitions as pima.ipynb / indicator.ipynb),
+and streams the scored rows to a file or stdout. Only one chunk is in memory
+at a time, so very large extracts can be scored inside shell pipelines.
+Progress and throughput go to stderr, so stdout carries only data.
+
+    pima:  Clinical_Risk_Score   = BMI > 30 + Glucose > 125 + BloodPressure > 90 + Age > 35
+    brfss: Behavioral_Risk_Score = no PhysActivity + Smoker + HvyAlcoholConsump
+                                   + no Fruits_or_Veggies
+           Healthcare_Barrier    = no AnyHealthcare + NoDocbcCost
+
+With a model saved by pipeline.riskmodel, Model_Risk_Score is added as well.
+
+Usage:
+    python -m pipeline.score <pima|brfss> [input_csv|-] [output_csv|-] [model_json]
+
+Example:
+    zcat brfss_2015.csv.gz | python -m pipeline.score brfss - - | gzip > scored.csv.gz
+    python -m pipeline.score pima raw/pima_diabetes.csv new/pima_scored.csv
+"""
+
+import csv
+import io
+import itertools
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from pipeline import labels
+from pipeline.query import DEFAULT_CHUNKSIZE
+
+
+def _flag(values, test):
+    # NaN compares False, as in the notebooks' (df[col] > x).astype(int)
+    return test(np.asarray(values, dtype=np.float64)).astype(np.int8)
+
+
+def clinical_risk_score(chunk):
+    """Pima: obesity + high glucose + hypertension + age over 35 (0-4)"""
+    return (_flag(chunk['BMI'], lambda x: x > 30) +
+            _flag(chunk['Glucose'], lambda x: x > 125) +
+            _flag(chunk['BloodPressure'], lambda x: x > 90) +
+            _flag(chunk['Age'], lambda x: x > 35))
+
+
+def fruits_or_veggies(chunk):
+    """BRFSS: eats fruits or vegetables daily (derived from raw Fruits/Veggies)"""
+    if 'Fruits_or_Veggies' in chunk:
+        return _flag(chunk['Fruits_or_Veggies'], lambda x: x == 1)
+    return (_flag(chunk['Fruits'], lambda x: x == 1) |
+            _flag(chunk['Veggies'], lambda x: x == 1))
+
+
+def behavioral_risk_score(chunk):
+    """BRFSS: inactive + smoker + heavy drinker + no fruits or vegetables (0-4)"""
+    return (_flag(chunk['PhysActivity'], lambda x: x == 0) +
+            _flag(chunk['Smoker'], lambda x: x == 1) +
+            _flag(chunk['HvyAlcoholConsump'], lambda x: x == 1) +
+            (1 - fruits_or_veggies(chunk)))
+
+
+def healthcare_barrier(chunk):
+    """BRFSS: no health coverage + could not see a doctor because of cost (0-2)"""
+    return (_flag(chunk['AnyHealthcare'], lambda x: x == 0) +
+            _flag(chunk['NoDocbcCost'], lambda x: x == 1))
+
+
+SCORES = {
+    'pima': {'Clinical_Risk_Score': clinical_risk_score},
+    'brfss': {'Behavioral_Risk_Score': behavioral_risk_score,
+              'Healthcare_Barrier': healthcare_barrier},
+}
+
+# Input columns the kernels read (the rest of each record is passed through as text)
+SCORE_INPUTS = {
+    'pima': {'BMI', 'Glucose', 'BloodPressure', 'Age'},
+    'brfss': {'PhysActivity', 'Smoker', 'HvyAlcoholConsump', 'Fruits_or_Veggies', 'Fruits',
+              'Veggies', 'AnyHealthcare', 'NoDocbcCost'},
+}
+
+
+def score_columns(chunk, dataset, model=None):
+    """DataFrame of the dataset's risk scores (and Model_Risk_Score) for one chunk"""
+    if dataset not in SCORES:
+        raise ValueError(f"Unknown dataset '{dataset}'. Use one of: {', '.join(SCORES)}")
+    scores = pd.DataFrame(index=chunk.index)
+    try:
+        for name, kernel in SCORES[dataset].items():
+            scores[name] = kernel(chunk)
+    except KeyError as e:
+        raise KeyError(f"Input is missing column {e} needed for the {dataset} scores") from None
+    if model is not None:
+        if 'Fruits_or_Veggies' not in chunk and {'Fruits', 'Veggies'} <= set(chunk.columns):
+            chunk = chunk.assign(Fruits_or_Veggies=fruits_or_veggies(chunk))
+        scores['Model_Risk_Score'] = model.score(chunk).round(4)
+    return scores
+
+
+def score_chunk(chunk, dataset, model=None):
+    """Add the dataset's risk score columns (and Model_Risk_Score) to one chunk"""
+    for name, values in score_columns(chunk, dataset, model).items():
+        chunk[name] = values
+    return chunk
+
+
+def _open(path_or_stream, mode):
+    if hasattr(path_or_stream, 'read' if mode == 'r' else 'write'):
+        return path_or_stream, False
+    return open(path_or_stream, mode, newline=''), True
+
+
+def append_columns(source, target, columns, compute, usecols, chunksize=DEFAULT_CHUNKSIZE,
+                   progress=None):
+    """Stream CSV records from `source` into `target` with computed columns appended
+
+    Only the `usecols` columns are parsed; every input line is written back
+    unchanged with the new columns appended, which avoids re-formatting the
+    whole record. Records must be one per line (no quoted newlines).
+
+    Args:
+        source: Path or readable text stream
+        target: Path or writable text stream
+        columns: Names of the appended columns (must not be in the input)
+        compute: Callable(chunk) -> DataFrame with `columns`, one row per chunk row
+        usecols: Input columns passed to `compute`
+        chunksize: Rows per chunk
+        progress: Optional callable(rows, seconds) called after each chunk
+
+    Returns:
+        (rows, seconds)
+    """
+    usecols = set(usecols)
+    started = time.perf_counter()
+    rows = 0
+    reader, close_reader = _open(source, 'r')
+    writer, close_writer = _open(target, 'w')
+    try:
+        header = reader.readline().rstrip('\r\n')
+        if not header:
+            raise ValueError("Input is empty")
+        names = next(csv.reader([header]))
+        existing = [name for name in columns if name in names]
+        if existing:
+            raise ValueError(f"Input already has column(s): {', '.join(existing)}")
+        writer.write(','.join([header] + list(columns)) + '\n')
+        while True:
+            lines = [line.rstrip('\r\n') for line in itertools.islice(reader, chunksize)]
+            lines = [line for line in lines if line]
+            if not lines:
+                break
+            chunk = pd.read_csv(io.StringIO('\n'.join(lines)), header=None, names=names,
+                                usecols=lambda c: c in usecols)
+            if len(chunk.columns) and len(chunk) != len(lines):
+                raise ValueError("Records must be one per line (quoted newlines are not supported)")
+            values = compute(chunk)[list(columns)]
+            suffixes = values.to_csv(header=False, index=False, lineterminator='\n').splitlines()
+            writer.write(''.join(f'{line},{suffix}\n' for line, suffix in zip(lines, suffixes)))
+            rows += len(lines)
+            if progress:
+                progress(rows, time.perf_counter() - started)
+    finally:
+        if close_reader:
+            reader.close()
+        if close_writer:
+            writer.close()
+        else:
+            writer.flush()
+    if isinstance(target, str):
+        # Label columns pass through as codes; their dictionaries go with them
+        labels.write_dictionaries(target, labels.read_dictionaries(source))
+    return rows, time.perf_counter() - started
+
+
+def score_stream(source, target, dataset, model=None, chunksize=DEFAULT_CHUNKSIZE, progress=None):
+    """Score CSV records from `source` into `target` chunk by chunk (see append_columns)
+
+    Args:
+        source: Path or readable text stream
+        target: Path or writable text stream
+        dataset: 'pima' or 'brfss'
+        model: Optional pipeline.riskmodel.RiskModel for Model_Risk_Score
+        chunksize: Rows per chunk
+        progress: Optional callable(rows, seconds) called after each chunk
+
+    Returns:
+        (rows, seconds)
+    """
+    if dataset not in SCORES:
+        raise ValueError(f"Unknown dataset '{dataset}'. Use one of: {', '.join(SCORES)}")
+    needed = SCORE_INPUTS[dataset] | set(model.features if model is not None else ())
+    columns = list(SCORES[dataset]) + (['Model_Risk_Score'] if model is not None else [])
+    return append_columns(source, target, columns,
+                          lambda chunk: score_columns(chunk, dataset, model),
+                          needed, chunksize, progress)
+
+
+def main():
+    """Score a CSV file or stdin and stream the result to a file or stdout"""
+    usage = "Usage: python -m pipeline.score <pima|brfss> [input_csv|-] [output_csv|-] [model_json]"
+    if len(sys.argv) < 2 or len(sys.argv) > 5 or sys.argv[1] not in SCORES:
+        print(usage, file=sys.stderr)
+        sys.exit(1)
+
+    dataset = sys.argv[1]
+    input_file = sys.argv[2] if len(sys.argv) > 2 else '-'
+    output_file = sys.argv[3] if len(sys.argv) > 3 else '-'
+    source = sys.stdin if input_file == '-' else input_file
+    target = sys.stdout if output_file == '-' else output_file
+
+    def progress(rows, seconds):
+        print(f"\r  {rows:,} rows ({rows / seconds:,.0f} rows/s)", end='', file=sys.stderr)
+
+    try:
+        model = None
+        if len(sys.argv) > 4:
+            from pipeline.riskmodel import RiskModel
+            model = RiskModel.load(sys.argv[4])
+        rows, seconds = score_stream(source, target, dataset, model, progress=progress)
+    except FileNotFoundError as e:
+        print(f"✗ Error: File '{e.filename}' not found", file=sys.stderr)
+        sys.exit(1)
+    except (KeyError, ValueError) as e:
+        print(f"\n✗ Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    except BrokenPipeError:
+        # Downstream command (e.g. head) stopped reading
+        sys.stderr.close()
+        sys.exit(0)
+
+    rate = rows / seconds if seconds else float('inf')
+    print(f"\n✓ Scored {rows:,} {dataset} rows in {seconds:.2f}s ({rate:,.0f} rows/s)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
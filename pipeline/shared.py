@@ -0,0 +1,279 @@
+"""
+Shared-memory dataset handoff for worker process pools.
+
+publish() copies the columns of one or more DataFrames into a single named
+shared-memory segment, once. Workers get a small picklable handle (segment
+name plus column layout) and attach to the segment: every column comes back
+as a read-only NumPy view of the shared pages, so a worker starts in
+microseconds and memory does not grow with the number of workers. String
+and categorical columns are stored as integer codes plus their (small)
+category list.
+
+The segment carries a cross-process reference count. The publisher holds
+one reference and every attach adds one. release(), or leaving the with block
+or the worker process exiting, drops it again. The last release unlinks the
+segment.
+
+Example:
+    from pipeline.shared import publish_cleaned, shared_pool, worker_dataset
+
+    def diabetes_rate(column):
+        data = worker_dataset()                       # attached once per worker
+        values = data.column('health', column)        # zero-copy view
+        outcome = data.column('health', 'Diabetes_binary')
+        return column, outcome[values == 1].mean()
+
+    with publish_cleaned() as data, shared_pool(data, max_workers=4) as pool:
+        rates = dict(pool.map(diabetes_rate, ['HighBP', 'HighChol', 'Smoker']))
+"""
+
+import fcntl
+import os
+import sys
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, util
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+from pipeline.labels import read_csv
+
+
+ALIGNMENT = 64
+HEADER_BYTES = ALIGNMENT  # int64 reference count, padded to one cache line
+
+CLEANED_FILES = {
+    'pima': 'new/pima.csv',
+    'health': 'new/indicator.csv',
+    'world': 'new/world.csv',
+}
+
+_worker_dataset = None
+
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+@contextmanager
+def _lock(name):
+    """Cross-process lock guarding a segment's reference count"""
+    path = os.path.join(tempfile.gettempdir(), f'{name}.lock')
+    with open(path, 'a+') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _attach_segment(name):
+    """Attach without handing the segment to this process's resource tracker
+
+    Before Python 3.13 every attach registers the segment with the resource
+    tracker, which unlinks it when the attaching process exits, even though
+    the publisher still uses it. Cleanup is done by the reference count instead.
+    """
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def _encode(series):
+    """Column -> (fixed-width array, categories or None, pandas kind)"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        kind = 'ordered' if series.cat.ordered else 'category'
+        return series.cat.codes.to_numpy(), list(series.cat.categories), kind
+    if series.dtype.kind in 'biufc':
+        return series.to_numpy(), None, 'numeric'
+    if series.dtype.kind == 'M':
+        return series.to_numpy().view('int64'), str(series.dtype), 'datetime'
+    # Strings / objects: codes into a sorted category list (missing -> -1)
+    codes, categories = pd.factorize(series, sort=True)
+    return codes.astype(np.int32), list(categories), 'object'
+
+
+def _layout(tables):
+    """Column specs with aligned byte offsets, and the total segment size"""
+    layout = {}
+    arrays = {}
+    offset = HEADER_BYTES
+    for table, frame in tables.items():
+        columns = frame.items() if isinstance(frame, pd.DataFrame) else (
+            (name, pd.Series(np.asarray(values))) for name, values in frame.items())
+        specs = {}
+        for name, series in columns:
+            array, categories, kind = _encode(series)
+            array = np.ascontiguousarray(array)
+            specs[name] = {'dtype': array.dtype.str, 'shape': array.shape, 'offset': offset,
+                           'categories': categories, 'kind': kind}
+            arrays[(table, name)] = array
+            offset = _aligned(offset + array.nbytes)
+        layout[table] = specs
+    return layout, arrays, max(offset, HEADER_BYTES + 1)
+
+
+class SharedHandle:
+    """Picklable description of a published segment (name and column layout)"""
+
+    def __init__(self, segment, layout):
+        self.segment = segment
+        self.layout = layout
+
+    def __repr__(self):
+        return f"SharedHandle({self.segment!r}, tables={list(self.layout)})"
+
+
+class SharedDataset:
+    """Tables of columns living in one shared-memory segment
+
+    Create with SharedDataset.publish() in the parent and SharedDataset.attach()
+    (or worker_dataset() inside shared_pool workers) everywhere else.
+    """
+
+    def __init__(self, handle, shm):
+        self.handle = handle
+        self._shm = shm
+        self._released = False
+        self._refcount = np.ndarray((1,), dtype=np.int64, buffer=shm.buf, offset=0)
+
+    @classmethod
+    def publish(cls, tables, name=None):
+        """Copy {table: DataFrame or {column: array}} into a new shared segment"""
+        layout, arrays, size = _layout(tables)
+        name = name or f'pipeline_{os.getpid()}_{uuid.uuid4().hex[:8]}'
+        shm = SharedMemory(name=name, create=True, size=size)
+        for (table, column), array in arrays.items():
+            spec = layout[table][column]
+            target = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf, offset=spec['offset'])
+            target[...] = array
+        dataset = cls(SharedHandle(name, layout), shm)
+        dataset._refcount[0] = 1
+        return dataset
+
+    @classmethod
+    def attach(cls, handle):
+        """Attach to a published segment and take a reference"""
+        with _lock(handle.segment):
+            dataset = cls(handle, _attach_segment(handle.segment))
+            if dataset._refcount[0] <= 0:
+                dataset._shm.close()
+                raise ValueError(f"Shared segment '{handle.segment}' was already released")
+            dataset._refcount[0] += 1
+        return dataset
+
+    @property
+    def tables(self):
+        return list(self.handle.layout)
+
+    def columns(self, table):
+        return list(self._spec(table))
+
+    def _spec(self, table):
+        if table not in self.handle.layout:
+            raise KeyError(f"Unknown table '{table}'. Available: {', '.join(self.tables)}")
+        return self.handle.layout[table]
+
+    def raw(self, table, column):
+        """Read-only zero-copy view of the stored array (codes for string columns)"""
+        if self._released:
+            raise ValueError("Shared dataset has been released")
+        specs = self._spec(table)
+        if column not in specs:
+            raise KeyError(f"Unknown column '{column}' in table '{table}'")
+        spec = specs[column]
+        view = np.ndarray(tuple(spec['shape']), dtype=np.dtype(spec['dtype']),
+                          buffer=self._shm.buf, offset=spec['offset'])
+        view.flags.writeable = False
+        return view
+
+    def column(self, table, column):
+        """Column as a NumPy view; string/categorical columns as a pd.Categorical"""
+        spec = self._spec(table).get(column)
+        view = self.raw(table, column)
+        if spec['kind'] in ('category', 'ordered', 'object'):
+            return pd.Categorical.from_codes(view, spec['categories'],
+                                             ordered=spec['kind'] == 'ordered', validate=False)
+        if spec['kind'] == 'datetime':
+            return view.view(spec['categories'])
+        return view
+
+    def frame(self, table, columns=None):
+        """DataFrame of a table whose columns are views of the shared arrays"""
+        columns = columns or self.columns(table)
+        # copy=False keeps one block per column instead of consolidating (copying)
+        return pd.DataFrame({name: self.column(table, name) for name in columns}, copy=False)
+
+    def refcount(self):
+        with _lock(self.handle.segment):
+            return int(self._refcount[0])
+
+    def release(self):
+        """Drop this reference; the last one unlinks the segment"""
+        if self._released:
+            return
+        self._released = True
+        with _lock(self.handle.segment):
+            self._refcount[0] -= 1
+            last = self._refcount[0] <= 0
+            self._refcount = None
+            if last:
+                self._shm.unlink()
+                try:
+                    os.remove(os.path.join(tempfile.gettempdir(), f'{self.handle.segment}.lock'))
+                except FileNotFoundError:
+                    pass
+        try:
+            self._shm.close()
+        except BufferError:
+            # Views handed out by column() are still alive; the mapping goes
+            # away with them (the segment itself is already unlinked if last)
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def __repr__(self):
+        state = 'released' if self._released else 'attached'
+        return f"SharedDataset({self.handle.segment!r}, tables={self.tables}, {state})"
+
+
+def publish_cleaned(files=None, name=None):
+    """Publish the cleaned Pima, BRFSS and world datasets (new/*.csv)"""
+    files = files or CLEANED_FILES
+    return SharedDataset.publish({table: read_csv(path) for table, path in files.items()},
+                                 name=name)
+
+
+def attach_worker(handle):
+    """Pool initializer: attach this worker process to the dataset behind `handle`"""
+    global _worker_dataset
+    _worker_dataset = SharedDataset.attach(handle)
+    # Runs when the worker process shuts down normally
+    util.Finalize(_worker_dataset, _worker_dataset.release, exitpriority=10)
+
+
+def worker_dataset():
+    """The dataset attached by shared_pool() in this worker process"""
+    if _worker_dataset is None:
+        raise ValueError("No shared dataset attached; create the pool with shared_pool()")
+    return _worker_dataset
+
+
+def shared_pool(dataset, max_workers=None):
+    """ProcessPoolExecutor whose workers attach to `dataset` once at startup"""
+    handle = dataset.handle if isinstance(dataset, SharedDataset) else dataset
+    return ProcessPoolExecutor(max_workers=max_workers, initializer=attach_worker,
+                               initargs=(handle,))
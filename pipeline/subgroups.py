@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+High-risk subgroup discovery over all categorical dimensions.
+
+Instead of one fixed groupby (Age_Group x BMI_Category x Income_Level), this
+searches conjunctions of any categorical or binned columns
+(Age_Group=70-74 & BMI_Category=Obese & HighBP=1, ...) up to a given depth
+and returns the top-k subgroups by outcome rate, lift or weighted relative
+accuracy.
+
+Every column is integer-coded once. Refining a subgroup by a column is then
+a single np.bincount of that column's codes over the subgroup's rows, which
+scores all values of the column at once; no groupby runs during the search.
+The search is a beam search, and two kinds of pruning keep it small:
+  - support: refinements below min_count rows are dropped, and so are all
+    of their own refinements (they can only get smaller)
+  - optimistic estimate: a subgroup is not expanded when even its best
+    possible refinement (all positive rows, at least min_count of them)
+    cannot beat the current k-th best subgroup
+
+Example:
+    from pipeline.subgroups import discover_subgroups
+
+    top = discover_subgroups(df_health, 'Diabetes_binary', depth=3, min_count=100, top=10)
+    print(top[['subgroup', 'count', 'rate', 'lift']])
+
+Usage:
+    python -m pipeline.subgroups <input_csv> [depth] [min_count] [quality] [outcome]
+"""
+
+import heapq
+import sys
+
+import numpy as np
+import pandas as pd
+
+from pipeline.labels import read_csv
+from pipeline.rates import wilson_interval
+
+
+QUALITIES = ('rate', 'lift', 'wracc')
+# Integer columns with at most this many distinct values count as categorical
+MAX_LEVELS = 16
+
+
+def encode_columns(df, columns=None, bins=None, exclude=(), max_levels=MAX_LEVELS):
+    """Integer-code the search dimensions
+
+    Args:
+        df: Input DataFrame
+        columns: Columns to search (default: object/category columns and
+            numeric columns with at most max_levels distinct values)
+        bins: {column: bin edges} for numeric columns to bin with pd.cut first
+        exclude: Columns to leave out (e.g. the outcome)
+
+    Returns:
+        {column: (codes, levels)}, codes int array with -1 for missing
+    """
+    bins = bins or {}
+    if columns is None:
+        columns = [c for c in df.columns
+                   if c not in bins and (df[c].dtype == object
+                                         or isinstance(df[c].dtype, pd.CategoricalDtype)
+                                         or df[c].nunique() <= max_levels)]
+    encoded = {}
+    for column in list(columns) + [c for c in bins if c not in columns]:
+        if column in exclude:
+            continue
+        series = pd.cut(df[column], bins[column]) if column in bins else df[column]
+        codes, levels = pd.factorize(series, sort=True)
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            levels = list(levels)
+        # Whole-number floats (0.0/1.0 flags) read better without the '.0'
+        levels = [int(v) if isinstance(v, float) and v.is_integer() else v for v in levels]
+        encoded[column] = (codes, levels)
+    return encoded
+
+
+def _distinct_columns(encoded):
+    """Column names, minus columns that only relabel another one (Age vs Age_Group)
+
+    Of two such columns the one with text labels is kept.
+    """
+    def distinct(codes):
+        return np.count_nonzero(np.bincount(codes + 1))
+
+    def distinct_pairs(codes, other):
+        # Shift both by one so missing (-1) codes stay non-negative
+        other_codes, other_levels = encoded[other]
+        return distinct((codes + 1) * (len(other_levels) + 1) + (other_codes + 1))
+
+    labelled = sorted(encoded, key=lambda c: not any(isinstance(v, str) for v in encoded[c][1]))
+    names = []
+    for column in labelled:
+        codes, levels = encoded[column]
+        duplicate = any(
+            len(levels) == len(encoded[other][1])
+            and distinct_pairs(codes, other) == distinct(codes)
+            for other in names)
+        if not duplicate:
+            names.append(column)
+    return [column for column in encoded if column in names]
+
+
+def _quality(measure, count, events, n, base_rate):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = events / count
+    if measure == 'rate':
+        return rate
+    if measure == 'lift':
+        return rate / base_rate
+    return count / n * (rate - base_rate)
+
+
+def _optimistic(measure, count, events, n, base_rate, min_count):
+    """Best quality any refinement with >= min_count rows could reach"""
+    if measure == 'wracc':
+        return events / n * (1 - base_rate)
+    best_rate = min(1.0, events / min_count)
+    return best_rate if measure == 'rate' else best_rate / base_rate
+
+
+def discover_subgroups(df, outcome, columns=None, bins=None, depth=3, min_count=100,
+                       beam_width=20, top=10, quality='rate'):
+    """Beam search for the subgroups with the highest outcome rate
+
+    Args:
+        df: DataFrame with the search columns and a 0/1 outcome column
+        outcome: Outcome column (e.g. 'Diabetes_binary' or 'Outcome')
+        columns: Columns to combine (see encode_columns for the default)
+        bins: {column: bin edges} for numeric columns, e.g. {'BMI': [0, 18.5, 25, 30, 100]}
+        depth: Maximum number of conditions per subgroup
+        min_count: Minimum rows per subgroup
+        beam_width: Subgroups kept per level for further refinement
+        top: Number of subgroups returned
+        quality: 'rate', 'lift' (rate / overall rate) or 'wracc'
+            (coverage x (rate - overall rate), favours larger subgroups)
+
+    Returns:
+        DataFrame sorted by quality with subgroup, depth, count, events, rate,
+        lift, coverage, wracc, wilson_low and wilson_high
+    """
+    if quality not in QUALITIES:
+        raise ValueError(f"Unknown quality '{quality}'. Use one of: {', '.join(QUALITIES)}")
+    if depth < 1 or min_count < 1:
+        raise ValueError("depth and min_count must be at least 1")
+
+    data = df.dropna(subset=[outcome])
+    y = data[outcome].to_numpy(dtype=float)
+    if not np.isin(y, (0.0, 1.0)).all():
+        raise ValueError(f"Outcome '{outcome}' must be 0/1")
+    encoded = encode_columns(data, columns, bins, exclude=(outcome,))
+    if not encoded:
+        raise ValueError("No categorical columns to search")
+    names = _distinct_columns(encoded)
+    # (code, outcome) of every row in one small integer: a single bincount
+    # over a subgroup's rows gives count and events for every value at once
+    joint = {}
+    for column in names:
+        codes, levels = encoded[column]
+        dtype = np.int16 if 2 * (len(levels) + 1) < 2 ** 15 else np.int64
+        joint[column] = (np.where(codes < 0, len(levels), codes) * 2 + y).astype(dtype)
+    n = len(y)
+    base_rate = y.mean()
+
+    best = []          # min-heap of (quality, key) holding the current top subgroups
+    found = {}         # key -> (count, events)
+    seen = set()
+    beam = [((), np.arange(n))]
+
+    def kth_best():
+        return best[0][0] if len(best) >= top else -np.inf
+
+    for level in range(depth):
+        candidates = []
+        for conditions, rows in beam:
+            used = {column for column, _ in conditions}
+            for column in names:
+                if column in used:
+                    continue
+                levels = len(encoded[column][1])
+                table = np.bincount(joint[column][rows], minlength=2 * (levels + 1))
+                table = table[:2 * levels].reshape(levels, 2)  # drop the missing bin
+                counts = table.sum(axis=1)
+                events = table[:, 1]
+                scores = _quality(quality, counts, events, n, base_rate)
+                # A condition that keeps every row adds nothing to the description
+                for code in np.flatnonzero((counts >= min_count) & (counts < len(rows))):
+                    key = tuple(sorted(conditions + ((column, code),), key=lambda c: names.index(c[0])))
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    score = float(scores[code])
+                    found[key] = (int(counts[code]), float(events[code]))
+                    if len(best) < top:
+                        heapq.heappush(best, (score, key))
+                    elif score > best[0][0]:
+                        heapq.heapreplace(best, (score, key))
+                    candidates.append((score, key, rows, column, code))
+
+        if level + 1 == depth:
+            break
+        # Keep the best refinable candidates; drop any that cannot beat the top-k
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        beam = []
+        for score, key, rows, column, code in candidates:
+            count, events = found[key]
+            if _optimistic(quality, count, events, n, base_rate, min_count) <= kth_best():
+                continue
+            beam.append((key, rows[encoded[column][0][rows] == code]))
+            if len(beam) == beam_width:
+                break
+        if not beam:
+            break
+
+    keys = [key for _, key in sorted(best, reverse=True)]
+    count = np.array([found[key][0] for key in keys], dtype=float)
+    events = np.array([found[key][1] for key in keys])
+    table = pd.DataFrame({
+        'subgroup': [' & '.join(f'{column}={encoded[column][1][code]}' for column, code in key)
+                     for key in keys],
+        'depth': [len(key) for key in keys],
+        'count': count.astype(np.int64),
+        'events': events.astype(np.int64),
+    })
+    table['rate'] = events / count
+    table['lift'] = table['rate'] / base_rate
+    table['coverage'] = count / n
+    table['wracc'] = table['coverage'] * (table['rate'] - base_rate)
+    table['wilson_low'], table['wilson_high'] = wilson_interval(events, count)
+    return table
+
+
+def main():
+    """Print the top subgroups for the outcome in a cleaned dataset"""
+    usage = "Usage: python -m pipeline.subgroups <input_csv> [depth] [min_count] [quality] [outcome]"
+    if len(sys.argv) < 2 or len(sys.argv) > 6:
+        print(usage)
+        sys.exit(1)
+
+    input_file = sys.argv[1]
+    try:
+        depth = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+        min_count = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+        quality = sys.argv[4] if len(sys.argv) > 4 else 'rate'
+        outcome = sys.argv[5] if len(sys.argv) > 5 else 'Diabetes_binary'
+        df = read_csv(input_file)
+        table = discover_subgroups(df, outcome, depth=depth, min_count=min_count,
+                                   top=20, quality=quality)
+    except FileNotFoundError:
+        print(f"✗ Error: File '{input_file}' not found")
+        sys.exit(1)
+    except (KeyError, ValueError) as e:
+        print(f"✗ Error: {e}")
+        sys.exit(1)
+
+    print(f"✓ Top {len(table)} subgroups by {quality} (depth <= {depth}, count >= {min_count})")
+    with pd.option_context('display.width', 160, 'display.max_colwidth', 80):
+        print(table.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Shared fixtures: a small BRFSS-like frame with ordered label columns"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline import labels
+
+
+INCOME = {1: '<$10k', 2: '$10k-15k', 3: '$15k-20k', 4: '$20k-25k',
+          5: '$25k-35k', 6: '$35k-50k', 7: '$50k-75k', 8: '$75k+'}
+
+
+@pytest.fixture
+def health():
+    rng = np.random.default_rng(7)
+    rows = 5000
+    bmi = rng.normal(28, 6, size=rows).round(1)
+    bmi[rng.random(rows) < 0.02] = np.nan
+    df = pd.DataFrame({
+        'Diabetes_binary': (rng.random(rows) < 0.15).astype(float),
+        'BMI': bmi,
+        'Age': rng.integers(1, 14, size=rows),
+        'PhysActivity': rng.integers(0, 2, size=rows),
+        'Income': rng.integers(1, 9, size=rows),
+    })
+    df['BMI_Category'] = pd.cut(df['BMI'], bins=[0, 18.5, 25, 30, 100],
+                                labels=['Underweight', 'Normal', 'Overweight', 'Obese'])
+    df['Income_Level'] = labels.ordered_labels(df['Income'], INCOME)
+    return df
+
+
+@pytest.fixture
+def health_csv(tmp_path, health):
+    path = str(tmp_path / 'indicator.csv')
+    labels.to_csv(health, path)
+    return path
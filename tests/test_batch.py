@@ -0,0 +1,25 @@
+"""pipeline.batch parameter injection"""
+
+import nbformat
+import pytest
+
+from pipeline.batch import INJECTED_TAG, inject_parameters
+
+
+def _notebook(tagged):
+    cells = [nbformat.v4.new_markdown_cell('# Title'),
+             nbformat.v4.new_code_cell("input_file = 'raw/pima_diabetes.csv'",
+                                       metadata={'tags': ['parameters'] if tagged else []}),
+             nbformat.v4.new_code_cell('print(input_file)')]
+    return nbformat.v4.new_notebook(cells=cells)
+
+
+def test_injects_after_parameters_cell():
+    nb = inject_parameters(_notebook(tagged=True), {'input_file': 'runs/pima.csv'})
+    assert nb.cells[2].metadata['tags'] == [INJECTED_TAG]
+    assert "input_file = 'runs/pima.csv'" in nb.cells[2].source
+
+
+def test_untagged_notebook_is_rejected():
+    with pytest.raises(ValueError, match='parameters'):
+        inject_parameters(_notebook(tagged=False), {'input_file': 'runs/pima.csv'})
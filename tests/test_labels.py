@@ -0,0 +1,50 @@
+"""pipeline.labels round trips"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from pipeline import labels
+
+
+def test_round_trip_keeps_order_and_missing(health, health_csv):
+    back = labels.read_csv(health_csv)
+    pd.testing.assert_frame_equal(back, health, check_dtype=False, check_categorical=True)
+    assert back['Income_Level'].cat.ordered
+    assert list(back['Income_Level'].cat.categories) == list(health['Income_Level'].cat.categories)
+    assert back['BMI_Category'].isnull().sum() == health['BMI'].isnull().sum()
+
+
+def test_codes_on_disk(health, health_csv):
+    raw = pd.read_csv(health_csv)
+    expected = health['Income_Level'].cat.codes
+    assert (raw['Income_Level'].to_numpy() == expected.to_numpy()).all()
+    with open(labels.dictionary_path(health_csv)) as f:
+        spec = json.load(f)
+    assert set(spec['columns']) == {'BMI_Category', 'Income_Level'}
+
+
+def test_chunked_reader_decodes_each_chunk(health, health_csv):
+    with labels.read_csv(health_csv, chunksize=777, usecols=['Income_Level', 'BMI']) as reader:
+        chunks = list(reader)
+    assert all(isinstance(c['Income_Level'].dtype, pd.CategoricalDtype) for c in chunks)
+    combined = pd.concat(chunks, ignore_index=True)
+    assert combined['Income_Level'].equals(health['Income_Level'])
+
+
+def test_groupby_order_matches_pandas(health, health_csv):
+    back = labels.read_csv(health_csv)
+    rates = back.groupby('Income_Level', observed=True)['Diabetes_binary'].mean()
+    # Category order ('<$10k' first), not string order
+    assert list(rates.index) == list(back['Income_Level'].cat.categories)
+    expected = health.groupby('Income_Level', observed=True)['Diabetes_binary'].mean()
+    assert np.allclose(rates.to_numpy(), expected.to_numpy())
+    assert list(rates.index) == list(expected.index)
+
+
+def test_file_without_dictionary_reads_as_plain_csv(tmp_path):
+    path = str(tmp_path / 'plain.csv')
+    pd.DataFrame({'a': [1, 2], 'b': ['x', 'y']}).to_csv(path, index=False)
+    assert labels.read_dictionaries(path) == {}
+    assert labels.read_csv(path)['b'].dtype == object
@@ -0,0 +1,65 @@
+"""pipeline.memo keys and cache round trips"""
+
+import types
+
+import numpy as np
+import pandas as pd
+
+from pipeline import memo
+
+
+def _frame(categories, ordered=True):
+    values = pd.Categorical(['low', 'high', 'low'], categories=categories, ordered=ordered)
+    return pd.DataFrame({'level': values, 'x': [1.0, 2.0, 3.0]})
+
+
+def test_frames_hash_by_value():
+    df = pd.DataFrame({'a': [1, 2, 3], 'b': ['x', 'y', 'z']})
+    assert memo.fingerprint(df) == memo.fingerprint(df.copy())
+    changed = df.copy()
+    changed.loc[1, 'a'] = 5
+    assert memo.fingerprint(df) != memo.fingerprint(changed)
+
+
+def test_category_order_changes_key():
+    low_first, high_first = _frame(['low', 'high']), _frame(['high', 'low'])
+    assert memo.fingerprint(low_first) == memo.fingerprint(_frame(['low', 'high']))
+    assert memo.fingerprint(low_first) != memo.fingerprint(high_first)
+    assert memo.fingerprint(low_first) != memo.fingerprint(_frame(['low', 'high'], ordered=False))
+    assert (memo.fingerprint(low_first['level'])
+            != memo.fingerprint(high_first['level']))
+
+
+def test_module_edit_changes_function_key(monkeypatch):
+    module = types.ModuleType('memo_fixture')
+    exec("def helper(x):\n    return x\n\ndef step(x):\n    return helper(x)\n", module.__dict__)
+    monkeypatch.setitem(memo.sys.modules, 'memo_fixture', module)
+    sources = iter(['def helper(x):\n    return x\n', 'def helper(x):\n    return -x\n'])
+    monkeypatch.setattr(memo.inspect, 'getsource',
+                        lambda obj: next(sources) if obj is module else 'def step(x): ...')
+    memo._module_fingerprint.cache_clear()
+    before = memo.function_fingerprint(module.step)
+    memo._module_fingerprint.cache_clear()
+    after = memo.function_fingerprint(module.step)
+    memo._module_fingerprint.cache_clear()
+    assert before != after
+
+
+def test_memoize_hits_on_equal_content(tmp_path):
+    store = memo.CacheStore(str(tmp_path / 'cache'))
+    calls = []
+
+    @memo.memoize(store=store)
+    def total(df):
+        calls.append(1)
+        return df['x'].sum()
+
+    df = _frame(['low', 'high'])
+    assert total(df) == total(df.copy()) == 6.0
+    assert len(calls) == 1
+    total(_frame(['high', 'low']))
+    assert len(calls) == 2
+
+    stats = store.stats()
+    assert stats['hits'].sum() == 1 and stats['misses'].sum() == 2
+    assert np.isclose(stats['hit_rate'].iloc[0], 1 / 3, atol=1e-3)
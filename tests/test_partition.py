@@ -0,0 +1,79 @@
+"""pipeline.partition against the same queries run on a plain DataFrame"""
+
+import numpy as np
+import pandas as pd
+
+from pipeline.partition import PartitionedDataset
+from pipeline.query import col
+
+
+def _health(rows=600, seed=0):
+    rng = np.random.default_rng(seed)
+    sex = rng.choice([0.0, 1.0, np.nan], size=rows)
+    return pd.DataFrame({
+        'Diabetes_binary': rng.integers(0, 2, size=rows).astype(float),
+        'BMI': rng.integers(15, 50, size=rows).astype(float),
+        'Sex': sex,
+    })
+
+
+def _ingest(tmp_path, df, chunksize=100):
+    dataset = PartitionedDataset(str(tmp_path / 'brfss'), 'Sex')
+    chunks = (df.iloc[start:start + chunksize] for start in range(0, len(df), chunksize))
+    dataset.ingest_chunks(chunks, 2015)
+    return dataset
+
+
+def test_null_key_is_one_partition(tmp_path):
+    df = _health()
+    dataset = _ingest(tmp_path, df)
+
+    keys = [p['keys']['Sex'] for p in dataset.manifest['partitions']]
+    assert sorted(keys, key=str) == [0.0, 1.0, None]
+    null_part = next(p for p in dataset.manifest['partitions'] if p['keys']['Sex'] is None)
+    assert null_part['rows'] == df['Sex'].isnull().sum()
+
+    # One header per part file, however many chunks were appended
+    path = tmp_path / 'brfss' / null_part['path']
+    lines = path.read_text().splitlines()
+    assert lines.count(lines[0]) == 1
+    assert len(lines) == null_part['rows'] + 1
+
+
+def test_null_key_filters_match_pandas(tmp_path):
+    df = _health()
+    dataset = _ingest(tmp_path, df)
+
+    nulls = dataset.scan().filter(col('Sex').isnull()).collect()
+    assert len(nulls) == df['Sex'].isnull().sum()
+    assert len(dataset.scan().filter(col('Sex').notnull()).collect()) == df['Sex'].notnull().sum()
+    assert len(dataset.scan().filter(col('Sex') == 1).collect()) == (df['Sex'] == 1).sum()
+
+    # The null partition can hold no row of Sex == 1
+    assert len(dataset.partitions([col('Sex') == 1])) == 1
+
+
+def test_group_by_matches_pandas(tmp_path):
+    df = _health()
+    dataset = _ingest(tmp_path, df)
+
+    lazy = (dataset.scan()
+            .filter(col('BMI') >= 30)
+            .group_by('Sex')
+            .agg(rate=('Diabetes_binary', 'mean'), n=('Diabetes_binary', 'count'))
+            .collect())
+    plain = (df[df['BMI'] >= 30].groupby('Sex')['Diabetes_binary']
+             .agg(rate='mean', n='count'))
+    assert np.array_equal(lazy.index.to_numpy(), plain.index.to_numpy())
+    assert np.allclose(lazy['rate'], plain['rate'])
+    assert (lazy['n'].to_numpy() == plain['n'].to_numpy()).all()
+
+
+def test_reingest_replaces_year(tmp_path):
+    df = _health()
+    dataset = _ingest(tmp_path, df)
+    dataset = _ingest(tmp_path, df.iloc[:300])
+
+    reopened = PartitionedDataset(str(tmp_path / 'brfss'))
+    assert sum(p['rows'] for p in reopened.manifest['partitions']) == 300
+    assert len(reopened.scan().collect()) == 300
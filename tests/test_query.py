@@ -0,0 +1,69 @@
+"""pipeline.query results against the same operations in plain pandas"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline.query import col, scan_csv
+
+
+@pytest.fixture
+def frame(health_csv):
+    # Small chunks so every aggregate is merged across chunk boundaries
+    return scan_csv(health_csv, chunksize=600)
+
+
+def test_filter_select_matches_pandas(frame, health):
+    lazy = frame.filter(col('Diabetes_binary') == 0).select('BMI').collect()
+    plain = health[health['Diabetes_binary'] == 0]['BMI']
+    assert np.array_equal(lazy['BMI'].to_numpy(), plain.to_numpy(), equal_nan=True)
+
+
+def test_compound_filter_matches_pandas(frame, health):
+    predicate = (col('BMI') >= 30) & col('Income_Level').isin(['<$10k', '$75k+'])
+    lazy = frame.filter(predicate).select('BMI', 'Income_Level').collect()
+    plain = health[(health['BMI'] >= 30) & health['Income_Level'].isin(['<$10k', '$75k+'])]
+    assert len(lazy) == len(plain)
+    assert lazy['Income_Level'].tolist() == plain['Income_Level'].tolist()
+
+
+def test_group_by_matches_pandas(frame, health):
+    lazy = (frame.group_by('Income_Level')
+            .agg(mean=('Diabetes_binary', 'mean'), count=('BMI', 'count'),
+                 size=('BMI', 'size'), std=('BMI', 'std'), low=('BMI', 'min'), high=('BMI', 'max'))
+            .collect()
+            .set_index('Income_Level'))
+    grouped = health.groupby('Income_Level', observed=True)
+    assert list(lazy.index) == list(grouped.size().index)
+    assert np.allclose(lazy['mean'], grouped['Diabetes_binary'].mean())
+    assert (lazy['count'].to_numpy() == grouped['BMI'].count().to_numpy()).all()
+    assert (lazy['size'].to_numpy() == grouped.size().to_numpy()).all()
+    assert np.allclose(lazy['std'], grouped['BMI'].std())
+    assert np.allclose(lazy['low'], grouped['BMI'].min())
+    assert np.allclose(lazy['high'], grouped['BMI'].max())
+
+
+def test_expression_aggregates_match_pandas(frame, health):
+    rates = frame.agg(obesity=(col('BMI') >= 30, 'mean'),
+                      inactive=(col('PhysActivity') == 0, 'mean')).collect().iloc[0]
+    assert rates['obesity'] == pytest.approx((health['BMI'] >= 30).mean())
+    assert rates['inactive'] == pytest.approx((health['PhysActivity'] == 0).mean())
+
+
+def test_sort_head_after_aggregate(frame, health):
+    lazy = (frame.group_by('BMI_Category', 'Income_Level')
+            .agg(rate=('Diabetes_binary', 'mean'), n=('Diabetes_binary', 'count'))
+            .filter(col('n') >= 50)
+            .sort('rate', descending=True)
+            .head(5)
+            .collect())
+    plain = (health.groupby(['BMI_Category', 'Income_Level'], observed=True)['Diabetes_binary']
+             .agg(rate='mean', n='count'))
+    plain = plain[plain['n'] >= 50].sort_values('rate', ascending=False).head(5)
+    assert np.allclose(lazy['rate'], plain['rate'])
+    assert lazy['Income_Level'].tolist() == plain.index.get_level_values('Income_Level').tolist()
+
+
+def test_projection_reads_only_needed_columns(frame):
+    plan = frame.filter(col('BMI') >= 30).select('Age').plan()
+    assert sorted(plan['usecols']) == ['Age', 'BMI']
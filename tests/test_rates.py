@@ -0,0 +1,47 @@
+"""pipeline.rates against the plain pandas groupby"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline.rates import rank_subgroups, subgroup_rates, wilson_interval
+
+
+KEYS = ['BMI_Category', 'Income_Level']
+
+
+def test_rows_line_up_with_plain_groupby(health):
+    table = subgroup_rates(health, KEYS, 'Diabetes_binary', replicates=50)
+    plain = health.groupby(KEYS, observed=True)['Diabetes_binary'].agg(['size', 'mean'])
+    # Categorical keys in category order, rows with a missing key dropped
+    assert table.index.equals(plain.index)
+    assert (table['count'].to_numpy() == plain['size'].to_numpy()).all()
+    assert np.allclose(table['rate'], plain['mean'])
+
+
+def test_intervals_bracket_the_rate(health):
+    table = subgroup_rates(health, 'Income_Level', 'Diabetes_binary', replicates=200)
+    assert (table['wilson_low'] <= table['rate']).all()
+    assert (table['rate'] <= table['wilson_high']).all()
+    assert (table['boot_low'] <= table['boot_high']).all()
+
+
+def test_row_bootstrap_matches_collapsed(health):
+    collapsed = subgroup_rates(health, 'Income_Level', 'Diabetes_binary', replicates=400)
+    rows = subgroup_rates(health, 'Income_Level', 'Diabetes_binary', replicates=400,
+                          method='rows', workers=1)
+    assert np.allclose(rows['boot_se'], collapsed['boot_se'], rtol=0.25)
+
+
+def test_wilson_interval_known_value():
+    low, high = wilson_interval(np.array([5.0]), np.array([10.0]))
+    assert low[0] == pytest.approx(0.2366, abs=1e-4)
+    assert high[0] == pytest.approx(0.7634, abs=1e-4)
+
+
+def test_rank_subgroups_respects_min_count(health):
+    table = subgroup_rates(health, KEYS, 'Diabetes_binary', replicates=0)
+    ranked = rank_subgroups(table, min_count=100, by='wilson_low', top=5)
+    assert (ranked['count'] >= 100).all()
+    assert ranked['wilson_low'].is_monotonic_decreasing
+    assert isinstance(ranked.index, pd.MultiIndex)
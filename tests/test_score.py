@@ -0,0 +1,45 @@
+"""pipeline.score.append_columns and the streams built on it (score, outliers)"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline import labels
+from pipeline.outliers import OutlierDetector, flag_csv
+from pipeline.score import append_columns
+
+
+def test_append_columns_passes_lines_through(health_csv, tmp_path):
+    target = str(tmp_path / 'out.csv')
+    rows, _ = append_columns(health_csv, target, ['Obese'],
+                             lambda chunk: pd.DataFrame({'Obese': (chunk['BMI'] >= 30).astype(int)}),
+                             ['BMI'], chunksize=700)
+    with open(health_csv) as f:
+        original = f.read().splitlines()
+    with open(target) as f:
+        written = f.read().splitlines()
+    assert rows == len(original) - 1
+    assert [line.rsplit(',', 1)[0] for line in written] == original
+    # Label codes pass through with their dictionaries
+    assert labels.read_dictionaries(target) == labels.read_dictionaries(health_csv)
+    result = labels.read_csv(target)
+    assert result['Income_Level'].cat.categories.tolist() == \
+        labels.read_csv(health_csv)['Income_Level'].cat.categories.tolist()
+    assert (result['Obese'] == (result['BMI'] >= 30)).all()
+
+
+def test_append_columns_rejects_existing_column(health_csv, tmp_path):
+    with pytest.raises(ValueError, match='already has'):
+        append_columns(health_csv, str(tmp_path / 'out.csv'), ['BMI'],
+                       lambda chunk: chunk, ['BMI'])
+
+
+def test_flag_csv_matches_in_memory_scores(health, health_csv, tmp_path):
+    detector = OutlierDetector(['BMI', 'Age']).fit(health)
+    target = str(tmp_path / 'flagged.csv')
+    rows, flagged = flag_csv(health_csv, target, detector, chunksize=900)
+    expected = detector.score(health)
+    result = pd.read_csv(target)
+    assert rows == len(health)
+    assert flagged == int(expected['Outlier_Flag'].sum())
+    assert np.allclose(result['Outlier_Score'], expected['Outlier_Score'].round(4))
@@ -0,0 +1,57 @@
+"""pipeline.subgroups against brute-force pandas masks"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline.subgroups import _distinct_columns, discover_subgroups, encode_columns
+
+
+def _health(rows=2000, seed=1):
+    rng = np.random.default_rng(seed)
+    age = rng.choice(['18-24', '25-34', '35-44', None], size=rows)
+    bmi = rng.choice(['Normal', 'Overweight', 'Obese', None], size=rows)
+    high_bp = rng.integers(0, 2, size=rows)
+    risk = 0.1 + 0.3 * (bmi == 'Obese') + 0.2 * high_bp
+    return pd.DataFrame({
+        'Age_Group': age,
+        # Same missing rows as Age_Group, different labels: a relabelled copy
+        'Age_Code': pd.Series(age).map({'18-24': 1, '25-34': 2, '35-44': 3}),
+        'BMI_Category': bmi,
+        'HighBP': high_bp,
+        'Diabetes_binary': (rng.random(rows) < risk).astype(float),
+    })
+
+
+def _mask(df, subgroup):
+    mask = np.ones(len(df), dtype=bool)
+    for condition in subgroup.split(' & '):
+        column, value = condition.split('=', 1)
+        values = df[column]
+        mask &= (values.astype(str) == value).to_numpy()
+    return mask
+
+
+def test_relabelled_column_with_missing_values_is_dropped():
+    encoded = encode_columns(_health(), exclude=('Diabetes_binary',))
+    assert _distinct_columns(encoded) == ['Age_Group', 'BMI_Category', 'HighBP']
+
+
+def test_counts_match_pandas():
+    df = _health()
+    top = discover_subgroups(df, 'Diabetes_binary', depth=2, min_count=50, top=10)
+    assert not top['subgroup'].str.contains('Age_Code').any()
+    for row in top.itertuples():
+        mask = _mask(df, row.subgroup)
+        assert row.count == mask.sum()
+        assert row.events == df.loc[mask, 'Diabetes_binary'].sum()
+        assert row.rate == pytest.approx(df.loc[mask, 'Diabetes_binary'].mean())
+
+
+def test_depth_one_is_the_best_single_condition():
+    df = _health()
+    top = discover_subgroups(df, 'Diabetes_binary', depth=1, min_count=50, top=1)
+    rates = [df.groupby(column)['Diabetes_binary'].agg(['mean', 'size'])
+             for column in ('Age_Group', 'BMI_Category', 'HighBP')]
+    best = max(r.loc[r['size'] >= 50, 'mean'].max() for r in rates)
+    assert top['rate'].iloc[0] == pytest.approx(best)